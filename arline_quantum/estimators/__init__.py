@@ -6,3 +6,5 @@ from arline_quantum.estimators.estimators import CnotCountExpCostFunction
 from arline_quantum.estimators.estimators import GateEqualCostFunction
 from arline_quantum.estimators.estimators import BasicNoiseModel
 from arline_quantum.estimators.estimators import TwoQubitGateCountCostFunction
+from arline_quantum.estimators.estimators import CalibratedFidelityEstimator
+from arline_quantum.estimators.estimators import DensityMatrixFidelityEstimator
@@ -15,8 +15,13 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
+from collections import Counter
+
 import numpy as np
+from arline_quantum.gate_chain.density_matrix import DensityMatrixSimulator, NoiseModel
+from arline_quantum.gate_chain.layers import Layers
 from arline_quantum.gates.cnot import Cnot
+from arline_quantum.gates.measure import Measure
 
 
 class Estimator:
@@ -30,7 +35,7 @@ class Estimator:
 
     @classmethod
     def from_config(cls, cfg):
-        return cls.registered_estimator_classes[cfg["class"]](**cfg["args"])
+        return cls.registered_estimator_classes[cfg["class"]](**cfg.get("args", {}))
 
     def calculate_cost(self, gate_chain):
         raise NotImplementedError()
@@ -58,14 +63,15 @@ class IbmCostFunction(Estimator):
 
     def calculate_cost(self, gate_chain):
         depth_penalty_factor = self.depth_penalty_factor
-        depth = gate_chain.get_depth()
-        num_1q_gates = gate_chain.get_n_qubit_gate_count(n=1)
-        num_2q_gates = gate_chain.get_n_qubit_gate_count(n=2)
+        depth = gate_chain.layers().depth
+        # Count gates by number of qubits in one pass
+        counts = Counter(el.gate.num_qubits for el in gate_chain.chain)
+        num_1q_gates = counts[1]
+        num_2q_gates = counts[2]
         f1q = gate_chain.quantum_hardware.single_qubit_gate_fidelity
         f2q = gate_chain.quantum_hardware.two_qubit_gate_fidelity
         # If we detect three qubit gates, four qubit gates etc return np.nan, since cost function is undefined
-        n_qubits = set([g.gate.num_qubits for g in gate_chain.chain])
-        if max(n_qubits) >= 3:
+        if max(counts, default=0) >= 3:
             return np.nan
         # Otherwise return cost function
         cost = -np.log(depth_penalty_factor) * depth - np.log(f1q) * num_1q_gates - np.log(f2q) * num_2q_gates
@@ -149,6 +155,12 @@ class TwoQubitGateCountCostFunction(Estimator):
 
 
 class DepthCostEstimator(Estimator):
+    """Gate chain depth (number of parallel layers, see :meth:`.GateChain.layers`)
+
+    :param gates: names of gates to take into account, all gates by default
+    :type gates: list
+    """
+
     def __init__(self, gates=None):
         self.gates = gates
 
@@ -162,8 +174,99 @@ class DepthCostEstimator(Estimator):
         return d
 
     def calculate_cost(self, gate_chain):
-        d = self.depth_by_qubit(gate_chain, gate_chain.quantum_hardware)
-        return max(d)
+        if self.gates is None:
+            return gate_chain.layers().depth
+        hw = gate_chain.quantum_hardware
+        gate_connections = [el for el in gate_chain.chain if el.gate.name in self.gates]
+        return Layers(gate_connections, hw.num_qubits, hw.num_cbits).depth
+
+
+class CalibratedFidelityEstimator(Estimator):
+    """Negative log-fidelity of a gate chain from the hardware calibration table
+
+    :math:`C = -\\sum_i \\log(1 - e_i) - \\sum_q \\log F_q(t_q)`, where :math:`e_i` is the error of gate :math:`i`
+    on its qubit (single qubit gates), edge (two qubit gates) or the readout error (measurements) taken from
+    :meth:`.Hardware.get_calibration`, and :math:`F_q(t_q)` is the idle fidelity of qubit :math:`q`
+    (see :meth:`.CalibrationTable.log_idle_fidelity`) after the time :math:`t_q` between its first and last layer.
+    Gate errors are gathered with one NumPy indexing operation over :meth:`.GateChain.qubit_arrays`.
+    The cost is NaN for gates on three or more qubits and for two qubit gates on uncalibrated qubit pairs.
+
+    :param layer_time: duration of a layer, the longest gate time of the calibration by default
+    :type layer_time: float
+    :param decoherence: take T1 / T2 decoherence into account
+    :type decoherence: bool
+    """
+
+    def __init__(self, layer_time=None, decoherence=True):
+        super().__init__()
+        self.layer_time = layer_time
+        self.decoherence = decoherence
+
+    def calculate_cost(self, gate_chain):
+        calibration = gate_chain.quantum_hardware.get_calibration()
+        arity, qubits, measured = gate_chain.qubit_arrays()
+        if (arity > 2).any():
+            return np.nan
+        one = arity == 1
+        two = arity == 2
+        log_fidelity = calibration.log_single_qubit_fidelity()[qubits[one, 0]].sum()
+        edges = calibration.edge_index[qubits[two, 0], qubits[two, 1]]
+        log_fidelity += calibration.log_two_qubit_fidelity()[edges].sum()
+        log_fidelity += calibration.log_readout_fidelity()[qubits[measured, 0]].sum()
+        if self.decoherence:
+            log_fidelity += calibration.log_idle_fidelity(self.qubit_times(gate_chain, calibration)).sum()
+        return -log_fidelity
+
+    def qubit_times(self, gate_chain, calibration):
+        """Time between the first and the last layer of every qubit
+
+        :rtype: np.array
+        """
+        layer_time = self.layer_time
+        if layer_time is None:
+            layer_time = max(calibration.single_qubit_gate_time, calibration.two_qubit_gate_time)
+        layers = gate_chain.layers()
+        span = layers.qubit_busy_layers() + layers.qubit_idle_layers(active_only=True)
+        return span * layer_time
+
+    def fidelity(self, gate_chain):
+        """Estimated fidelity of the gate chain, :math:`e^{-C}`"""
+        return np.exp(-self.calculate_cost(gate_chain))
+
+
+class DensityMatrixFidelityEstimator(Estimator):
+    """Negative log-fidelity of a gate chain from noisy density matrix simulation
+
+    The gate chain is stripped to its qubits (see :meth:`.GateChain.strip_empty_qubits`) and simulated from
+    :math:`|0 \\dots 0\\rangle` with and without noise of the hardware (see :class:`.NoiseModel` and
+    :class:`.DensityMatrixSimulator`), the cost is :math:`-\\log \\mathrm{Tr}(\\rho_{ideal} \\rho_{noisy})`.
+    Measurements are removed before the simulation: they are non-selective and would make the ideal state mixed,
+    so the overlap wouldn't be a fidelity.
+    The simulation is exponential in the number of qubits, it is meant to validate noise-aware compilation
+    on small gate chains, :class:`CalibratedFidelityEstimator` is a linear time approximation.
+
+    :param max_qubits: maximal number of used qubits
+    :type max_qubits: int
+    :param idle_noise: take T1 / T2 relaxation into account
+    :type idle_noise: bool
+    """
+
+    def __init__(self, max_qubits=12, idle_noise=True):
+        super().__init__()
+        self.max_qubits = max_qubits
+        self.idle_noise = idle_noise
+
+    def calculate_cost(self, gate_chain):
+        if len(gate_chain) == 0:
+            return 0.0
+        stripped, _ = gate_chain.strip_empty_qubits()
+        # GateChain can't be imported here (circular import), the stripped chain provides the class
+        chain = type(stripped)(stripped.quantum_hardware)
+        chain.chain.extend(el for el in stripped.chain if not isinstance(el.gate, Measure))
+        noise_model = NoiseModel(chain.quantum_hardware, idle_noise=self.idle_noise)
+        noisy = DensityMatrixSimulator(noise_model, max_qubits=self.max_qubits).run(chain)
+        ideal = DensityMatrixSimulator(max_qubits=self.max_qubits).run(chain)
+        return -np.log(np.real(np.vdot(ideal, noisy)))
 
 
 class BasicNoiseModel(Estimator):
@@ -181,3 +284,5 @@ Estimator.register_estimator(CnotExpCostFunction)
 Estimator.register_estimator(DepthCostEstimator)
 Estimator.register_estimator(GateTypeCostEstimator)
 Estimator.register_estimator(TwoQubitGateCountCostFunction)
+Estimator.register_estimator(CalibratedFidelityEstimator)
+Estimator.register_estimator(DensityMatrixFidelityEstimator)
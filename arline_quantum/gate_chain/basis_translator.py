@@ -14,30 +14,17 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import numpy as np
-
-from arline_quantum.gates.u1 import U1
-from arline_quantum.gates.u2 import U2
+from arline_quantum.gates import qasm_gate_table
+from arline_quantum.gates.gate import Gate
 from arline_quantum.gates.u3 import U3
-
-from arline_quantum.gates.rx import Rx
-from arline_quantum.gates.rz import Rz
-from arline_quantum.gates.r import R
-from arline_quantum.gates.h import H
-
 from arline_quantum.gates.cnot import Cnot
-
 from arline_quantum.gates.xx import Xx
 
-
-from qiskit.quantum_info.synthesis.one_qubit_decompose import OneQubitEulerDecomposer
-
-from qiskit.transpiler.passes.optimization.optimize_1q_gates import Optimize1qGates
-from qiskit.transpiler.passes.basis.basis_translator import BasisTranslator
-from qiskit.converters import circuit_to_dag, dag_to_circuit
-from qiskit.circuit.library.standard_gates.equivalence_library import StandardEquivalenceLibrary as std_eqlib
 from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.decompositions import cnot_rebases, expand_rule, rebase_plan
+from arline_quantum.gate_chain.one_qubit_resynthesis import one_qubit_basis, resynthesize_one_qubit_runs
 
+from arline_quantum.gate_sets.gate_set import GateSet
 from arline_quantum.gate_sets.google import GoogleGateSet
 from arline_quantum.gate_sets.ibm import IbmGateSet
 from arline_quantum.gate_sets.ionq import IonqGateSet
@@ -50,184 +37,100 @@ from arline_quantum.gate_sets.voqc import VoqcGateSet
 
 class ArlineTranslator:
     """Gate Chain Translator Class (backbone for gate set rebase)
+
+    Gates are decomposed to the target gate set with the cheapest rules of
+    :data:`.decomposition_rules` (see :class:`.RebasePlan`, plans are cached per target gate set).
+    If the target gate set has universal continuous single qubit gates, maximal runs of single qubit gates
+    are merged and resynthesized by :func:`.resynthesize_one_qubit_runs`.
     """
 
     def __init__(self, single_q_tol=1e-8):
         self.single_q_tol = single_q_tol
 
-    def merge_u3_gates(self, gate_chain):
-        dag = circuit_to_dag(gate_chain.convert_to("qiskit"))
-        dag = Optimize1qGates(basis=['u3']).run(dag)
-        new_chain = GateChain.convert_from(dag_to_circuit(dag), format_id="qiskit")
+    def _new_chain(self, gate_chain, ops, gate_set=None):
+        hw = gate_chain.quantum_hardware
+        if gate_set is not None:
+            hw = hw.copy()
+            hw.gate_set = gate_set
+        new_chain = GateChain(hw)
+        new_chain.qreg_mapping = {k: dict(v) for k, v in gate_chain.qreg_mapping.items()}
+        new_chain.creg_mapping = {k: dict(v) for k, v in gate_chain.creg_mapping.items()}
+        for g, conn, cregs in ops:
+            new_chain.add_gate(g, conn, cregs, force_connection=True)
         return new_chain
 
+    def _rebase_ops(self, gate_chain, target_classes):
+        basis = one_qubit_basis(target_classes)
+        plan = rebase_plan(target_classes, keep_one_qubit=basis is not None)
+        ops = []
+        for el in gate_chain.chain:
+            g, conn, cregs = el.gate, el.connections, el.cregs
+            if not isinstance(g, Gate) or plan.rule(type(g)) is None:
+                ops.append((g, conn, cregs))
+            else:
+                ops.extend((dg, dconn, []) for dg, dconn in plan.apply(g, conn))
+        if basis is not None:
+            ops = resynthesize_one_qubit_runs(ops, basis, self.single_q_tol, target_classes)
+        return ops
+
+    def rebase(self, gate_chain, gate_set):
+        """Rebase gate chain to the gate set
+
+        :param gate_chain: gate chain
+        :type gate_chain: GateChain
+        :param gate_set: target gate set or name of a registered gate set class
+        :type gate_set: GateSet or str
+        :return: new gate chain, its hardware is a copy of the original one with the target gate set
+        :rtype: GateChain
+
+        :raises ValueError: if some gate can't be expressed in the target gate set
+        """
+        if isinstance(gate_set, str):
+            try:
+                gate_set = GateSet.available_gate_set_classes[gate_set]()
+            except KeyError:
+                raise ValueError(f"Unsupported gate_set ID: {gate_set}")
+        ops = self._rebase_ops(gate_chain, gate_set.gate_list)
+        return self._new_chain(gate_chain, ops, gate_set)
+
+    def merge_u3_gates(self, gate_chain):
+        ops = [(el.gate, el.connections, el.cregs) for el in gate_chain.chain]
+        ops = resynthesize_one_qubit_runs(ops, "u3", self.single_q_tol)
+        return self._new_chain(gate_chain, ops)
+
     def rebase_to_u3_and_2q_gate(self, gate_chain, g_name_2q):
-        circ = gate_chain.convert_to("qiskit")
-        dag = BasisTranslator(std_eqlib, target_basis=['u3', g_name_2q]).run(circuit_to_dag(circ))
-        dag = Optimize1qGates(basis=['u3']).run(dag)
-        new_chain = GateChain.convert_from(dag_to_circuit(dag), format_id="qiskit")
-        return new_chain
+        return self._new_chain(gate_chain, self._rebase_ops(gate_chain, [U3, qasm_gate_table[g_name_2q]]))
 
     def rebase_cx_to_rxx(self, gate_chain):
-        tmp_chain = gate_chain
-        new_chain = GateChain(tmp_chain.quantum_hardware)
-        for el in tmp_chain.chain:
+        ops = []
+        for el in gate_chain.chain:
             g, conn, cregs = el.gate, el.connections, el.cregs
             if isinstance(g, Cnot):
-                new_chain.add_gate(Rx(-np.pi / 2), [conn[0]])
-                new_chain.add_gate(Rz(np.pi / 2), [conn[0]])
-                new_chain.add_gate(Rx(-np.pi / 2), [conn[0]])
-                new_chain.add_gate(Xx(-np.pi / 2), conn)
-                new_chain.add_gate(Rz(np.pi / 2), [conn[0]])
-                new_chain.add_gate(Rx(-np.pi / 2), [conn[0]])
-                new_chain.add_gate(Rx(-np.pi / 2), [conn[1]])
+                ops.extend((rg, rconn, []) for rg, rconn in expand_rule(cnot_rebases[Xx], [], conn))
             else:
-                new_chain.add_gate(g, conn, cregs)
-        return new_chain
+                ops.append((g, conn, cregs))
+        return self._new_chain(gate_chain, ops)
 
     def rebase_to_ibm(self, gate_chain):
-        new_chain = self.rebase_to_u3_and_2q_gate(gate_chain, "cx")
-        new_chain.quantum_hardware.gate_set = IbmGateSet()
-        return new_chain
+        return self.rebase(gate_chain, IbmGateSet())
 
     def rebase_to_google(self, gate_chain):
-        tmp_chain = self.rebase_to_u3_and_2q_gate(gate_chain, "cz")
-        new_chain = GateChain(tmp_chain.quantum_hardware)
-        new_chain.quantum_hardware.gate_set = GoogleGateSet()
-        for el in tmp_chain.chain:
-            g, conn, cregs = el.gate, el.connections, el.cregs
-            if isinstance(g, U3):
-                theta, phi, lam, _ = OneQubitEulerDecomposer()._params_u3(g.u)
-                if not np.isclose(phi + lam, 0, self.single_q_tol):
-                    new_chain.add_gate(Rz(phi + lam), conn)
-                if not (np.isclose(theta, 0, self.single_q_tol) and
-                        np.isclose(phi + np.pi/2, 0, self.single_q_tol)):
-                    # TODO: submit PR to Qiskit with R-gate (temporary disable R)
-                    # new_chain.add_gate(R(theta, phi + np.pi/2), conn)
-                    # r(theta, phi) = u3(theta, phi - pi / 2, -phi + pi / 2)
-                    new_chain.add_gate(U3(theta, phi - np.pi/2, -phi + np.pi / 2), conn)
-            else:
-                new_chain.add_gate(g, conn, cregs)
-        return new_chain
+        return self.rebase(gate_chain, GoogleGateSet())
 
     def rebase_to_ionq(self, gate_chain):
-        tmp_chain = self.rebase_to_u3_and_2q_gate(gate_chain, "cx")
-        tmp_chain = self.rebase_cx_to_rxx(tmp_chain)
-        # Merge U3 gates (do not touch rxx gates)
-        tmp_chain = self.rebase_to_u3_and_2q_gate(tmp_chain, "rxx")
-        new_chain = GateChain(tmp_chain.quantum_hardware)
-        new_chain.quantum_hardware.gate_set = IonqGateSet()
-        for el in tmp_chain.chain:
-            g, conn, cregs = el.gate, el.connections, el.cregs
-            if isinstance(g, U3):
-                angles = OneQubitEulerDecomposer()._params_zxz(g.u)
-                if not np.isclose(angles[2], 0, self.single_q_tol):
-                    new_chain.add_gate(Rz(angles[2]), conn)
-                if not np.isclose(angles[0], 0, self.single_q_tol):
-                    new_chain.add_gate(Rx(angles[0]), conn)
-                if not np.isclose(angles[1], 0, self.single_q_tol):
-                    new_chain.add_gate(Rz(angles[1]), conn)
-            else:
-                new_chain.add_gate(g, conn, cregs)
-        return new_chain
+        return self.rebase(gate_chain, IonqGateSet())
 
     def rebase_to_rigetti(self, gate_chain):
-        tmp_chain = self.rebase_to_u3_and_2q_gate(gate_chain, "cz")
-        new_chain = GateChain(tmp_chain.quantum_hardware)
-        new_chain.quantum_hardware.gate_set = RigettiGateSet()
-
-        Rx_plus_pi2 = Rx.make_discrete(np.pi / 2)()
-        Rx_minus_pi2 = Rx.make_discrete(-np.pi / 2)()
-
-        for el in tmp_chain.chain:
-            g, conn, cregs = el.gate, el.connections, el.cregs
-            if isinstance(g, U3):
-                angles = OneQubitEulerDecomposer()._params_zyz(g.u)
-                if not np.isclose(angles[2], 0, self.single_q_tol):
-                    new_chain.add_gate(Rz(angles[2]), conn)
-                if not np.isclose(angles[0], 0, self.single_q_tol):
-                    new_chain.add_gate(Rx_plus_pi2, conn)
-                    new_chain.add_gate(Rz(angles[0]), conn)
-                    new_chain.add_gate(Rx_minus_pi2, conn)
-                if not np.isclose(angles[1], 0, self.single_q_tol):
-                    new_chain.add_gate(Rz(angles[1]), conn)
-            else:
-                new_chain.add_gate(g, conn, cregs)
-        return new_chain
+        return self.rebase(gate_chain, RigettiGateSet())
 
     def rebase_to_pyzx(self, gate_chain):
-        tmp_chain = self.rebase_to_u3_and_2q_gate(gate_chain, 'cx')
-        new_chain = GateChain(tmp_chain.quantum_hardware)
-        for el in tmp_chain.chain:
-            g, conn, cregs = el.gate, el.connections, el.cregs
-            if isinstance(g, U3):
-                angles = OneQubitEulerDecomposer()._params_zxz(g.u)
-                if not np.isclose(angles[2], 0, self.single_q_tol):
-                    new_chain.add_gate(Rz(angles[2]), conn)
-                if not np.isclose(angles[0], 0, self.single_q_tol):
-                    new_chain.add_gate(Rx(angles[0]), conn)
-                if not np.isclose(angles[1], 0, self.single_q_tol):
-                    new_chain.add_gate(Rz(angles[1]), conn)
-            else:
-                new_chain.add_gate(g, conn, cregs)
-        new_chain.quantum_hardware.gate_set = PyzxGateSet()
-        return new_chain
+        return self.rebase(gate_chain, PyzxGateSet())
 
     def rebase_to_cx_rz_rx(self, gate_chain):
-        tmp_chain = self.rebase_to_u3_and_2q_gate(gate_chain, 'cx')
-        new_chain = GateChain(tmp_chain.quantum_hardware)
-        for el in tmp_chain.chain:
-            g, conn, cregs = el.gate, el.connections, el.cregs
-            if isinstance(g, U3):
-                angles = OneQubitEulerDecomposer()._params_zxz(g.u)
-                if not np.isclose(angles[2], 0, self.single_q_tol):
-                    new_chain.add_gate(Rz(angles[2]), conn)
-                if not np.isclose(angles[0], 0, self.single_q_tol):
-                    new_chain.add_gate(Rx(angles[0]), conn)
-                if not np.isclose(angles[1], 0, self.single_q_tol):
-                    new_chain.add_gate(Rz(angles[1]), conn)
-            else:
-                new_chain.add_gate(g, conn, cregs)
-        new_chain.quantum_hardware.gate_set = CnotRzRxGateSet()
-        return new_chain
+        return self.rebase(gate_chain, CnotRzRxGateSet())
 
     def rebase_to_voqc(self, gate_chain):
-        new_chain = GateChain(gate_chain.quantum_hardware)
-        circ = gate_chain.convert_to("qiskit")
-        dag = BasisTranslator(std_eqlib, target_basis=['u1', 'u2', 'u3', 'rz', 'rx',
-                              'x', 's', 'sdg', 't', 'tdg', 'h', 'cx']).run(circuit_to_dag(circ))
-        dag = Optimize1qGates(basis=['u3']).run(dag)
-        tmp_chain = GateChain.convert_from(dag_to_circuit(dag), format_id="qiskit")
-        for el in tmp_chain.chain:
-            g, conn, cregs = el.gate, el.connections, el.cregs
-            if isinstance(g, U1):
-                phi = g.args[0]
-                new_chain.add_gate(Rz(phi), conn)
-            elif isinstance(g, U2):
-                theta, phi = g.args
-                new_chain.add_gate(Rz(phi-np.pi/2), conn)
-                new_chain.add_gate(H(), conn)
-                new_chain.add_gate(Rz(np.pi/2), conn)
-                new_chain.add_gate(H(), conn)
-                new_chain.add_gate(Rz(theta+np.pi/2), conn)
-            elif isinstance(g, U3):
-                theta, phi, lmbda = g.args
-                new_chain.add_gate(Rz(lmbda-np.pi/2), conn)
-                new_chain.add_gate(H(), conn)
-                new_chain.add_gate(Rz(theta), conn)
-                new_chain.add_gate(H(), conn)
-                new_chain.add_gate(Rz(phi+np.pi/2), conn)
-            elif isinstance(g, Rx):
-                phi = g.args[0]
-                new_chain.add_gate(H(), conn)
-                new_chain.add_gate(Rz(phi), conn)
-                new_chain.add_gate(H(), conn)
-            else:
-                new_chain.add_gate(g, conn, cregs)
-        new_chain.quantum_hardware.gate_set = VoqcGateSet()
-        return new_chain
+        return self.rebase(gate_chain, VoqcGateSet())
 
     def rebase_to_arline(self, gate_chain):
-        new_chain = self.rebase_to_u3_and_2q_gate(gate_chain, "cx")
-        new_chain.quantum_hardware.gate_set = ArlineGateSet()
-        return new_chain
+        return self.rebase(gate_chain, ArlineGateSet())
@@ -0,0 +1,272 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import numpy as np
+
+from arline_quantum.gates.cnot import Cnot
+from arline_quantum.gates.cz import Cz
+from arline_quantum.gates.h import H
+from arline_quantum.gates.identity import I
+from arline_quantum.gates.s import S, Sd
+from arline_quantum.gates.swap import Swap
+from arline_quantum.gates.x import X
+from arline_quantum.gates.y import Y
+from arline_quantum.gates.z import Z
+from arline_quantum.utils.bits import num_words, pack_bits, popcount, unpack_bits
+
+
+class CliffordTableau:
+    """Stabilizer tableau of a Clifford operator (Aaronson-Gottesman representation)
+
+    Row :math:`i` of the tableau is the image :math:`(-1)^{r_i} P(x_i, z_i)` of the generator
+    :math:`X_i` (destabilizer, :math:`i < n`) or :math:`Z_{i - n}` (stabilizer, :math:`i \\geq n`)
+    under conjugation by the operator, see https://arxiv.org/abs/quant-ph/0406196.
+
+    The tableau is stored column-wise: for every qubit the :math:`x` and :math:`z` bits of all :math:`2n` rows
+    are packed into uint64 words, so every gate is a few XOR / AND operations on :math:`2n / 64` words.
+
+    :param num_qubits: number of qubits
+    :type num_qubits: int
+
+    :ivar np.array x: x bits, shape (num_qubits, words)
+    :ivar np.array z: z bits, shape (num_qubits, words)
+    :ivar np.array r: phase bits, shape (words,)
+    """
+
+    def __init__(self, num_qubits):
+        self.num_qubits = num_qubits
+        n = num_qubits
+        eye = np.eye(2 * n, dtype=bool)
+        self.x = pack_bits(eye[:n])
+        self.z = pack_bits(eye[n:])
+        self.r = np.zeros(num_words(2 * n), dtype=np.uint64)
+
+    @classmethod
+    def from_gate_chain(cls, gate_chain):
+        """Create tableau of a Clifford gate chain
+
+        :param gate_chain: gate chain of Clifford gates
+        :type gate_chain: GateChain
+        :rtype: CliffordTableau
+
+        :raises ValueError: when the gate chain contains non-Clifford gates
+        """
+        tableau = cls(gate_chain.quantum_hardware.num_qubits)
+        for el in gate_chain.chain:
+            tableau.apply_gate(el.gate, el.connections)
+        return tableau
+
+    @classmethod
+    def from_bits(cls, x, z, r):
+        """Create tableau from rows
+
+        :param x: x bits, boolean array of shape (2n, n)
+        :type x: np.array
+        :param z: z bits, boolean array of shape (2n, n)
+        :type z: np.array
+        :param r: phase bits, boolean array of shape (2n,)
+        :type r: np.array
+        :rtype: CliffordTableau
+        """
+        x = np.asarray(x, dtype=bool)
+        tableau = cls.__new__(cls)
+        tableau.num_qubits = x.shape[1]
+        tableau.x = pack_bits(x.T)
+        tableau.z = pack_bits(np.asarray(z, dtype=bool).T)
+        tableau.r = pack_bits(r)
+        return tableau
+
+    def to_bits(self):
+        """Return rows of the tableau
+
+        :return: x bits (2n, n), z bits (2n, n), phase bits (2n,)
+        :rtype: tuple
+        """
+        m = 2 * self.num_qubits
+        return unpack_bits(self.x, m).T, unpack_bits(self.z, m).T, unpack_bits(self.r, m)
+
+    def copy(self):
+        tableau = self.__class__.__new__(self.__class__)
+        tableau.num_qubits = self.num_qubits
+        tableau.x = self.x.copy()
+        tableau.z = self.z.copy()
+        tableau.r = self.r.copy()
+        return tableau
+
+    def apply_gate(self, gate, connections):
+        """Apply Clifford gate at the end of the circuit
+
+        :param gate: gate
+        :type gate: Gate
+        :param connections: qubits
+        :type connections: list
+
+        :raises ValueError: when the gate is not supported
+        """
+        try:
+            apply = self._gate_handlers[type(gate)]
+        except KeyError:
+            raise ValueError(f"Gate {gate.name} isn't supported by the Clifford tableau simulator")
+        apply(self, *connections)
+
+    def h(self, a):
+        x, z = self.x, self.z
+        self.r ^= x[a] & z[a]
+        xa = x[a].copy()
+        x[a] = z[a]
+        z[a] = xa
+
+    def s(self, a):
+        x, z = self.x, self.z
+        self.r ^= x[a] & z[a]
+        z[a] ^= x[a]
+
+    def sdg(self, a):
+        x, z = self.x, self.z
+        self.r ^= x[a] & ~z[a]
+        z[a] ^= x[a]
+
+    def pauli_x(self, a):
+        self.r ^= self.z[a]
+
+    def pauli_y(self, a):
+        self.r ^= self.x[a] ^ self.z[a]
+
+    def pauli_z(self, a):
+        self.r ^= self.x[a]
+
+    def cnot(self, a, b):
+        x, z = self.x, self.z
+        xa, zb = x[a], z[b]
+        self.r ^= xa & zb & ~(x[b] ^ z[a])
+        x[b] ^= xa
+        z[a] ^= zb
+
+    def cz(self, a, b):
+        x, z = self.x, self.z
+        xa, xb = x[a], x[b]
+        self.r ^= xa & xb & (z[a] ^ z[b])
+        z[a] ^= xb
+        z[b] ^= xa
+
+    def swap(self, a, b):
+        x, z = self.x, self.z
+        x[[a, b]] = x[[b, a]]
+        z[[a, b]] = z[[b, a]]
+
+    def identity(self, a):
+        pass
+
+    _gate_handlers = {
+        H: h,
+        S: s,
+        Sd: sdg,
+        X: pauli_x,
+        Y: pauli_y,
+        Z: pauli_z,
+        I: identity,
+        Cnot: cnot,
+        Cz: cz,
+        Swap: swap,
+    }
+
+    def symplectic_matrix(self):
+        """Return :math:`2n \\times 2n` binary matrix of the tableau rows ``[x | z]`` (without phases)"""
+        x, z, _ = self.to_bits()
+        return np.hstack([x, z]).astype(np.int64)
+
+    def then(self, other):
+        """Return tableau of this operator followed by ``other``
+
+        :param other: tableau of the second operator
+        :type other: CliffordTableau
+        :rtype: CliffordTableau
+        """
+        n = self.num_qubits
+        if other.num_qubits != n:
+            raise ValueError("Tableaus have different number of qubits")
+        a_x, a_z, a_r = self.to_bits()
+        b_x, b_z, b_r = other.to_bits()
+        b_x, b_z = pack_bits(b_x), pack_bits(b_z)
+        coeffs = np.hstack([a_x, a_z])
+
+        # Row i = (-1)^r_i i^{x_i.z_i} prod_k X_k^{x_ik} prod_k Z_k^{z_ik} conjugated by ``other``
+        acc_x = np.zeros((2 * n, b_x.shape[1]), dtype=np.uint64)
+        acc_z = np.zeros_like(acc_x)
+        exponent = (a_x & a_z).sum(axis=1) + 2 * a_r
+        for k in range(2 * n):
+            rows = np.flatnonzero(coeffs[:, k])
+            if len(rows) == 0:
+                continue
+            x1, z1 = acc_x[rows], acc_z[rows]
+            x2, z2 = b_x[k], b_z[k]
+            exponent[rows] += self._product_phase(x1, z1, x2, z2) + 2 * int(b_r[k])
+            acc_x[rows] = x1 ^ x2
+            acc_z[rows] = z1 ^ z2
+        r = (exponent % 4) // 2
+
+        tableau = self.__class__.__new__(self.__class__)
+        tableau.num_qubits = n
+        tableau.x = pack_bits(unpack_bits(acc_x, n).T)
+        tableau.z = pack_bits(unpack_bits(acc_z, n).T)
+        tableau.r = pack_bits(r)
+        return tableau
+
+    @staticmethod
+    def _product_phase(x1, z1, x2, z2):
+        """Power of :math:`i` in the product of Hermitian Paulis :math:`P(x_1, z_1) P(x_2, z_2)`"""
+        y1 = x1 & z1
+        only_x1 = x1 & ~z1
+        only_z1 = z1 & ~x1
+        plus = (y1 & z2 & ~x2) | (only_x1 & x2 & z2) | (only_z1 & x2 & ~z2)
+        minus = (y1 & x2 & ~z2) | (only_x1 & z2 & ~x2) | (only_z1 & x2 & z2)
+        return popcount(plus) - popcount(minus)
+
+    def inverse(self):
+        """Return tableau of the inverse operator
+
+        :rtype: CliffordTableau
+        """
+        n = self.num_qubits
+        x, z, _ = self.to_bits()
+        # Inverse of a symplectic matrix M is Omega M^T Omega
+        inv_x = np.vstack([z[n:].T, x[n:].T])
+        inv_z = np.vstack([z[:n].T, x[:n].T])
+        inv = self.from_bits(inv_x, inv_z, np.zeros(2 * n, dtype=bool))
+        # The operator followed by ``inv`` is a Pauli operator Q, the inverse is ``inv`` followed by Q
+        _, _, q_r = self.then(inv).to_bits()
+        q_x, q_z = q_r[n:], q_r[:n]
+        inv.r = pack_bits(((inv_x & q_z) ^ (inv_z & q_x)).sum(axis=1) % 2)
+        return inv
+
+    def __eq__(self, other):
+        if not isinstance(other, CliffordTableau) or other.num_qubits != self.num_qubits:
+            return False
+        m = 2 * self.num_qubits
+        return (
+            np.array_equal(unpack_bits(self.x, m), unpack_bits(other.x, m))
+            and np.array_equal(unpack_bits(self.z, m), unpack_bits(other.z, m))
+            and np.array_equal(unpack_bits(self.r, m), unpack_bits(other.r, m))
+        )
+
+    def __str__(self):
+        x, z, r = self.to_bits()
+        lines = []
+        for i in range(2 * self.num_qubits):
+            paulis = "".join("IXZY"[int(a) + 2 * int(b)] for a, b in zip(x[i], z[i]))
+            lines.append(("-" if r[i] else "+") + paulis)
+        return "\n".join(lines)
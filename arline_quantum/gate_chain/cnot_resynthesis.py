@@ -0,0 +1,102 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.gate_connection import GateConnection
+from arline_quantum.gate_chain.parity_matrix import ParityMatrix, route_cnots, synthesize_cnot_circuit
+from arline_quantum.gates.cnot import Cnot
+
+
+class CnotResynthesisOptimizer:
+    """Linear reversible resynthesis of Cnot blocks
+
+    Cnot gates are collected into blocks until another gate touches one of the block qubits
+    (gates on other qubits commute with the block and are moved in front of it).
+    Every block is resynthesized from its parity matrix with :func:`.synthesize_cnot_circuit`
+    and replaced if the new circuit has fewer Cnots.
+
+    :param connectivity_aware: respect qubit connectivity of the gate chain hardware
+    :type connectivity_aware: bool
+    :param section_size: PMH section size
+    :type section_size: int
+    :param min_block_size: smaller blocks are kept as is
+    :type min_block_size: int
+    """
+
+    def __init__(self, connectivity_aware=False, section_size=None, min_block_size=3):
+        self.connectivity_aware = connectivity_aware
+        self.section_size = section_size
+        self.min_block_size = min_block_size
+
+    def run(self, gate_chain):
+        """Optimize gate chain
+
+        :param gate_chain: gate chain to optimize
+        :type gate_chain: GateChain
+        :return: optimized gate chain
+        :rtype: GateChain
+        """
+        hw = gate_chain.quantum_hardware
+        qubit_connectivity = hw.qubit_connectivity if self.connectivity_aware else None
+        if qubit_connectivity is not None and qubit_connectivity.check_fully_connected():
+            qubit_connectivity = None
+        cnot = Cnot()
+
+        result = []
+        block = []
+        block_qubits = set()
+
+        def flush():
+            if not block:
+                return
+            result.extend(self._resynthesize(block, block_qubits, qubit_connectivity, hw, cnot))
+            block.clear()
+            block_qubits.clear()
+
+        for el in gate_chain.chain:
+            if type(el.gate) is Cnot and not el.cregs:
+                block.append(el)
+                block_qubits.update(el.connections)
+            else:
+                if not block_qubits.isdisjoint(el.connections):
+                    flush()
+                result.append(el)
+        flush()
+
+        new_chain = GateChain(hw)
+        new_chain.qreg_mapping = {k: dict(v) for k, v in gate_chain.qreg_mapping.items()}
+        new_chain.creg_mapping = {k: dict(v) for k, v in gate_chain.creg_mapping.items()}
+        new_chain.chain.extend(result)
+        return new_chain
+
+    def _resynthesize(self, block, block_qubits, qubit_connectivity, hw, cnot):
+        if len(block) < self.min_block_size:
+            return list(block)
+        qubits = sorted(block_qubits)
+        local = {q: i for i, q in enumerate(qubits)}
+        parity_matrix = ParityMatrix(len(qubits))
+        for el in block:
+            parity_matrix.add_row(local[el.connections[0]], local[el.connections[1]])
+        cnots = synthesize_cnot_circuit(parity_matrix, section_size=self.section_size)
+        cnots = [(qubits[c], qubits[t]) for c, t in cnots]
+        if qubit_connectivity is not None:
+            # Paths may pass through qubits outside of the block, their state is restored by the Cnot chains
+            cnots = route_cnots(cnots, qubit_connectivity)
+        if len(cnots) >= len(block):
+            return list(block)
+        return [GateConnection(hw, cnot, [c, t], []) for c, t in cnots]
+
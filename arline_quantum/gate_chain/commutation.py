@@ -0,0 +1,188 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import numpy as np
+
+from arline_quantum.gates.gate import Gate
+from arline_quantum.gates.ccnot import Ccnot
+from arline_quantum.gates.ch import Ch
+from arline_quantum.gates.cnot import Cnot
+from arline_quantum.gates.crx import Crx
+from arline_quantum.gates.cry import Cry
+from arline_quantum.gates.crz import Crz
+from arline_quantum.gates.cswap import Cswap
+from arline_quantum.gates.cu1 import Cu1
+from arline_quantum.gates.cu3 import Cu3
+from arline_quantum.gates.cy import Cy
+from arline_quantum.gates.cz import Cz
+from arline_quantum.gates.identity import I
+from arline_quantum.gates.rx import Rx
+from arline_quantum.gates.ry import Ry
+from arline_quantum.gates.rz import Rz
+from arline_quantum.gates.s import S
+from arline_quantum.gates.t import T
+from arline_quantum.gates.u1 import U1
+from arline_quantum.gates.x import X
+from arline_quantum.gates.xx import Xx
+from arline_quantum.gates.y import Y
+from arline_quantum.gates.yy import Yy
+from arline_quantum.gates.z import Z
+from arline_quantum.gates.zz import Zz
+
+
+# Pauli basis in which a gate is block diagonal on each of its qubits, ``None`` if it isn't.
+# If on every shared qubit both gates are block diagonal in the same basis, the gates commute.
+# Subclasses (Sd, Td, discrete gates made by ``make_discrete``) are resolved through the MRO.
+qubit_bases = {
+    I: ("I",),
+    Z: ("Z",),
+    S: ("Z",),
+    T: ("Z",),
+    Rz: ("Z",),
+    U1: ("Z",),
+    X: ("X",),
+    Rx: ("X",),
+    Y: ("Y",),
+    Ry: ("Y",),
+    Cz: ("Z", "Z"),
+    Crz: ("Z", "Z"),
+    Cu1: ("Z", "Z"),
+    Zz: ("Z", "Z"),
+    Xx: ("X", "X"),
+    Yy: ("Y", "Y"),
+    Cnot: ("Z", "X"),
+    Crx: ("Z", "X"),
+    Cy: ("Z", "Y"),
+    Cry: ("Z", "Y"),
+    Ch: ("Z", None),
+    Cu3: ("Z", None),
+    Ccnot: ("Z", "Z", "X"),
+    Cswap: ("Z", None, None),
+}
+
+
+class CommutationChecker:
+    """Commutation oracle for gates placed on qubits
+
+    Commutation is decided from gate-type rules first (disjoint supports, identity gates, gates block
+    diagonal in the same basis on every shared qubit, e.g. diagonal gates or shared controls).
+    Only if the rules can't decide, the gate unitaries are multiplied on the union of touched qubits.
+    Matrix results are memoized by gate classes, angles and the relative qubit overlap.
+
+    :param tol: absolute tolerance for the matrix check
+    :type tol: float
+    :param max_cache_size: maximal number of memoized matrix checks
+    :type max_cache_size: int
+    """
+
+    def __init__(self, tol=1e-7, max_cache_size=100000):
+        self.tol = tol
+        self.max_cache_size = max_cache_size
+        self._cache = {}
+        self._bases_by_type = {}
+
+    def commute(self, gate_1, connections_1, gate_2, connections_2):
+        """Return True if gate operators commute, False otherwise
+
+        :param gate_1: first gate
+        :type gate_1: Instruction
+        :param connections_1: qubits of the first gate
+        :type connections_1: list
+        :param gate_2: second gate
+        :type gate_2: Instruction
+        :param connections_2: qubits of the second gate
+        :type connections_2: list
+        :rtype: bool
+        """
+        shared = set(connections_1).intersection(connections_2)
+        if not shared:
+            return True
+        # Measurements, barriers and other non-unitary instructions act as hard boundaries
+        if not isinstance(gate_1, Gate) or not isinstance(gate_2, Gate):
+            return False
+
+        bases_1 = self._qubit_bases(type(gate_1))
+        bases_2 = self._qubit_bases(type(gate_2))
+        if bases_1 == ("I",) or bases_2 == ("I",):
+            return True
+        if bases_1 is not None and bases_2 is not None:
+            for q in shared:
+                b1 = bases_1[connections_1.index(q)]
+                if b1 is None or b1 != bases_2[connections_2.index(q)]:
+                    break
+            else:
+                return True
+        return self._commute_by_matrix(gate_1, connections_1, gate_2, connections_2)
+
+    def _qubit_bases(self, gate_class):
+        try:
+            return self._bases_by_type[gate_class]
+        except KeyError:
+            bases = None
+            for cls in gate_class.__mro__:
+                if cls in qubit_bases:
+                    bases = qubit_bases[cls]
+                    break
+            self._bases_by_type[gate_class] = bases
+            return bases
+
+    def _commute_by_matrix(self, gate_1, connections_1, gate_2, connections_2):
+        # Relabel qubits in order of appearance so that the key only depends on the relative overlap
+        local = {}
+        for q in list(connections_1) + list(connections_2):
+            if q not in local:
+                local[q] = len(local)
+        local_1 = tuple(local[q] for q in connections_1)
+        local_2 = tuple(local[q] for q in connections_2)
+        key = (
+            type(gate_1),
+            tuple(round(float(a), 12) for a in gate_1._args),
+            local_1,
+            type(gate_2),
+            tuple(round(float(a), 12) for a in gate_2._args),
+            local_2,
+        )
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        num_qubits = len(local)
+        u1 = self._local_operator(gate_1._u, local_1, num_qubits)
+        u2 = self._local_operator(gate_2._u, local_2, num_qubits)
+        result = bool((np.abs(u1 @ u2 - u2 @ u1) < self.tol).all())
+
+        if len(self._cache) >= self.max_cache_size:
+            self._cache.clear()
+        self._cache[key] = result
+        return result
+
+    @staticmethod
+    def _local_operator(u, positions, num_qubits):
+        """Embed gate unitary ``u`` acting on ``positions`` into an operator on ``num_qubits`` qubits.
+        The first connection of a gate corresponds to the most significant index of its matrix.
+        """
+        k = len(positions)
+        op = np.eye(2 ** num_qubits, dtype=complex).reshape([2] * (2 * num_qubits))
+        gate_tensor = np.reshape(u, [2] * (2 * k))
+        op = np.tensordot(gate_tensor, op, axes=(list(range(k, 2 * k)), list(positions)))
+        op = np.moveaxis(op, list(range(k)), list(positions))
+        return op.reshape(2 ** num_qubits, 2 ** num_qubits)
+
+    def clear_cache(self):
+        """Remove memoized matrix checks"""
+        self._cache.clear()
@@ -18,12 +18,57 @@
 import os
 import tempfile
 
-from arline_quantum.gate_chain.gate_chain import GateChain
+import numpy as np
 
-from qiskit import QuantumCircuit
-from cirq.contrib.qasm_import import circuit_from_qasm
-import pytket.qasm as pyqasm
-from cirq import NamedQubit
+from arline_quantum.gate_chain.gate_chain import AstInterpreter, GateChain
+from arline_quantum.gates import qasm_gate_table
+from arline_quantum.gates.barrier import Barrier
+from arline_quantum.gates.measure import Measure
+
+# Qiskit, Cirq and Pytket are imported in the converter methods, so they are loaded only when used
+
+# Circuit objects are converted directly, operation by operation, through tables keyed by OPENQASM gate names:
+# the result is the same as of the QASM round trip, but angles are not rounded by the QASM formatting.
+# Operations without table entries (custom gates, conditions, symbolic parameters) fall back to the QASM round trip.
+
+
+class _Unsupported(Exception):
+    """Circuit can't be converted directly"""
+
+
+def _qasm_names():
+    """Gate class -> OPENQASM name, discrete subclasses are resolved through the MRO"""
+    return {g: name for name, g in qasm_gate_table.items()}
+
+
+_qasm_name_by_class = _qasm_names()
+
+
+def qasm_name(gate):
+    """OPENQASM name of a gate
+
+    :param gate: gate
+    :type gate: Gate
+    :return: OPENQASM name, None if the gate class isn't in :data:`.qasm_gate_table`
+    :rtype: str
+    """
+    gate_class = type(gate)
+    try:
+        return _qasm_name_by_class[gate_class]
+    except KeyError:
+        for base in gate_class.__mro__[1:]:
+            if base in _qasm_name_by_class:
+                _qasm_name_by_class[gate_class] = _qasm_name_by_class[base]
+                return _qasm_name_by_class[base]
+    _qasm_name_by_class[gate_class] = None
+    return None
+
+
+def _real_params(params):
+    try:
+        return [float(p) for p in params]
+    except (TypeError, ValueError):
+        raise _Unsupported()
 
 
 class GateChainConverter:
@@ -41,17 +86,113 @@ class GateChainConverter:
 class QiskitGateChainConverter(GateChainConverter):
     format_id = "qiskit"
 
+    @staticmethod
+    def _gate_classes():
+        from qiskit.circuit import library
+
+        return {
+            "u3": library.U3Gate,
+            "u2": library.U2Gate,
+            "u1": library.U1Gate,
+            "cx": library.CXGate,
+            "id": library.IGate,
+            "x": library.XGate,
+            "y": library.YGate,
+            "z": library.ZGate,
+            "h": library.HGate,
+            "s": library.SGate,
+            "sdg": library.SdgGate,
+            "t": library.TGate,
+            "tdg": library.TdgGate,
+            "rx": library.RXGate,
+            "ry": library.RYGate,
+            "rz": library.RZGate,
+            "r": library.RGate,
+            "cy": library.CYGate,
+            "cz": library.CZGate,
+            "ch": library.CHGate,
+            "swap": library.SwapGate,
+            "ccx": library.CCXGate,
+            "crx": library.CRXGate,
+            "cry": library.CRYGate,
+            "crz": library.CRZGate,
+            "cu1": library.CU1Gate,
+            "cu3": library.CU3Gate,
+            "cswap": library.CSwapGate,
+            "rxx": library.RXXGate,
+            "ryy": library.RYYGate,
+            "rzz": library.RZZGate,
+        }
+
     @staticmethod
     def from_gate_chain(gate_chain):
+        try:
+            return QiskitGateChainConverter._from_gate_chain_direct(gate_chain)
+        except _Unsupported:
+            return QiskitGateChainConverter._from_gate_chain_qasm(gate_chain)
+
+    @staticmethod
+    def _unchecked_append(circuit_object):
+        """Method appending an instruction to the circuit without argument checks and broadcasting
+
+        ``QuantumCircuit._append`` is used, the instructions built by the converter are valid by construction.
+        It isn't a public Qiskit API, so ``QuantumCircuit.append`` is returned if it's missing.
+        """
+        append = getattr(circuit_object, "_append", None)
+        if not callable(append):
+            return circuit_object.append
+        return append
+
+    @staticmethod
+    def _from_gate_chain_direct(gate_chain):
+        from qiskit import ClassicalRegister, QuantumCircuit, QuantumRegister
+        from qiskit.circuit import Barrier as QiskitBarrier, Measure as QiskitMeasure
+
+        gate_classes = QiskitGateChainConverter._gate_classes()
+        num_qubits = gate_chain.quantum_hardware.num_qubits
+        circuit_object = QuantumCircuit(QuantumRegister(num_qubits, "q"), ClassicalRegister(num_qubits, "c"))
+        qubits, clbits = circuit_object.qubits, circuit_object.clbits
+        append = QiskitGateChainConverter._unchecked_append(circuit_object)
+        # Gates without parameters are shared between instructions
+        constant_gates = {}
+        measure = QiskitMeasure()
+        for el in gate_chain.chain:
+            gate = el.gate
+            qargs = [qubits[q] for q in el.connections]
+            if isinstance(gate, Measure):
+                append(measure, qargs, [clbits[el.cregs[0]]])
+                continue
+            if isinstance(gate, Barrier):
+                append(QiskitBarrier(len(qargs)), qargs, [])
+                continue
+            name = qasm_name(gate)
+            if name not in gate_classes:
+                raise _Unsupported()
+            if gate.args:
+                op = gate_classes[name](*gate.args)
+            else:
+                op = constant_gates.get(name)
+                if op is None:
+                    op = constant_gates[name] = gate_classes[name]()
+            append(op, qargs, [])
+        return circuit_object
+
+    @staticmethod
+    def _from_gate_chain_qasm(gate_chain):
+        from qiskit import QuantumCircuit
+
         qasm = gate_chain.to_qasm(qreg_name="q")
         circuit_object = QuantumCircuit.from_qasm_str(qasm)
         return circuit_object
 
     @staticmethod
     def to_gate_chain(circuit_object, **kwargs):
-        qasm_data = circuit_object.qasm()
-        lines = qasm_data.split("\n")
-        gate_chain = GateChain.from_qasm_list_of_lines(lines, **kwargs)
+        try:
+            gate_chain = QiskitGateChainConverter._to_gate_chain_direct(circuit_object, **kwargs)
+        except _Unsupported:
+            qasm_data = circuit_object.qasm()
+            lines = qasm_data.split("\n")
+            gate_chain = GateChain.from_qasm_list_of_lines(lines, **kwargs)
         # Saving Qiskit circuit layout dictionary to qreg_mapping
         assert len(gate_chain.qreg_mapping) == 1, "Only one quantum register is supported in Qiskit converter"
         qreg_name = list(gate_chain.qreg_mapping.keys())[0]
@@ -63,12 +204,104 @@ class QiskitGateChainConverter(GateChainConverter):
                 mapping_dict[qreg] = circuit_object._layout[i].index
         return gate_chain
 
+    @staticmethod
+    def _bit_indices(registers, bits):
+        """Bit -> index in the order of the QASM register declarations"""
+        indices = {}
+        for reg in registers:
+            for bit in reg:
+                if bit in indices:
+                    raise _Unsupported()
+                indices[bit] = len(indices)
+        if len(indices) != len(bits):
+            raise _Unsupported()
+        return indices
+
+    @staticmethod
+    def _to_gate_chain_direct(circuit_object, quantum_hardware=None):
+        qubit_indices = QiskitGateChainConverter._bit_indices(circuit_object.qregs, circuit_object.qubits)
+        clbit_indices = QiskitGateChainConverter._bit_indices(circuit_object.cregs, circuit_object.clbits)
+        operations = []
+        for instruction in circuit_object.data:
+            op = instruction.operation
+            name = op.name
+            if getattr(op, "condition", None) is not None or (
+                name not in qasm_gate_table and name not in ("measure", "barrier")
+            ):
+                raise _Unsupported()
+            operations.append(
+                (
+                    name,
+                    _real_params(op.params),
+                    [qubit_indices[q] for q in instruction.qubits],
+                    [clbit_indices[c] for c in instruction.clbits],
+                )
+            )
+
+        interpreter = AstInterpreter.for_hardware(quantum_hardware)
+        for reg in circuit_object.qregs:
+            interpreter.add_qreg(reg.name, reg.size)
+        for reg in circuit_object.cregs:
+            interpreter.add_creg(reg.name, reg.size)
+        for name, params, qargs, cargs in operations:
+            interpreter.add_operation(name, params, qargs, cargs)
+        return interpreter.gate_chain
+
 
 class CirqGateChainConverter(GateChainConverter):
     format_id = "cirq"
 
     @staticmethod
     def from_gate_chain(gate_chain):
+        try:
+            return CirqGateChainConverter._from_gate_chain_direct(gate_chain)
+        except _Unsupported:
+            return CirqGateChainConverter._from_gate_chain_qasm(gate_chain)
+
+    @staticmethod
+    def _qelib_gates():
+        """Gate table of the Cirq QASM importer, None if it isn't available
+
+        The table isn't a public Cirq API, so it may be missing or changed in other Cirq versions.
+        """
+        try:
+            from cirq.contrib.qasm_import._parser import QasmParser
+
+            return QasmParser.qelib_gates
+        except (ImportError, AttributeError):
+            return None
+
+    @staticmethod
+    def _from_gate_chain_direct(gate_chain):
+        import cirq
+
+        # The result is the same as of circuit_from_qasm
+        qelib_gates = CirqGateChainConverter._qelib_gates()
+        if qelib_gates is None:
+            raise _Unsupported()
+
+        qubits = [cirq.NamedQubit(f"q_{n}") for n in range(gate_chain.quantum_hardware.num_qubits)]
+        operations = []
+        for el in gate_chain.chain:
+            gate = el.gate
+            qargs = [[qubits[q]] for q in el.connections]
+            if isinstance(gate, Measure):
+                operations.append(cirq.measure(qargs[0][0], key=f"c_{el.cregs[0]}"))
+                continue
+            statement = qelib_gates.get(qasm_name(gate))
+            if statement is None:
+                raise _Unsupported()
+            try:
+                operations.extend(statement.on(list(gate.args), qargs, 0))
+            except (AttributeError, TypeError):
+                # Signature of the private QasmGateStatement.on has changed
+                raise _Unsupported()
+        return cirq.Circuit(operations)
+
+    @staticmethod
+    def _from_gate_chain_qasm(gate_chain):
+        from cirq.contrib.qasm_import import circuit_from_qasm
+
         # TODO fix it
         # qasm = gate_chain.to_qasm(qreg_name="q")
         # qasm = f"creg c[{gate_chain.quantum_hardware.num_qubits}];\n" + qasm
@@ -81,8 +314,90 @@ class CirqGateChainConverter(GateChainConverter):
         circuit_object = circuit_from_qasm(qasm_data)
         return circuit_object
 
+    @staticmethod
+    def _qasm_operation(gate):
+        """OPENQASM name and parameters of a Cirq gate as written by ``cirq.Circuit.to_qasm``"""
+        import cirq
+        from cirq.circuits.qasm_output import QasmUGate
+
+        gate_type = type(gate)
+        if cirq.is_parameterized(gate):
+            raise _Unsupported()
+        if gate_type is QasmUGate:
+            return "u3", [gate.theta * np.pi, gate.phi * np.pi, gate.lmda * np.pi]
+        if gate_type is cirq.IdentityGate and gate.num_qubits() == 1:
+            return "id", []
+        if gate_type is cirq.CSwapGate:
+            return "cswap", []
+        if gate_type is cirq.ControlledGate:
+            # Controlled gates of the Cirq QASM importer, with a single control qubit
+            sub_gate = gate.sub_gate
+            if gate != cirq.ControlledGate(sub_gate) or cirq.is_parameterized(sub_gate):
+                raise _Unsupported()
+            if type(sub_gate) is QasmUGate:
+                if sub_gate.theta == 0 and sub_gate.phi == 0:
+                    return "cu1", [sub_gate.lmda * np.pi]
+                return "cu3", [sub_gate.theta * np.pi, sub_gate.phi * np.pi, sub_gate.lmda * np.pi]
+            names = {cirq.Rx: "crx", cirq.Ry: "cry", cirq.Rz: "crz"}
+            if type(sub_gate) in names:
+                return names[type(sub_gate)], [float(sub_gate.exponent) * np.pi]
+            raise _Unsupported()
+        if not isinstance(gate, cirq.EigenGate):
+            raise _Unsupported()
+        exponent = float(gate.exponent)
+        shift = gate.global_shift
+        if isinstance(gate, (cirq.XXPowGate, cirq.YYPowGate, cirq.ZZPowGate)):
+            # The Cirq QASM importer ignores the global phase of rxx, ryy and rzz
+            if shift not in (0, -0.5):
+                raise _Unsupported()
+            names = {cirq.XXPowGate: "rxx", cirq.YYPowGate: "ryy", cirq.ZZPowGate: "rzz"}
+            return names[gate_type], [exponent * np.pi]
+        # Subclasses (cirq.X is a XPowGate) are written by the _qasm_ methods of the base classes
+        if isinstance(gate, cirq.Rx):
+            return "rx", [exponent * np.pi]
+        if isinstance(gate, cirq.Ry):
+            return "ry", [exponent * np.pi]
+        if isinstance(gate, cirq.Rz):
+            return "rz", [exponent * np.pi]
+        if isinstance(gate, cirq.XPowGate):
+            if shift == 0 and exponent == 1:
+                return "x", []
+            if shift == 0 and exponent in (0.5, -0.5):
+                raise _Unsupported()
+            return "rx", [exponent * np.pi]
+        if isinstance(gate, cirq.YPowGate):
+            if exponent == 1 and shift != -0.5:
+                return "y", []
+            return "ry", [exponent * np.pi]
+        if isinstance(gate, cirq.ZPowGate):
+            names = {1: "z", 0.5: "s", -0.5: "sdg", 0.25: "t", -0.25: "tdg"}
+            if shift == 0 and exponent in names:
+                return names[exponent], []
+            return "rz", [exponent * np.pi]
+        if isinstance(gate, cirq.HPowGate):
+            if exponent == 0:
+                return "id", []
+            if exponent == 1 and shift == 0:
+                return "h", []
+        elif isinstance(gate, cirq.CXPowGate) and exponent % 2 == 1:
+            return "cx", []
+        elif isinstance(gate, cirq.CZPowGate) and exponent % 2 == 1:
+            return "cz", []
+        elif isinstance(gate, cirq.SwapPowGate) and exponent == 1:
+            return "swap", []
+        elif isinstance(gate, cirq.CCXPowGate) and exponent == 1:
+            return "ccx", []
+        raise _Unsupported()
+
     @staticmethod
     def to_gate_chain(circuit_object, **kwargs):
+        try:
+            return CirqGateChainConverter._to_gate_chain_direct(circuit_object)
+        except _Unsupported:
+            pass
+
+        from cirq import NamedQubit
+
         qubit_order = {NamedQubit(f'q_{n}'): NamedQubit(f'q_{n}') for n in range(len(circuit_object.all_qubits()))}
 
         # TODO: Check how to pass qubit order
@@ -93,21 +408,115 @@ class CirqGateChainConverter(GateChainConverter):
 
         return gate_chain
 
+    @staticmethod
+    def _to_gate_chain_direct(circuit_object):
+        import cirq
+
+        # Qubits are ordered as in ``circuit_object.to_qasm()``
+        qubits = sorted(circuit_object.all_qubits())
+        qubit_indices = {q: i for i, q in enumerate(qubits)}
+        operations = []
+        for op in circuit_object.all_operations():
+            if not isinstance(op, (cirq.GateOperation, cirq.ControlledOperation)):
+                raise _Unsupported()
+            gate = op.gate
+            name, params = CirqGateChainConverter._qasm_operation(gate)
+            operations.append((name, params, [qubit_indices[q] for q in op.qubits]))
+
+        interpreter = AstInterpreter.for_hardware(None)
+        interpreter.add_qreg("q", len(qubits))
+        for name, params, qargs in operations:
+            interpreter.add_operation(name, params, qargs)
+        return interpreter.gate_chain
+
 
 class PytketGateChainConverter(GateChainConverter):
     format_id = "pytket"
 
+    @staticmethod
+    def _op_types():
+        """OPENQASM name -> Pytket OpType, parameters are in half-turns"""
+        from pytket import OpType
+
+        return {
+            "u3": OpType.U3,
+            "u2": OpType.U2,
+            "u1": OpType.U1,
+            "cx": OpType.CX,
+            "id": OpType.noop,
+            "x": OpType.X,
+            "y": OpType.Y,
+            "z": OpType.Z,
+            "h": OpType.H,
+            "s": OpType.S,
+            "sdg": OpType.Sdg,
+            "t": OpType.T,
+            "tdg": OpType.Tdg,
+            "rx": OpType.Rx,
+            "ry": OpType.Ry,
+            "rz": OpType.Rz,
+            "cy": OpType.CY,
+            "cz": OpType.CZ,
+            "ch": OpType.CH,
+            "swap": OpType.SWAP,
+            "ccx": OpType.CCX,
+            "crx": OpType.CRx,
+            "cry": OpType.CRy,
+            "crz": OpType.CRz,
+            "cu1": OpType.CU1,
+            "cu3": OpType.CU3,
+            "cswap": OpType.CSWAP,
+            "rxx": OpType.XXPhase,
+            "ryy": OpType.YYPhase,
+            "rzz": OpType.ZZPhase,
+            "r": OpType.PhasedX,
+        }
+
     @staticmethod
     def from_gate_chain(gate_chain):
-        qasm = gate_chain.to_qasm(qreg_name="q")
-        circuit_object = pyqasm.circuit_from_qasm_str(qasm)
+        try:
+            return PytketGateChainConverter._from_gate_chain_direct(gate_chain)
+        except _Unsupported:
+            import pytket.qasm as pyqasm
+
+            qasm = gate_chain.to_qasm(qreg_name="q")
+            circuit_object = pyqasm.circuit_from_qasm_str(qasm)
+            return circuit_object
+
+    @staticmethod
+    def _from_gate_chain_direct(gate_chain):
+        from pytket import Circuit
+
+        op_types = PytketGateChainConverter._op_types()
+        num_qubits = gate_chain.quantum_hardware.num_qubits
+        circuit_object = Circuit()
+        qubits = list(circuit_object.add_q_register("q", num_qubits))
+        bits = list(circuit_object.add_c_register("c", num_qubits))
+        for el in gate_chain.chain:
+            gate = el.gate
+            qargs = [qubits[q] for q in el.connections]
+            if isinstance(gate, Measure):
+                circuit_object.Measure(qargs[0], bits[el.cregs[0]])
+                continue
+            if isinstance(gate, Barrier):
+                circuit_object.add_barrier(qargs)
+                continue
+            op_type = op_types.get(qasm_name(gate))
+            if op_type is None:
+                raise _Unsupported()
+            circuit_object.add_gate(op_type, [a / np.pi for a in gate.args], qargs)
         return circuit_object
 
     @staticmethod
     def to_gate_chain(circuit_object, qmap=None, **kwargs):
-        qasm_data = pyqasm.circuit_to_qasm_str(circuit_object)
-        lines = qasm_data.split("\n")
-        gate_chain = GateChain.from_qasm_list_of_lines(lines, **kwargs)
+        try:
+            gate_chain = PytketGateChainConverter._to_gate_chain_direct(circuit_object, **kwargs)
+        except _Unsupported:
+            import pytket.qasm as pyqasm
+
+            qasm_data = pyqasm.circuit_to_qasm_str(circuit_object)
+            lines = qasm_data.split("\n")
+            gate_chain = GateChain.from_qasm_list_of_lines(lines, **kwargs)
         assert len(gate_chain.qreg_mapping) == 1, "Only one quantum register is supported in Pytket converter"
         qreg_name = list(gate_chain.qreg_mapping.keys())[0]
 
@@ -120,3 +529,37 @@ class PytketGateChainConverter(GateChainConverter):
         else:
             gate_chain.qreg_mapping[qreg_name] = {q: q for q in range(num_qubits)}
         return gate_chain
+
+    @staticmethod
+    def _to_gate_chain_direct(circuit_object, quantum_hardware=None):
+        from pytket import OpType
+
+        names = {op_type: name for name, op_type in PytketGateChainConverter._op_types().items()}
+        names[OpType.Measure] = "measure"
+        names[OpType.Barrier] = "barrier"
+        qregs = {q.reg_name for q in circuit_object.qubits}
+        cregs = {b.reg_name for b in circuit_object.bits}
+        if len(qregs) > 1 or len(cregs) > 1:
+            raise _Unsupported()
+        if any(len(q.index) != 1 for q in circuit_object.qubits) or any(len(b.index) != 1 for b in circuit_object.bits):
+            raise _Unsupported()
+
+        operations = []
+        for command in circuit_object.get_commands():
+            op = command.op
+            name = names.get(op.type)
+            if name is None:
+                raise _Unsupported()
+            params = [p * np.pi for p in _real_params(op.params)] if name not in ("measure", "barrier") else []
+            operations.append(
+                (name, params, [q.index[0] for q in command.qubits], [b.index[0] for b in command.bits])
+            )
+
+        interpreter = AstInterpreter.for_hardware(quantum_hardware)
+        for reg_name in qregs:
+            interpreter.add_qreg(reg_name, max(q.index[0] for q in circuit_object.qubits) + 1)
+        for reg_name in cregs:
+            interpreter.add_creg(reg_name, max(b.index[0] for b in circuit_object.bits) + 1)
+        for name, params, qargs, cargs in operations:
+            interpreter.add_operation(name, params, qargs, cargs)
+        return interpreter.gate_chain
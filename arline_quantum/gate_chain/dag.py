@@ -0,0 +1,224 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from heapq import heappop, heappush
+
+import numpy as np
+
+from arline_quantum.gate_chain.gate_chain import GateChain
+
+
+class GateChainDag:
+    """Dependency DAG of a gate chain
+
+    Nodes are gate connections of the gate chain (node ``i`` is ``gate_chain.chain[i]``), wires are qubits
+    and classical bits (wire ``num_qubits + c`` for classical bit ``c``).
+    Every node has a slot per wire, slots of all nodes are stored in flat lists:
+    wire, predecessor and successor node on the wire (-1 for the circuit input / output).
+    The DAG is built in one pass over the gate chain, node removal and replacement are :math:`O(1)`
+    per wire of the node.
+
+    :param gate_chain: gate chain
+    :type gate_chain: GateChain
+
+    :ivar list nodes: gate connections, removed nodes are None
+    :ivar list first: first node on every wire, -1 for empty wires
+    :ivar list last: last node on every wire, -1 for empty wires
+    """
+
+    def __init__(self, gate_chain):
+        hw = gate_chain.quantum_hardware
+        self.quantum_hardware = hw
+        self.qreg_mapping = {k: dict(v) for k, v in gate_chain.qreg_mapping.items()}
+        self.creg_mapping = {k: dict(v) for k, v in gate_chain.creg_mapping.items()}
+        self.num_qubits = hw.num_qubits
+        num_wires = hw.num_qubits + hw.num_cbits
+        self.nodes = list(gate_chain.chain)
+        self.first = [-1] * num_wires
+        self.last = [-1] * num_wires
+        self._offsets = [0]
+        self._wires = []
+        self._prev = []
+        self._next = []
+        self._num_alive = len(self.nodes)
+        self._index_ordered = True  # node indices are in topological order
+
+        last_slot = [-1] * num_wires
+        wires, prev, next_, offsets = self._wires, self._prev, self._next, self._offsets
+        first, last = self.first, self.last
+        for i, el in enumerate(self.nodes):
+            for w in self._node_wires(el):
+                slot = len(wires)
+                wires.append(w)
+                p = last[w]
+                prev.append(p)
+                next_.append(-1)
+                if p < 0:
+                    first[w] = i
+                else:
+                    next_[last_slot[w]] = i
+                last[w] = i
+                last_slot[w] = slot
+            offsets.append(len(wires))
+
+    def _node_wires(self, gate_connection):
+        wires = list(gate_connection.connections)
+        wires.extend(self.num_qubits + c for c in gate_connection.cregs)
+        return wires
+
+    def __len__(self):
+        return self._num_alive
+
+    def _slot(self, node, wire):
+        for slot in range(self._offsets[node], self._offsets[node + 1]):
+            if self._wires[slot] == wire:
+                return slot
+        raise ValueError(f"Node {node} doesn't act on wire {wire}")
+
+    def wires(self, node):
+        """Wires of the node"""
+        return self._wires[self._offsets[node] : self._offsets[node + 1]]
+
+    def predecessors(self, node):
+        """Predecessor node on every wire of the node, -1 for the circuit input"""
+        return self._prev[self._offsets[node] : self._offsets[node + 1]]
+
+    def successors(self, node):
+        """Successor node on every wire of the node, -1 for the circuit output"""
+        return self._next[self._offsets[node] : self._offsets[node + 1]]
+
+    def predecessor(self, node, wire):
+        return self._prev[self._slot(node, wire)]
+
+    def successor(self, node, wire):
+        return self._next[self._slot(node, wire)]
+
+    def predecessor_arrays(self):
+        """Node wires and predecessors as flat arrays
+
+        :return: offsets (node ``i`` slots are ``offsets[i]:offsets[i + 1]``), wires, predecessors, successors
+        :rtype: tuple
+        """
+        return (
+            np.array(self._offsets, dtype=np.int64),
+            np.array(self._wires, dtype=np.int64),
+            np.array(self._prev, dtype=np.int64),
+            np.array(self._next, dtype=np.int64),
+        )
+
+    def remove_node(self, node):
+        """Remove node, its predecessor and successor on every wire are connected
+
+        :raises ValueError: if the node is already removed
+        """
+        if self.nodes[node] is None:
+            raise ValueError(f"Node {node} is already removed")
+        for slot in range(self._offsets[node], self._offsets[node + 1]):
+            w, p, n = self._wires[slot], self._prev[slot], self._next[slot]
+            if p < 0:
+                self.first[w] = n
+            else:
+                self._next[self._slot(p, w)] = n
+            if n < 0:
+                self.last[w] = p
+            else:
+                self._prev[self._slot(n, w)] = p
+            self._prev[slot] = self._next[slot] = -1
+        self.nodes[node] = None
+        self._num_alive -= 1
+
+    def replace_node(self, node, gate_connection):
+        """Replace gate connection of the node by a gate connection on the same wires"""
+        if sorted(self._node_wires(gate_connection)) != sorted(self.wires(node)):
+            raise ValueError("Gate connection should act on the wires of the replaced node")
+        if list(gate_connection.connections) != list(self.nodes[node].connections):
+            # Keep slot order equal to the order of node wires
+            start = self._offsets[node]
+            slots = {self._wires[s]: (self._prev[s], self._next[s]) for s in range(start, self._offsets[node + 1])}
+            for k, w in enumerate(self._node_wires(gate_connection)):
+                self._wires[start + k] = w
+                self._prev[start + k], self._next[start + k] = slots[w]
+        self.nodes[node] = gate_connection
+
+    def exchange(self, node_a, node_b):
+        """Move node ``node_b`` in front of its predecessor ``node_a`` (e.g. for commuting gates)
+
+        ``node_a`` should be the predecessor of ``node_b`` on every shared wire. The caller is responsible for
+        ``node_b`` not depending on ``node_a`` through other wires, otherwise the graph gets a cycle.
+        """
+        shared = [w for w in self.wires(node_b) if w in self.wires(node_a)]
+        if not shared:
+            raise ValueError(f"Nodes {node_a} and {node_b} don't share wires")
+        for w in shared:
+            slot_a, slot_b = self._slot(node_a, w), self._slot(node_b, w)
+            if self._next[slot_a] != node_b:
+                raise ValueError(f"Node {node_a} isn't the predecessor of node {node_b} on wire {w}")
+            p, n = self._prev[slot_a], self._next[slot_b]
+            # p -> a -> b -> n becomes p -> b -> a -> n
+            if p < 0:
+                self.first[w] = node_b
+            else:
+                self._next[self._slot(p, w)] = node_b
+            if n < 0:
+                self.last[w] = node_a
+            else:
+                self._prev[self._slot(n, w)] = node_a
+            self._prev[slot_b], self._next[slot_b] = p, node_a
+            self._prev[slot_a], self._next[slot_a] = node_b, n
+        if node_a < node_b:
+            self._index_ordered = False
+
+    def front_layer(self):
+        """Nodes without predecessors, sorted by index
+
+        :rtype: list
+        """
+        return sorted(i for i in set(self.first) if i >= 0 and all(p < 0 for p in self.predecessors(i)))
+
+    def topological_order(self):
+        """Iterate over nodes in topological order (Kahn's algorithm)
+
+        The node with the smallest index is taken first, so the order of the gate chain is kept
+        where the DAG allows it.
+        """
+        if self._index_ordered:
+            yield from (i for i, el in enumerate(self.nodes) if el is not None)
+            return
+        in_degree = [0] * len(self.nodes)
+        for n in self._next:
+            if n >= 0:
+                in_degree[n] += 1
+        heap = [i for i, el in enumerate(self.nodes) if el is not None and in_degree[i] == 0]
+        while heap:
+            i = heappop(heap)
+            yield i
+            for n in self.successors(i):
+                if n >= 0:
+                    in_degree[n] -= 1
+                    if in_degree[n] == 0:
+                        heappush(heap, n)
+
+    def to_gate_chain(self):
+        """Create gate chain with the nodes in topological order
+
+        :rtype: GateChain
+        """
+        gate_chain = GateChain(self.quantum_hardware)
+        gate_chain.qreg_mapping = {k: dict(v) for k, v in self.qreg_mapping.items()}
+        gate_chain.creg_mapping = {k: dict(v) for k, v in self.creg_mapping.items()}
+        gate_chain.chain.extend(self.nodes[i] for i in self.topological_order())
+        return gate_chain
@@ -0,0 +1,334 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import numpy as np
+
+from arline_quantum.gates.ccnot import Ccnot
+from arline_quantum.gates.ch import Ch
+from arline_quantum.gates.cnot import Cnot
+from arline_quantum.gates.crx import Crx
+from arline_quantum.gates.cry import Cry
+from arline_quantum.gates.crz import Crz
+from arline_quantum.gates.cswap import Cswap
+from arline_quantum.gates.cu1 import Cu1
+from arline_quantum.gates.cu3 import Cu3
+from arline_quantum.gates.cy import Cy
+from arline_quantum.gates.cz import Cz
+from arline_quantum.gates.h import H
+from arline_quantum.gates.identity import I
+from arline_quantum.gates.r import R
+from arline_quantum.gates.rx import Rx
+from arline_quantum.gates.ry import Ry
+from arline_quantum.gates.rz import Rz
+from arline_quantum.gates.s import S, Sd
+from arline_quantum.gates.swap import Swap
+from arline_quantum.gates.t import T, Td
+from arline_quantum.gates.u1 import U1
+from arline_quantum.gates.u2 import U2
+from arline_quantum.gates.u3 import U3
+from arline_quantum.gates.x import X
+from arline_quantum.gates.xx import Xx
+from arline_quantum.gates.y import Y
+from arline_quantum.gates.yy import Yy
+from arline_quantum.gates.z import Z
+from arline_quantum.gates.zz import Zz
+
+
+# Decompositions of multi-qubit gates into Cnot and single qubit gates (up to global phase).
+# Each rule is a list of (gate class, gate qubits, angles) where gate qubits are indices into
+# the connections of the decomposed gate and angles is a function of the decomposed gate args.
+cnot_decompositions = {
+    Cz: [(H, (1,)), (Cnot, (0, 1)), (H, (1,))],
+    Cy: [(Sd, (1,)), (Cnot, (0, 1)), (S, (1,))],
+    Ch: [
+        (S, (1,)), (H, (1,)), (T, (1,)), (Cnot, (0, 1)), (Td, (1,)), (H, (1,)), (Sd, (1,)),
+    ],
+    Crx: [
+        (U1, (1,), lambda t: (np.pi / 2,)),
+        (Cnot, (0, 1)),
+        (U3, (1,), lambda t: (-t / 2, 0, 0)),
+        (Cnot, (0, 1)),
+        (U3, (1,), lambda t: (t / 2, -np.pi / 2, 0)),
+    ],
+    Cry: [
+        (Ry, (1,), lambda t: (t / 2,)),
+        (Cnot, (0, 1)),
+        (Ry, (1,), lambda t: (-t / 2,)),
+        (Cnot, (0, 1)),
+    ],
+    Crz: [
+        (U1, (1,), lambda t: (t / 2,)),
+        (Cnot, (0, 1)),
+        (U1, (1,), lambda t: (-t / 2,)),
+        (Cnot, (0, 1)),
+    ],
+    Cu1: [
+        (U1, (0,), lambda lam: (lam / 2,)),
+        (Cnot, (0, 1)),
+        (U1, (1,), lambda lam: (-lam / 2,)),
+        (Cnot, (0, 1)),
+        (U1, (1,), lambda lam: (lam / 2,)),
+    ],
+    Cu3: [
+        (U1, (0,), lambda theta, phi, lam: ((lam + phi) / 2,)),
+        (U1, (1,), lambda theta, phi, lam: ((lam - phi) / 2,)),
+        (Cnot, (0, 1)),
+        (U3, (1,), lambda theta, phi, lam: (-theta / 2, 0, -(phi + lam) / 2)),
+        (Cnot, (0, 1)),
+        (U3, (1,), lambda theta, phi, lam: (theta / 2, phi, 0)),
+    ],
+    Swap: [(Cnot, (0, 1)), (Cnot, (1, 0)), (Cnot, (0, 1))],
+    Xx: [
+        (H, (0,)), (H, (1,)), (Cnot, (0, 1)), (U1, (1,), lambda t: (t,)), (Cnot, (0, 1)), (H, (0,)), (H, (1,)),
+    ],
+    Yy: [
+        (Rx, (0,), lambda t: (np.pi / 2,)),
+        (Rx, (1,), lambda t: (np.pi / 2,)),
+        (Cnot, (0, 1)),
+        (U1, (1,), lambda t: (t,)),
+        (Cnot, (0, 1)),
+        (Rx, (0,), lambda t: (-np.pi / 2,)),
+        (Rx, (1,), lambda t: (-np.pi / 2,)),
+    ],
+    Zz: [(Cnot, (0, 1)), (U1, (1,), lambda t: (t,)), (Cnot, (0, 1))],
+    Ccnot: [
+        (H, (2,)), (Cnot, (1, 2)), (Td, (2,)), (Cnot, (0, 2)), (T, (2,)), (Cnot, (1, 2)), (Td, (2,)),
+        (Cnot, (0, 2)), (T, (1,)), (T, (2,)), (H, (2,)), (Cnot, (0, 1)), (T, (0,)), (Td, (1,)), (Cnot, (0, 1)),
+    ],
+    Cswap: [(Cnot, (2, 1)), (Ccnot, (0, 1, 2)), (Cnot, (2, 1))],
+}
+
+
+# Rebase of Cnot to other two-qubit gates (up to global phase), same format as :data:`cnot_decompositions`
+cnot_rebases = {
+    Cz: [(H, (1,)), (Cz, (0, 1)), (H, (1,))],
+    Xx: [
+        (Rx, (0,), lambda: (-np.pi / 2,)),
+        (Rz, (0,), lambda: (np.pi / 2,)),
+        (Rx, (0,), lambda: (-np.pi / 2,)),
+        (Xx, (0, 1), lambda: (-np.pi / 2,)),
+        (Rz, (0,), lambda: (np.pi / 2,)),
+        (Rx, (0,), lambda: (-np.pi / 2,)),
+        (Rx, (1,), lambda: (-np.pi / 2,)),
+    ],
+}
+
+
+# Single qubit gates in terms of U3 and Rz / H (up to global phase), same format as :data:`cnot_decompositions`
+one_qubit_decompositions = {
+    I: [],
+    X: [(U3, (0,), lambda: (np.pi, 0, np.pi))],
+    Y: [(U3, (0,), lambda: (np.pi, np.pi / 2, np.pi / 2))],
+    Z: [(U1, (0,), lambda: (np.pi,))],
+    H: [(U3, (0,), lambda: (np.pi / 2, 0, np.pi))],
+    S: [(U1, (0,), lambda: (np.pi / 2,))],
+    Sd: [(U1, (0,), lambda: (-np.pi / 2,))],
+    T: [(U1, (0,), lambda: (np.pi / 4,))],
+    Td: [(U1, (0,), lambda: (-np.pi / 4,))],
+    U1: [(Rz, (0,), lambda lam: (lam,))],
+    Rz: [(U1, (0,), lambda lam: (lam,))],
+    U2: [(U3, (0,), lambda phi, lam: (np.pi / 2, phi, lam))],
+    U3: [
+        (Rz, (0,), lambda theta, phi, lam: (lam - np.pi / 2,)),
+        (H, (0,)),
+        (Rz, (0,), lambda theta, phi, lam: (theta,)),
+        (H, (0,)),
+        (Rz, (0,), lambda theta, phi, lam: (phi + np.pi / 2,)),
+    ],
+    Rx: [(H, (0,)), (Rz, (0,), lambda theta: (theta,)), (H, (0,))],
+    Ry: [(U3, (0,), lambda theta: (theta, 0, 0))],
+    R: [(U3, (0,), lambda theta, phi: (theta, phi - np.pi / 2, -phi + np.pi / 2))],
+}
+
+#: Registry of decomposition rules, gate class -> list of alternative rules
+decomposition_rules = {}
+
+
+def register_decomposition(gate_class, rule):
+    """Register decomposition rule
+
+    :param gate_class: decomposed gate class
+    :type gate_class: type
+    :param rule: list of (gate class, gate qubits[, angles function]), see :data:`cnot_decompositions`
+    :type rule: list
+    """
+    decomposition_rules.setdefault(gate_class, []).append(rule)
+    _rebase_plans.clear()
+
+
+def expand_rule(rule, args, connections):
+    """Instantiate decomposition rule
+
+    :param rule: list of (gate class, gate qubits[, angles function])
+    :type rule: list
+    :param args: args of the decomposed gate
+    :type args: list
+    :param connections: qubits of the decomposed gate
+    :type connections: list
+    :return: list of (gate, connections)
+    :rtype: list
+    """
+    result = []
+    for r in rule:
+        g_class, g_qubits = r[0], r[1]
+        g = g_class(*r[2](*args)) if len(r) > 2 else g_class()
+        result.append((g, [connections[q] for q in g_qubits]))
+    return result
+
+
+def find_rule(rules, gate_class):
+    """Return decomposition rule for gate class or its nearest parent class, None if there is no rule"""
+    for cls in gate_class.__mro__:
+        if cls in rules:
+            return rules[cls]
+    return None
+
+
+def decompose_gate(gate, connections, rules=None, keep=(Cnot,)):
+    """Recursively decompose multi-qubit gate
+
+    :param gate: gate to decompose
+    :type gate: Gate
+    :param connections: gate qubits
+    :type connections: list
+    :param rules: decomposition rules by gate class, :data:`cnot_decompositions` by default
+    :type rules: dict
+    :param keep: gate classes which are not decomposed
+    :type keep: tuple
+    :return: list of (gate, connections)
+    :rtype: list
+    """
+    if rules is None:
+        rules = cnot_decompositions
+    rule = None
+    if gate.num_qubits > 1 and not isinstance(gate, keep):
+        rule = find_rule(rules, type(gate))
+    if rule is None:
+        return [(gate, connections)]
+    result = []
+    for g, conn in expand_rule(rule, gate.args, connections):
+        result.extend(decompose_gate(g, conn, rules, keep))
+    return result
+
+
+class RebasePlan:
+    """Cheapest decomposition of every registered gate class to the target gate classes
+
+    Costs are computed once by relaxation over :data:`decomposition_rules` (a shortest path search in the
+    rewrite graph, the cost of a rule is the number of target gates it expands to).
+
+    :param target_classes: target gate classes
+    :type target_classes: list
+    :param keep_one_qubit: keep all single qubit gates (they are resynthesized separately)
+    :type keep_one_qubit: bool
+    """
+
+    def __init__(self, target_classes, keep_one_qubit=False):
+        self.target_classes = frozenset(target_classes)
+        self.keep_one_qubit = keep_one_qubit
+
+        cost = {g: 1 for g in self.target_classes}
+        if keep_one_qubit:
+            for g, rules in decomposition_rules.items():
+                for g_class in [g] + [r[0] for rule in rules for r in rule]:
+                    if g_class.num_qubits == 1:
+                        cost[g_class] = 1
+        self._rules = {g: None for g in cost}
+
+        changed = True
+        while changed:
+            changed = False
+            for g, rules in decomposition_rules.items():
+                if self._rules.get(g, 0) is None:
+                    continue
+                for rule in rules:
+                    if all(r[0] in cost for r in rule):
+                        c = sum(cost[r[0]] for r in rule)
+                        if g not in cost or c < cost[g]:
+                            cost[g] = c
+                            self._rules[g] = rule
+                            changed = True
+        self.cost = cost
+
+    def rule(self, gate_class):
+        """Return decomposition rule for the gate class, None if the gate is kept
+
+        :raises ValueError: if the gate class can't be expressed in the target gate classes
+        """
+        try:
+            return self._rules[gate_class]
+        except KeyError:
+            pass
+        rule = False
+        if gate_class.num_qubits == 1 and self.keep_one_qubit:
+            rule = None
+        else:
+            # Discrete versions of continuous gates are kept if the continuous gate is in the target
+            for cls in gate_class.__mro__:
+                if cls in self._rules and (cls is gate_class or not cls.is_discrete):
+                    rule = self._rules[cls]
+                    break
+        if rule is False:
+            raise ValueError(f"Gate {gate_class.__name__} can't be rebased to the target gate set")
+        self._rules[gate_class] = rule
+        return rule
+
+    def apply(self, gate, connections):
+        """Decompose gate to the target gate classes
+
+        :param gate: gate
+        :type gate: Gate
+        :param connections: gate qubits
+        :type connections: list
+        :return: list of (gate, connections)
+        :rtype: list
+        """
+        rule = self.rule(type(gate))
+        if rule is None:
+            return [(gate, connections)]
+        result = []
+        for g, conn in expand_rule(rule, gate.args, connections):
+            result.extend(self.apply(g, conn))
+        return result
+
+
+_rebase_plans = {}
+
+
+def rebase_plan(target_classes, keep_one_qubit=False):
+    """Return cached :class:`RebasePlan` for the target gate classes
+
+    :param target_classes: target gate classes
+    :type target_classes: list
+    :param keep_one_qubit: keep all single qubit gates
+    :type keep_one_qubit: bool
+    :rtype: RebasePlan
+    """
+    key = (frozenset(target_classes), keep_one_qubit)
+    try:
+        return _rebase_plans[key]
+    except KeyError:
+        plan = RebasePlan(target_classes, keep_one_qubit)
+        _rebase_plans[key] = plan
+        return plan
+
+
+for _rules in [cnot_decompositions, one_qubit_decompositions]:
+    for _gate_class, _rule in _rules.items():
+        register_decomposition(_gate_class, _rule)
+for _gate_class, _rule in cnot_rebases.items():
+    register_decomposition(Cnot, _rule)
@@ -0,0 +1,343 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from functools import reduce
+
+import numpy as np
+
+from arline_quantum.gates.gate import Gate
+from arline_quantum.gates.measure import Measure
+
+_paulis = [
+    np.eye(2, dtype=complex),
+    np.array([[0, 1], [1, 0]], dtype=complex),
+    np.array([[0, -1j], [1j, 0]], dtype=complex),
+    np.array([[1, 0], [0, -1]], dtype=complex),
+]
+
+
+def depolarizing_kraus(p, num_qubits=1):
+    """Kraus operators of the depolarizing channel :math:`\\rho \\to (1 - p) \\rho + p I / d`
+
+    :param p: depolarizing probability, :math:`p = e d / (d - 1)` for average gate error :math:`e`
+    :type p: float
+    :param num_qubits: number of qubits
+    :type num_qubits: int
+    :rtype: list
+    """
+    d2 = 4 ** num_qubits
+    kraus = []
+    for k in range(d2):
+        paulis = [_paulis[(k >> (2 * i)) & 3] for i in range(num_qubits)]
+        weight = 1 - p + p / d2 if k == 0 else p / d2
+        if weight > 0:
+            kraus.append(np.sqrt(weight) * reduce(np.kron, paulis))
+    return kraus
+
+
+def amplitude_damping_kraus(gamma):
+    """Kraus operators of the amplitude damping channel with decay probability ``gamma``
+
+    :rtype: list
+    """
+    return [
+        np.array([[1, 0], [0, np.sqrt(1 - gamma)]], dtype=complex),
+        np.array([[0, np.sqrt(gamma)], [0, 0]], dtype=complex),
+    ]
+
+
+def phase_damping_kraus(lam):
+    """Kraus operators of the phase damping channel
+
+    Off-diagonal elements are multiplied by :math:`\\sqrt{1 - \\lambda}`.
+
+    :rtype: list
+    """
+    return [
+        np.array([[1, 0], [0, np.sqrt(1 - lam)]], dtype=complex),
+        np.array([[0, 0], [0, np.sqrt(lam)]], dtype=complex),
+    ]
+
+
+def thermal_relaxation_kraus(time, t1, t2):
+    """Kraus operators of amplitude damping and phase damping during ``time``
+
+    Populations relax as :math:`e^{-t / T_1}`, coherences as :math:`e^{-t / T_2}`, :math:`T_2` is clipped
+    to :math:`2 T_1`.
+
+    :rtype: list
+    """
+    gamma = -np.expm1(-time / t1)
+    lam = max(0.0, -np.expm1(-2 * time / min(t2, 2 * t1) + time / t1))
+    return [p @ a for p in phase_damping_kraus(lam) for a in amplitude_damping_kraus(gamma)]
+
+
+def kraus_superoperator(kraus):
+    """Superoperator :math:`\\sum_i K_i \\otimes K_i^*` of a channel
+
+    Row and column indices are pairs ``(i, j)`` of the density matrix indices, flattened as ``i * d + j``.
+
+    :param kraus: Kraus operators, matrices of shape (d, d)
+    :type kraus: list
+    :rtype: np.array
+    """
+    return sum(np.kron(k, k.conj()) for k in kraus)
+
+
+def superoperator_tensor_product(a, num_qubits_a, b, num_qubits_b):
+    """Superoperator of channels ``a`` and ``b`` on disjoint qubits, the qubits of ``a`` go first
+
+    :rtype: np.array
+    """
+    da, db = 2 ** num_qubits_a, 2 ** num_qubits_b
+    product = np.einsum("ijkl,mnop->imjnkolp", a.reshape(da, da, da, da), b.reshape(db, db, db, db))
+    d = da * db
+    return product.reshape(d * d, d * d)
+
+
+class NoiseModel:
+    """Gate and idle noise of quantum hardware
+
+    Every gate is followed by a depolarizing channel on its qubits, the depolarizing probability is derived from the
+    average gate error of the hardware calibration (see :meth:`.Hardware.get_calibration`):
+    the single qubit error of the qubit, the two qubit error of the edge, gates on uncalibrated pairs and on more
+    qubits use :attr:`.Hardware.two_qubit_gate_fidelity`. Every layer of gates is followed by thermal relaxation of
+    all qubits during the layer time (amplitude and phase damping from T1 and T2).
+
+    :param quantum_hardware: hardware
+    :type quantum_hardware: Hardware
+    :param idle_noise: apply thermal relaxation after every layer
+    :type idle_noise: bool
+
+    :ivar CalibrationTable calibration: calibration table of the hardware
+    """
+
+    def __init__(self, quantum_hardware, idle_noise=True):
+        self.calibration = quantum_hardware.get_calibration()
+        self.default_two_qubit_error = 1 - quantum_hardware.two_qubit_gate_fidelity
+        self.idle_noise = idle_noise
+
+    def gate_error(self, qubits):
+        """Average gate error of a gate on the given qubits"""
+        calibration = self.calibration
+        if len(qubits) == 1:
+            return calibration.single_qubit_error[qubits[0]]
+        if len(qubits) == 2:
+            edge = calibration.edge_index[qubits[0], qubits[1]]
+            if edge >= 0:
+                return calibration.two_qubit_error[edge]
+        return self.default_two_qubit_error
+
+    def gate_kraus(self, qubits):
+        """Kraus operators applied after a gate on the given qubits, empty list for noiseless gates
+
+        :rtype: list
+        """
+        error = self.gate_error(qubits)
+        if error <= 0:
+            return []
+        d = 2 ** len(qubits)
+        return depolarizing_kraus(min(1.0, error * d / (d - 1)), len(qubits))
+
+    def layer_time(self, num_qubits):
+        """Duration of a layer, the gate time of the widest gate in the layer"""
+        calibration = self.calibration
+        return calibration.single_qubit_gate_time if num_qubits <= 1 else calibration.two_qubit_gate_time
+
+    def idle_kraus(self, qubit, time):
+        """Kraus operators of qubit relaxation during ``time``, empty list for infinite coherence times
+
+        :rtype: list
+        """
+        t1, t2 = self.calibration.t1[qubit], self.calibration.t2[qubit]
+        if not self.idle_noise or time <= 0 or (np.isinf(t1) and np.isinf(t2)):
+            return []
+        return thermal_relaxation_kraus(time, t1, t2)
+
+
+class DensityMatrixSimulator:
+    """Density matrix simulator of gate chains with noise channels
+
+    The density matrix of :math:`n` qubits is stored as a tensor with :math:`2n` axes of size 2. Gates and channels
+    act only on the axes of their qubits as local superoperators (:math:`4^k \\times 4^k` for :math:`k` qubits),
+    every gate is fused with its noise channel and with the pending relaxation of its qubits.
+    Gates are applied layer by layer (see :meth:`.GateChain.layers`): gates in a layer act on disjoint qubits,
+    so single qubit operations of a layer are batched into superoperators on up to ``batch_qubits`` qubits
+    and every batch is applied with one tensor contraction.
+    Relaxation of idle qubits is accumulated and applied before the next operation on the qubit,
+    since consecutive relaxation channels compose into one.
+    Measurements are non-selective, they remove the coherences of the measured qubit.
+    The memory is :math:`16 \\cdot 4^n` bytes, i.e. 256 MB for 12 qubits.
+
+    :param noise_model: noise model, noiseless simulation if None
+    :type noise_model: NoiseModel
+    :param max_qubits: maximal number of qubits
+    :type max_qubits: int
+    :param batch_qubits: maximal number of qubits of batched single qubit operations
+    :type batch_qubits: int
+    """
+
+    max_cached_superoperators = 4096  #: number of cached local superoperators
+
+    def __init__(self, noise_model=None, max_qubits=12, batch_qubits=2):
+        self.noise_model = noise_model
+        self.max_qubits = max_qubits
+        self.batch_qubits = batch_qubits
+        self._superoperators = {}
+
+    def initial_state(self, num_qubits):
+        """Density tensor of :math:`|0 \\dots 0\\rangle`"""
+        rho = np.zeros((2,) * (2 * num_qubits), dtype=complex)
+        rho[(0,) * (2 * num_qubits)] = 1
+        return rho
+
+    def run(self, gate_chain, rho=None):
+        """Simulate gate chain
+
+        :param gate_chain: gate chain without classically controlled gates
+        :type gate_chain: GateChain
+        :param rho: initial density matrix, :math:`|0 \\dots 0\\rangle` by default
+        :type rho: np.array
+        :return: density matrix of shape :math:`(2^n, 2^n)`, qubit 0 is the least significant as in
+            :attr:`.GateChain.matrix`
+        :rtype: np.array
+
+        :raises ValueError: for too many qubits, classically controlled gates and unsupported instructions
+        """
+        n = gate_chain.quantum_hardware.num_qubits
+        if n > self.max_qubits:
+            raise ValueError(f"Gate chain has {n} qubits, density matrix simulation is limited to {self.max_qubits}")
+        if rho is None:
+            rho = self.initial_state(n)
+        else:
+            rho = np.asarray(rho, dtype=complex).reshape((2,) * (2 * n))
+        noise_model = self.noise_model
+        idle_time = np.zeros(n)  # relaxation time of every qubit which isn't applied yet
+        chain = gate_chain.chain
+        for layer in gate_chain.layers():
+            ops = []
+            width = 0
+            for i in layer.tolist():
+                el = chain[i]
+                qubits = list(el.connections)
+                superoperator = self._gate_superoperator(el)
+                relaxation = self._relaxation(qubits, idle_time)
+                if relaxation is not None:
+                    superoperator = superoperator @ relaxation
+                idle_time[qubits] = 0
+                ops.append((superoperator, qubits))
+                if isinstance(el.gate, Gate):
+                    width = max(width, len(qubits))
+            rho = self._apply_batched(rho, ops)
+            if noise_model is not None and noise_model.idle_noise:
+                idle_time += noise_model.layer_time(width)
+        ops = []
+        for q in np.flatnonzero(idle_time).tolist():
+            relaxation = self._relaxation([q], idle_time)
+            if relaxation is not None:
+                ops.append((relaxation, [q]))
+        rho = self._apply_batched(rho, ops)
+        return np.ascontiguousarray(rho).reshape(2 ** n, 2 ** n)
+
+    def probabilities(self, rho, readout_error=True):
+        """Probabilities of the computational basis states
+
+        :param rho: density matrix
+        :type rho: np.array
+        :param readout_error: apply readout errors of the noise model
+        :type readout_error: bool
+        :return: probability of every basis state, qubit 0 is the least significant bit of the index
+        :rtype: np.array
+        """
+        probs = np.real(np.diagonal(np.asarray(rho).reshape(len(rho), -1))).copy()
+        n = int(np.log2(len(probs)))
+        if readout_error and self.noise_model is not None:
+            probs = probs.reshape((2,) * n)
+            for q, e in enumerate(self.noise_model.calibration.readout_error[:n]):
+                if e > 0:
+                    axis = n - 1 - q
+                    probs = (1 - e) * probs + e * np.flip(probs, axis=axis)
+            probs = probs.reshape(-1)
+        return probs
+
+    def _gate_superoperator(self, el):
+        gate, qubits = el.gate, el.connections
+        if isinstance(gate, Gate):
+            if el.cregs:
+                raise ValueError(f"Classically controlled gate {gate.name} isn't supported")
+            u = np.asarray(gate._u, dtype=complex)
+
+            def kraus():
+                noise = self.noise_model.gate_kraus(qubits) if self.noise_model is not None else []
+                return [k @ u for k in noise] or [u]
+
+            return self._superoperator((u.tobytes(), tuple(qubits)), kraus)
+        if isinstance(gate, Measure):
+            return self._superoperator("measure", lambda: [np.diag([1, 0]), np.diag([0, 1])])
+        raise ValueError(f"Instruction {gate.name} isn't supported by the density matrix simulator")
+
+    def _relaxation(self, qubits, idle_time):
+        """Superoperator of the pending relaxation of the qubits, None if there is no relaxation"""
+        if self.noise_model is None or not idle_time[qubits].any():
+            return None
+        kraus = [self.noise_model.idle_kraus(q, float(idle_time[q])) for q in qubits]
+        if not any(kraus):
+            return None
+        result = None
+        for k, q in enumerate(qubits):
+            key = ("idle", q, float(idle_time[q]))
+            superoperator = self._superoperator(key, lambda: kraus[k] or [np.eye(2)])
+            result = superoperator if result is None else superoperator_tensor_product(result, k, superoperator, 1)
+        return result
+
+    def _superoperator(self, key, kraus):
+        superoperator = self._superoperators.get(key)
+        if superoperator is None:
+            if len(self._superoperators) >= self.max_cached_superoperators:
+                self._superoperators.clear()
+            superoperator = kraus_superoperator(kraus())
+            self._superoperators[key] = superoperator
+        return superoperator
+
+    def _apply_batched(self, rho, ops):
+        """Apply superoperators on disjoint qubits, single qubit ones are combined into batches"""
+        batch, batch_qubits = None, []
+        for superoperator, qubits in ops:
+            if len(qubits) > 1 or self.batch_qubits < 2:
+                rho = self._apply(rho, superoperator, qubits)
+                continue
+            if batch is None:
+                batch, batch_qubits = superoperator, list(qubits)
+            else:
+                batch = superoperator_tensor_product(batch, len(batch_qubits), superoperator, 1)
+                batch_qubits += qubits
+            if len(batch_qubits) >= self.batch_qubits:
+                rho = self._apply(rho, batch, batch_qubits)
+                batch, batch_qubits = None, []
+        if batch is not None:
+            rho = self._apply(rho, batch, batch_qubits)
+        return rho
+
+    @staticmethod
+    def _apply(rho, superoperator, qubits):
+        n = rho.ndim // 2
+        k = len(qubits)
+        # Gate matrices are big-endian in the gate qubits, the first density tensor axis is qubit n - 1
+        axes = [n - 1 - q for q in qubits] + [2 * n - 1 - q for q in qubits]
+        superoperator = superoperator.reshape((2,) * (4 * k))
+        rho = np.tensordot(superoperator, rho, axes=(list(range(2 * k, 4 * k)), axes))
+        return np.moveaxis(rho, list(range(2 * k)), axes)
@@ -0,0 +1,163 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from hashlib import blake2b
+from itertools import islice
+from weakref import WeakKeyDictionary
+
+FINGERPRINT_ANGLE_DECIMALS = 12  #: angles are rounded to this number of decimals before hashing
+
+_MASK = (1 << 128) - 1
+_PRIME = 0x0000000001000000000000000000013B  # 128-bit FNV prime
+_MIX = 0x9E3779B97F4A7C15F39CC0605CEDC835
+_BASE = 0xA0761D6478BD642FE7037ED1A0B428DB  # Odd multiplier of the polynomial rolling hash
+_BASE_INVERSE = pow(_BASE, -1, 1 << 128)
+_ANGLE_SCALE = 10 ** FINGERPRINT_ANGLE_DECIMALS
+
+_class_ids = WeakKeyDictionary()
+
+
+def gate_class_id(gate_class):
+    """Stable 128-bit id of a gate class, derived from the module and qualified name of the class"""
+    try:
+        return _class_ids[gate_class]
+    except KeyError:
+        name = "{}.{}".format(gate_class.__module__, gate_class.__qualname__)
+        digest = blake2b(name.encode(), digest_size=16).digest()
+        class_id = _class_ids[gate_class] = int.from_bytes(digest, "little")
+        return class_id
+
+
+def _mix(h, words):
+    for w in words:
+        h = ((h ^ (w & _MASK)) * _PRIME) & _MASK
+    h ^= h >> 64
+    h = (h * _MIX) & _MASK
+    return h ^ (h >> 61)
+
+
+_structure_hashes = {}  # (gate class, connections, cregs) -> structural hash
+_max_structure_hashes = 1 << 16
+
+
+def gate_connection_hashes(gate_connection):
+    """Content and structural hashes of a gate connection
+
+    The structural hash depends on the gate class, qubits and classical bits,
+    the content hash depends also on the gate arguments rounded to :data:`FINGERPRINT_ANGLE_DECIMALS` decimals.
+
+    :param gate_connection: gate connection
+    :type gate_connection: GateConnection
+    :return: content hash, structural hash
+    :rtype: tuple
+    """
+    gate = gate_connection.gate
+    key = (type(gate), tuple(gate_connection.connections), tuple(gate_connection.cregs))
+    structure = _structure_hashes.get(key)
+    if structure is None:
+        if len(_structure_hashes) >= _max_structure_hashes:
+            _structure_hashes.clear()
+        gate_class, connections, cregs = key
+        structure = _mix(gate_class_id(gate_class), (len(connections), *connections, len(cregs), *cregs))
+        _structure_hashes[key] = structure
+    args = gate.args
+    if not args:
+        return structure, structure
+    return _mix(structure, (len(args), *[round(float(a) * _ANGLE_SCALE) for a in args])), structure
+
+
+class RollingHash:
+    """Polynomial rolling hash of a sequence of gate connections
+
+    :math:`H = \\sum_i h_i B^{n - 1 - i} \\bmod 2^{128}`, where :math:`h_i` are hashes of the elements,
+    is kept for content and structural element hashes (:func:`gate_connection_hashes`).
+    Appending to either end is :math:`O(1)`, insertion and deletion rehash the shorter part of the sequence.
+
+    :ivar int content: content hash
+    :ivar int structure: structural hash
+    :ivar int length: number of hashed elements
+    """
+
+    __slots__ = ("content", "structure", "power", "length")
+
+    def __init__(self, gate_connections=()):
+        self.content = 0
+        self.structure = 0
+        self.power = 1  # _BASE ** length
+        self.length = 0
+        self.extend(gate_connections)
+
+    def copy(self):
+        rolling_hash = RollingHash()
+        rolling_hash.content, rolling_hash.structure = self.content, self.structure
+        rolling_hash.power, rolling_hash.length = self.power, self.length
+        return rolling_hash
+
+    def extend(self, gate_connections):
+        """Append elements to the end"""
+        content, structure, length = self.content, self.structure, self.length
+        for el in gate_connections:
+            c, s = gate_connection_hashes(el)
+            content = (content * _BASE + c) & _MASK
+            structure = (structure * _BASE + s) & _MASK
+            length += 1
+        self.power = (self.power * pow(_BASE, length - self.length, 1 << 128)) & _MASK
+        self.content, self.structure, self.length = content, structure, length
+
+    def appendleft(self, gate_connection):
+        """Prepend element"""
+        c, s = gate_connection_hashes(gate_connection)
+        self.content = (self.content + c * self.power) & _MASK
+        self.structure = (self.structure + s * self.power) & _MASK
+        self.power = (self.power * _BASE) & _MASK
+        self.length += 1
+
+    def insert(self, chain, position):
+        """Update hash after insertion of ``chain[position]``, ``chain`` is the sequence after the insertion"""
+        n = self.length
+        # H = P B^(n - p) + S, where P and S are hashes of the elements before and after the position
+        if position <= n - position:
+            prefix = RollingHash(islice(chain, 0, position))
+            shift = pow(_BASE, n - position, 1 << 128)
+            suffix = (self.content - prefix.content * shift, self.structure - prefix.structure * shift)
+        else:
+            tail = RollingHash(islice(chain, position + 1, n + 1))
+            shift = tail.power
+            suffix = (tail.content, tail.structure)
+        # The result is (P B + h) B^(n - p) + S
+        c, s = gate_connection_hashes(chain[position])
+        self.content = ((self.content - suffix[0]) * _BASE + c * shift + suffix[0]) & _MASK
+        self.structure = ((self.structure - suffix[1]) * _BASE + s * shift + suffix[1]) & _MASK
+        self.power = (self.power * _BASE) & _MASK
+        self.length = n + 1
+
+    def delete(self, chain, position):
+        """Update hash before deletion of ``chain[position]``, ``chain`` is the sequence before the deletion"""
+        n = self.length
+        c, s = gate_connection_hashes(chain[position])
+        shift = pow(_BASE, n - position - 1, 1 << 128)
+        # H = P B^(n - p) + h B^(n - p - 1) + S, the result is P B^(n - p - 1) + S
+        if position < n - position:
+            prefix = RollingHash(islice(chain, 0, position))
+            self.content = (self.content - prefix.content * shift * (_BASE - 1) - c * shift) & _MASK
+            self.structure = (self.structure - prefix.structure * shift * (_BASE - 1) - s * shift) & _MASK
+        else:
+            tail = RollingHash(islice(chain, position + 1, n))
+            self.content = ((self.content - c * shift - tail.content) * _BASE_INVERSE + tail.content) & _MASK
+            self.structure = ((self.structure - s * shift - tail.structure) * _BASE_INVERSE + tail.structure) & _MASK
+        self.power = (self.power * _BASE_INVERSE) & _MASK
+        self.length = n - 1
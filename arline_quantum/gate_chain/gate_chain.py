@@ -15,16 +15,23 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
-from collections import OrderedDict, deque
+from collections import OrderedDict
 from copy import copy
 from itertools import islice
 from string import ascii_lowercase, ascii_uppercase
+import io
 import pickle
 
 import numpy as np
-from sympy.combinatorics.permutations import Permutation
 
+from arline_quantum.gate_chain.clifford_tableau import CliffordTableau
+from arline_quantum.gate_chain.fingerprint import RollingHash
 from arline_quantum.gate_chain.gate_connection import GateConnection
+from arline_quantum.gate_chain.gate_sequence import GateSequence
+from arline_quantum.gate_chain.layers import Layers
+from arline_quantum.gate_chain.parity_matrix import ParityMatrix
+from arline_quantum.gate_chain.partition import partition_gate_connections
+from arline_quantum.gate_chain.qasm_writer import QasmWriter
 from arline_quantum.gate_sets.gate_set import GateSet
 from arline_quantum.gates import qasm_gate_table as qasm_gate_table_all
 from arline_quantum.gates.cnot import Cnot
@@ -38,7 +45,7 @@ from arline_quantum.hardware.hardware import Hardware
 from arline_quantum.qasm_parser.qasmparser import QasmParser
 from arline_quantum.qubit_connectivities.qubit_connectivity import All2All, QubitConnectivity
 from arline_quantum.gates.gate import Gate
-from qiskit.exceptions import QiskitError
+from arline_quantum.qasm_parser.exceptions import QasmError
 
 
 class NoQubitConnectionError(Exception):
@@ -58,16 +65,27 @@ class GateChain:
 
     :param quantum_hardware: Quantum hardware configuration
 
-    :ivar list chain: gate chain, list of :class:`GateConnection`
+    :ivar GateSequence chain: gate chain, sequence of :class:`GateConnection`
     :ivar list chain_labels: printed labels
     :ivar np.array matrix: unitary matrix
     """
 
+    max_converted_objects = 8  #: number of memoized :meth:`convert_to` results
+    max_block_unitaries = 256  #: number of memoized :meth:`block_unitary` results
+
     def __init__(self, quantum_hardware):
-        self.chain = deque()
+        self.chain = GateSequence()
         self.quantum_hardware = quantum_hardware
         self._matrix = None  # Cashed gate chain unitary
 
+        # Rolling hash of the first elements of ``_hashed_chain``, None if not computed
+        self._rolling_hash = None
+        self._hashed_chain = None
+        self._converted = OrderedDict()  # (format_id, content hash, ...) -> circuit object
+        self._layers = {}  # mode -> (structure key, Layers)
+        self._qubit_arrays = None  # (structure key, arrays)
+        self._block_unitaries = OrderedDict()  # (content hash of the gates, number of gates, qubits) -> unitary
+
         self._new_gates_cnt_right = 0  # Used to perform incremental matrix update
         self._new_gates_cnt_left = 0  # Used to perform incremental matrix update
 
@@ -82,10 +100,22 @@ class GateChain:
             self.creg_mapping["c"] = {c: c for c in range(self.quantum_hardware.num_cbits)}
 
     def __getitem__(self, key):
-        if isinstance(key, int):
-            return self.chain[key]
+        """Gate connection or a gate chain slice
+
+        Slices with step 1 are :math:`O(1)` views sharing the gate connections with this gate chain,
+        see :class:`.GateSequence`.
+        """
         if isinstance(key, slice):
-            return list(islice(self.chain, key.start, key.stop, key.step))
+            view = GateChain(self.quantum_hardware)
+            view.qreg_mapping = {k: dict(v) for k, v in self.qreg_mapping.items()}
+            view.creg_mapping = {k: dict(v) for k, v in self.creg_mapping.items()}
+            view.chain = self.chain[key]
+            view._block_unitaries = self._block_unitaries
+            return view
+        return self.chain[key]
+
+    def __iter__(self):
+        return iter(self.chain)
 
     @property
     def matrix(self):
@@ -171,10 +201,13 @@ class GateChain:
             raise Exception("Gate isn't Instruction type")
         if not force_connection and not self.quantum_hardware.qubit_connectivity.check_connection(connections):
             raise NoQubitConnectionError(connections, gate)
+        rolling_hash = self._updated_rolling_hash() if self._rolling_hash is not None else None
         gate_connection = GateConnection(self.quantum_hardware, gate, connections, cregs)
         self.chain.appendleft(gate_connection)
         # self.noise = self.calculate_noise()
         self._new_gates_cnt_left += 1
+        if rolling_hash is not None:
+            rolling_hash.appendleft(gate_connection)
 
     def insert_gate(self, gate, connections, position, cregs=[], force_connection=False):
         """Place gate at a given position
@@ -192,7 +225,7 @@ class GateChain:
         :raises NoQubitConnectionError: when there is no connection between qubits
         """
         if position == 0:
-            return self.add_gate_left(gate, connections, force_connection)
+            return self.add_gate_left(gate, connections, cregs, force_connection)
 
         if self.quantum_hardware is None:
             raise Exception("Quantum hardware isn't defined")
@@ -200,14 +233,71 @@ class GateChain:
             raise Exception("Gate isn't Instruction type")
         if not force_connection and not self.quantum_hardware.qubit_connectivity.check_connection(connections):
             raise NoQubitConnectionError(connections, gate)
+        rolling_hash = self._updated_rolling_hash() if self._rolling_hash is not None else None
+        if position < 0:
+            position = max(len(self.chain) + position, 0)
+        position = min(position, len(self.chain))
         gate_connection = GateConnection(self.quantum_hardware, gate, connections, cregs)
         self.chain.insert(position, gate_connection)
         self._matrix = None
+        if rolling_hash is not None:
+            rolling_hash.insert(self.chain, position)
 
     def delete_gate(self, gate_number):
-        self.chain.pop(gate_number)
+        if self._rolling_hash is not None:
+            self._updated_rolling_hash().delete(self.chain, gate_number % len(self.chain))
+        del self.chain[gate_number]
         self._matrix = None
 
+    def _updated_rolling_hash(self):
+        chain = self.chain
+        rolling_hash = self._rolling_hash
+        if rolling_hash is None or self._hashed_chain is not chain or rolling_hash.length > len(chain):
+            rolling_hash = self._rolling_hash = RollingHash()
+            self._hashed_chain = chain
+        if rolling_hash.length < len(chain):
+            rolling_hash.extend(islice(chain, rolling_hash.length, None))
+        return rolling_hash
+
+    def fingerprint(self):
+        """128-bit fingerprint of the gate chain content: gate classes, arguments, qubits and classical bits
+
+        Gate arguments are rounded to :data:`.FINGERPRINT_ANGLE_DECIMALS` decimals.
+        The fingerprint doesn't depend on the Python process and can be used to deduplicate gate chains
+        or as a dictionary key. It is a polynomial rolling hash (:class:`.RollingHash`),
+        updated in :math:`O(1)` by :meth:`add_gate` and :meth:`add_gate_left`,
+        :meth:`insert_gate` and :meth:`delete_gate` rehash the shorter part of the chain.
+        Elements appended to :attr:`chain` directly are hashed on the next call,
+        other changes made directly to :attr:`chain` require :meth:`invalidate_caches`.
+
+        :rtype: int
+        """
+        return self._updated_rolling_hash().content
+
+    def structural_fingerprint(self):
+        """128-bit fingerprint of the gate chain structure: gate classes, qubits and classical bits
+
+        Gate chains which differ only in gate arguments have the same structural fingerprint,
+        see :meth:`fingerprint`.
+
+        :rtype: int
+        """
+        return self._updated_rolling_hash().structure
+
+    def invalidate_caches(self):
+        """Drop cached unitaries, fingerprints and converted circuits
+
+        Call after changing :attr:`chain` elements in place.
+        """
+        self._matrix = None
+        self._new_gates_cnt_right = 0
+        self._new_gates_cnt_left = 0
+        self._rolling_hash = None
+        self._converted.clear()
+        self._layers.clear()
+        self._qubit_arrays = None
+        self._block_unitaries.clear()
+
     def extend(self, c, force_connection=False):
         """Extend GateChain object by appending elements from c"""
         for gate_connection in c:
@@ -227,12 +317,10 @@ class GateChain:
         Remapping dictionary has following format {q_old: q_new}.
         Currently implemented a trivial remapping approach: first in - first out.
         """
-        populated_qubits_cnt = 0
-        seen_qubits = []
-        for i in range(self.quantum_hardware.num_qubits):
-            if self.get_num_gates_by_qubits(i) != 0:
-                populated_qubits_cnt += 1
-                seen_qubits.append(i)
+        seen_qubits = set()
+        for el in self.chain:
+            seen_qubits.update(el.connections)
+        populated_qubits_cnt = len(seen_qubits)
 
         if num_qubits is not None:
             if populated_qubits_cnt > num_qubits:
@@ -242,58 +330,98 @@ class GateChain:
             populated_qubits_cnt = num_qubits
 
         # Add some qubits to seen to prevent compressed circuit mapping error
+        adj = np.asarray(self.quantum_hardware.qubit_connectivity.connectivity) != 0
         while len(seen_qubits) < populated_qubits_cnt:
+            seen = sorted(seen_qubits)
+            connected = adj[:, seen].any(axis=1)
             # Hack suitable only for line connectivity to fill voids
-            for candidate in range(min(seen_qubits) + 1, max(seen_qubits)):
-                if candidate not in seen_qubits:
-                    if self.quantum_hardware.qubit_connectivity.is_connected_to_any(candidate, seen_qubits):
-                        seen_qubits.append(candidate)
-                        if len(seen_qubits) >= populated_qubits_cnt:
-                            break
-
-            if len(seen_qubits) >= populated_qubits_cnt:
-                break
-
-            for candidate in range(self.quantum_hardware.num_qubits):
-                if candidate not in seen_qubits:
-                    if self.quantum_hardware.qubit_connectivity.is_connected_to_any(candidate, seen_qubits):
-                        seen_qubits.append(candidate)
-                        if len(seen_qubits) >= populated_qubits_cnt:
-                            break
-
-        hw_name = "Stripped" + self.quantum_hardware.name
-        gate_set = self.quantum_hardware.gate_set
+            candidates = list(range(seen[0] + 1, seen[-1])) + list(range(self.quantum_hardware.num_qubits))
+            for candidate in candidates:
+                if candidate not in seen_qubits and connected[candidate]:
+                    seen_qubits.add(candidate)
+                    connected |= adj[:, candidate]
+                    if len(seen_qubits) >= populated_qubits_cnt:
+                        break
+            if len(seen_qubits) == len(seen):
+                raise Exception(f"Can't find {populated_qubits_cnt} connected qubits")
 
         q_old = sorted(seen_qubits)
-        q_new = list(range(populated_qubits_cnt))
-
-        remapping_dict = dict(zip(q_old, q_new))
-
-        qubit_connectivity = QubitConnectivity("stripped_connectivity", populated_qubits_cnt, connections_list=[])
-
-        for q1 in q_old:
-            for q2 in q_old:
-                # Check if there is a connection in original hardware
-                if (q1, q2) in self.quantum_hardware.qubit_connectivity.connections_list:
-                    # Add connection for corresponding qubits in 'stripped' hardware
-                    q1_new, q2_new = remapping_dict[q1], remapping_dict[q2]
-                    qubit_connectivity.add_connection(q1_new, q2_new)
-
-        stripped_hw = Hardware(
-            name=hw_name, qubit_connectivity=qubit_connectivity, gate_set=gate_set
+        remapping_dict = {q: i for i, q in enumerate(q_old)}
+        return self.remap_qubits(self._stripped_hardware(q_old), remapping_dict), remapping_dict
+
+    def _stripped_hardware(self, qubits):
+        """Hardware on the given qubits, connectivity is induced by the gate chain hardware"""
+        adj = np.asarray(self.quantum_hardware.qubit_connectivity.connectivity)
+        connectivity = (adj[np.ix_(qubits, qubits)] != 0).astype(float)
+        np.fill_diagonal(connectivity, 0)
+        qubit_connectivity = QubitConnectivity("stripped_connectivity", len(qubits), adj_matrix=connectivity)
+        calibration = self.quantum_hardware.calibration
+        return Hardware(
+            name="Stripped" + self.quantum_hardware.name,
+            qubit_connectivity=qubit_connectivity,
+            gate_set=self.quantum_hardware.gate_set,
+            single_qubit_gate_fidelity=self.quantum_hardware.single_qubit_gate_fidelity,
+            two_qubit_gate_fidelity=self.quantum_hardware.two_qubit_gate_fidelity,
+            calibration=None if calibration is None else calibration.subset(qubits),
         )
 
-        return self.remap_qubits(stripped_hw, remapping_dict), remapping_dict
-
     def remap_qubits(self, new_hardware, remapping_dict):
         new_chain = GateChain(new_hardware)
         for el in self.chain:
             g, old_conn = el.gate, el.connections
             new_conn = [remapping_dict[i] for i in old_conn]
-            new_chain.add_gate(g, new_conn)
+            new_chain.add_gate(g, new_conn, el.cregs)
 
         return new_chain
 
+    def partition(self, max_qubits, max_gates=None):
+        """Split the gate chain into convex blocks of bounded width, see :func:`.partition_gate_connections`
+
+        Blocks can be transformed independently (e.g. in a ``ProcessPoolExecutor``): :meth:`extract_block`
+        returns a block as a gate chain on its local qubits, :meth:`from_blocks` assembles the transformed blocks.
+
+        :param max_qubits: maximal number of qubits in a block
+        :type max_qubits: int
+        :param max_gates: maximal number of gates in a block, unlimited by default
+        :type max_gates: int
+        :return: list of :class:`.ChainBlock` in topological order
+        :rtype: list
+        """
+        return partition_gate_connections(self.chain, self.quantum_hardware.num_qubits, max_qubits, max_gates)
+
+    def extract_block(self, block):
+        """Gate chain of a block on its local qubits
+
+        As in :meth:`strip_empty_qubits`, the hardware of the block gate chain has ``len(block.qubits)`` qubits
+        and respects the connectivity of the original hardware.
+
+        :param block: block of :meth:`partition`
+        :type block: ChainBlock
+        :rtype: GateChain
+        """
+        block_chain = GateChain(self.quantum_hardware)
+        block_chain.chain = GateSequence(self.chain[i] for i in block.indices)
+        return block_chain.remap_qubits(self._stripped_hardware(block.qubits), block.remapping_dict)
+
+    @classmethod
+    def from_blocks(cls, quantum_hardware, blocks, block_chains):
+        """Assemble gate chain from the gate chains of blocks on their local qubits
+
+        :param quantum_hardware: hardware of the assembled gate chain
+        :type quantum_hardware: Hardware
+        :param blocks: blocks of :meth:`partition` in topological order
+        :type blocks: list
+        :param block_chains: gate chains of the blocks, e.g. transformed results of :meth:`extract_block`
+        :type block_chains: list
+        :rtype: GateChain
+        """
+        gate_chain = cls(quantum_hardware)
+        for block, block_chain in zip(blocks, block_chains):
+            qubits = block.qubits
+            for el in block_chain.chain:
+                gate_chain.add_gate(el.gate, [qubits[q] for q in el.connections], el.cregs)
+        return gate_chain
+
     def dagger(self):
         """Daggered GateChain"""
         dagger_chain = GateChain(self.quantum_hardware)
@@ -305,49 +433,33 @@ class GateChain:
         """GateChain with shuffled gates"""
         np.random.seed(seed)
         new_chain = GateChain(self.quantum_hardware)
-        new_chain.chain = np.random.permutation(self.chain)
+        new_chain.chain = GateSequence(np.random.permutation(self.chain))
         return new_chain
 
     def cnot_parity_matrix(self):
-        """Return Cnot parity matrix for Cnot-only GateChain"""
-        for el in self.chain:
-            assert el.gate.__class__.__name__ == 'Cnot', "Gate chain should consist of CNOTs only"
-        num_qubits = self.quantum_hardware.num_qubits
-        parity_m = np.eye(num_qubits, dtype=np.int64)
-        for el in self.chain:
-            g, conn = el.gate, el.connections
-            cntrl, targ = conn[0], conn[1]
-            parity_m[targ, :] = (parity_m[cntrl, :] + parity_m[targ, :]) % 2
-        return parity_m
+        """Return Cnot parity matrix for Cnot-only GateChain
+
+        :raises ValueError: when the gate chain contains gates other than Cnot
+        """
+        return ParityMatrix.from_gate_chain(self).to_array()
+
+    def clifford_tableau(self):
+        """Return stabilizer tableau of Clifford-only GateChain
+
+        :rtype: CliffordTableau
+        :raises ValueError: when the gate chain contains non-Clifford gates
+        """
+        return CliffordTableau.from_gate_chain(self)
 
     def clifford_parity_matrix(self):
-        """Return Clifford parity matrix for Clifford-only GateChain"""
-        # Clifford circuit compressed representation, see https://arxiv.org/pdf/1305.0810.pdf
-        n = self.quantum_hardware.num_qubits
-        parity_m = np.eye(2 * n, dtype=np.int64)
+        """Return Clifford parity matrix for Clifford-only GateChain
 
-        for el in self.chain:
-            g, conn = el.gate, el.connections
-            g_name = g.__class__.__name__
-            if g_name == "Cnot":
-                # Cnot(cntrl=i, targ=j) -> Add row i to row j, add row j+n to row i+n
-                cntrl, targ = conn[0], conn[1]
-                parity_m[targ, :] = (parity_m[cntrl, :] + parity_m[targ, :]) % 2
-                parity_m[cntrl + n, :] = (parity_m[cntrl + n, :] + parity_m[targ + n, :]) % 2
-            elif g_name == "H":
-                # H(i) -> Exchange rows i and i+num_qubits
-                i = conn[0]
-                row1 = parity_m[i]
-                row2 = parity_m[i + n]
-                parity_m[i] = row2
-                parity_m[i + n] = row1
-            elif g_name == "S" or "Sd":
-                # S(i) -> Add row i to row i+num_qubits
-                i = conn[0]
-                parity_m[i + n] = (parity_m[i] + parity_m[i + n]) % 2
-            else:
-                raise ValueError('Gate chain should consist of Clifford gates (Cnot, H, S)')
-        return parity_m
+        Column :math:`i` of the matrix is the :math:`[x | z]` representation (without phase) of the image of
+        :math:`X_i` (:math:`i < n`) or :math:`Z_{i-n}` under the gate chain, see https://arxiv.org/pdf/1305.0810.pdf
+
+        :raises ValueError: when the gate chain contains non-Clifford gates
+        """
+        return self.clifford_tableau().symplectic_matrix().T
 
     # Calculating gate_chain unitary matrix using tensor contraction.
     # The code in _add_unitary(...), _einsum_vecmul_index, _einsum_matmul_index_helper(..)
@@ -412,7 +524,7 @@ class GateChain:
             tuple: (mat_left, mat_right, tens_in, tens_out) of index strings for
             that may be combined into a Numpy.einsum function string.
         Raises:
-            QiskitError: if the total number of qubits plus the number of
+            ValueError: if the total number of qubits plus the number of
             contracted indices is greater than 26.
         """
         # Since we use ASCII alphabet for einsum index labels we are limited
@@ -442,11 +554,12 @@ class GateChain:
         # for numpy.einsum function
         return mat_left, mat_right, tens_in, tens_out
 
-    def _add_unitary(self, gate, qubits, matrix, reverse_order=False):
+    def _add_unitary(self, gate, qubits, matrix, reverse_order=False, num_qubits=None):
         """Apply an N-qubit unitary matrix.
         Args:
             gate (matrix_like): an N-qubit unitary matrix
             qubits (list): the list of N-qubits to apply gate on.
+            num_qubits (int): number of qubits of the matrix, number of hardware qubits by default
         """
         # If Instruction do not recalculate matrix
         if not isinstance(gate, Gate):
@@ -454,7 +567,8 @@ class GateChain:
         # Get the number of qubits
         qubits = list(reversed(qubits))
         num_qubs_gate = len(qubits)
-        num_qubits = self.quantum_hardware.num_qubits
+        if num_qubits is None:
+            num_qubits = self.quantum_hardware.num_qubits
         # Compute einsum index string for 1-qubit matrix multiplication
         indexes = self._einsum_vecmul_index(qubits, num_qubits, reverse_order=reverse_order)
         # Convert to complex rank-2N tensor
@@ -494,6 +608,8 @@ class GateChain:
         Args:
             matrix: (np.array), cashed unitary matrix
         """
+        from sympy.combinatorics.permutations import Permutation
+
         # Get the number of qubits
         # (1) insert virtual Swap gates due to relabeling of input logical qubits due to mapping to physical qubits
         assert len(self.qreg_mapping) == 1, f"Only one quantum register is supported for fidelity calculation: detected {len(self.qreg_mapping)}"
@@ -532,6 +648,53 @@ class GateChain:
             matrix = self._add_unitary(g.gate, g.connections, matrix)
         return matrix
 
+    def block_unitary(self, start=0, stop=None, qubits=None):
+        """Unitary of the gates ``chain[start:stop]`` on the given qubits only
+
+        The unitary is a :math:`2^k \\times 2^k` matrix, where :math:`k` is the number of qubits,
+        local qubit ``i`` is ``qubits[i]`` and the qubit order is the same as in :attr:`matrix`
+        (virtual swaps of the qubit mappings aren't added). Instructions (measurements, barriers) are skipped.
+        Results are memoized by the content hash of the gates (see :meth:`fingerprint`) and the qubits,
+        so unchanged blocks aren't recalculated after the gate chain is modified elsewhere.
+        Returned arrays are shared between the calls and are read-only.
+
+        :param start: index of the first gate
+        :type start: int
+        :param stop: index after the last gate, the end of the chain by default
+        :type stop: int
+        :param qubits: qubits of the block, qubits of the gates in increasing order by default
+        :type qubits: list
+        :rtype: np.array
+
+        :raises ValueError: when a gate acts on a qubit outside of ``qubits``
+        """
+        start, stop, _ = slice(start, stop).indices(len(self.chain))
+        gate_connections = self.chain[start:stop]
+        if qubits is None:
+            qubits = sorted({q for el in gate_connections for q in el.connections})
+        qubits = tuple(qubits)
+        key = (RollingHash(gate_connections).content, len(gate_connections), qubits)
+        try:
+            self._block_unitaries.move_to_end(key)
+            return self._block_unitaries[key]
+        except KeyError:
+            pass
+
+        local = {q: i for i, q in enumerate(qubits)}
+        num_qubits = len(qubits)
+        matrix = np.eye(2 ** num_qubits, dtype=np.complex128)
+        for el in gate_connections:
+            try:
+                connections = [local[q] for q in el.connections]
+            except KeyError:
+                raise ValueError(f"Gate {el} acts on qubits outside of the block qubits {list(qubits)}")
+            matrix = self._add_unitary(el.gate, connections, matrix, num_qubits=num_qubits)
+        matrix.flags.writeable = False
+        self._block_unitaries[key] = matrix
+        while len(self._block_unitaries) > self.max_block_unitaries:
+            self._block_unitaries.popitem(last=False)
+        return matrix
+
     def calculate_noise(self):
         if self.quantum_hardware is None:
             raise Exception("Quantum hardware isn't defined")
@@ -555,12 +718,56 @@ class GateChain:
     def find_subchain(self, subchain):
         raise Exception("find_subchain isn't defined")
 
+    def layers(self, mode="asap"):
+        """Parallel layers of the gate chain
+
+        Layers are cached until the gate chain structure changes (see :meth:`structural_fingerprint`).
+
+        :param mode: ``"asap"`` or ``"alap"`` scheduling
+        :type mode: str
+        :rtype: Layers
+        """
+        hw = self.quantum_hardware
+        key = (self.structural_fingerprint(), len(self.chain), hw.num_qubits, hw.num_cbits)
+        cached = self._layers.get(mode)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        layers = Layers(self.chain, hw.num_qubits, hw.num_cbits, mode=mode)
+        self._layers[mode] = (key, layers)
+        return layers
+
+    def qubit_arrays(self):
+        """Qubits of every gate connection as arrays, cached until the gate chain structure changes
+
+        :return: number of qubits of every gate (0 for measurements, barriers and other instructions),
+            the first two qubits of every gate connection (shape (N, 2), padded with -1)
+            and the mask of measurements, read-only arrays
+        :rtype: tuple
+        """
+        key = (self.structural_fingerprint(), len(self.chain))
+        if self._qubit_arrays is not None and self._qubit_arrays[0] == key:
+            return self._qubit_arrays[1]
+        arity = []
+        pairs = []
+        measured = []
+        for el in self.chain:
+            conn = el.connections
+            gate = el.gate
+            is_gate = isinstance(gate, Gate)
+            arity.append(len(conn) if is_gate else 0)
+            measured.append(not is_gate and isinstance(gate, Measure))
+            pairs.append((conn[0], conn[1]) if len(conn) > 1 else (conn[0] if conn else -1, -1))
+        arity = np.array(arity, dtype=np.int64)
+        qubits = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        measured = np.array(measured, dtype=bool)
+        for a in (arity, qubits, measured):
+            a.flags.writeable = False
+        self._qubit_arrays = (key, (arity, qubits, measured))
+        return arity, qubits, measured
+
     def get_depth(self):
-        "Calculates depth of the gate chain by converting it to QiskitCircuit"
-        # TODO: implement our own get_depth based on dag representation
-        qiskit_circuit = self.convert_to(format_id="qiskit")
-        depth = qiskit_circuit.depth()
-        return depth
+        """Calculates depth of the gate chain, barriers are not counted as in ``QuantumCircuit.depth``"""
+        return self.layers().depth
 
     def get_depth_qubit(self):
         if self.quantum_hardware is None:
@@ -638,10 +845,11 @@ class GateChain:
         """ Check gate set violations
         :return: list of gate set violations
         """
+        supports_gate_class = self.quantum_hardware.gate_set.supports_gate_class
         violations = [
             (indx, str(g.gate))
             for indx, g in enumerate(self.chain)
-            if not any(isinstance(g.gate, t) for t in self.quantum_hardware.gate_set.gate_list)
+            if not supports_gate_class(type(g.gate))
         ]
         return violations
 
@@ -672,12 +880,32 @@ class GateChain:
         ]
 
     def copy(self):
+        """Return copy of the gate chain in O(1)
+
+        The gate sequence storage is shared until one of the copies is modified. The cached unitary and layers
+        are shared too, they are never modified in place, so the copies recalculate them independently.
+        The :meth:`block_unitary` memo is keyed by the block content, the copies use the same memo.
+        """
         c = GateChain(self.quantum_hardware)
         c.chain = copy(self.chain)
-        if self._matrix is not None:
-            c._matrix = self._matrix.copy()
+        c.qreg_mapping = {k: dict(v) for k, v in self.qreg_mapping.items()}
+        c.creg_mapping = {k: dict(v) for k, v in self.creg_mapping.items()}
+        c._matrix = self._matrix
+        c._new_gates_cnt_right = self._new_gates_cnt_right
+        c._new_gates_cnt_left = self._new_gates_cnt_left
+        c._layers = dict(self._layers)
+        c._qubit_arrays = self._qubit_arrays
+        c._block_unitaries = self._block_unitaries
+        if self._rolling_hash is not None and self._hashed_chain is self.chain:
+            c._rolling_hash = self._rolling_hash.copy()
+            c._hashed_chain = c.chain
         return c
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_converted"] = OrderedDict()
+        return state
+
     def save_chain(self, fname):
         with open(fname, "wb") as f:
             pickle.dump(self, f)
@@ -689,18 +917,13 @@ class GateChain:
         return gate_chain
 
     def to_qasm(self, qreg_name="q", creg_name="c"):
-        s = "// Copyright (c) 2019 Turation Ltd\n" "\n" "OPENQASM 2.0;\n" 'include "qelib1.inc";\n'
-        s += "\n" "qreg " + qreg_name + "[" + str(self.quantum_hardware.num_qubits) + "];" + "\n"
-        s += "creg " + creg_name + "[" + str(self.quantum_hardware.num_qubits) + "];" "\n"
-        gate_list = [g.to_qasm(qreg_name) for g in self.chain]
-        s += "\n".join(gate_list)
-        s += "\n"
-        return s
+        output = io.StringIO()
+        QasmWriter(qreg_name, creg_name).write(self, output)
+        return output.getvalue()
 
     def save_to_qasm(self, output_dir, qreg_name="q", creg_name="c"):
         with open(output_dir, "w") as f:
-            s = self.to_qasm(qreg_name=qreg_name, creg_name=creg_name)
-            f.write(s)
+            QasmWriter(qreg_name, creg_name).write(self, f)
         return True
 
     @staticmethod
@@ -712,20 +935,9 @@ class GateChain:
         with QasmParser(file_name) as qasm_p:
             qasm_p.parse_debug(False)
             ast = qasm_p.parse(qasm_data)
-            hardware_from_qasm = quantum_hardware is None
-            if quantum_hardware is None:
-                connectivity = All2All(0)
-                quantum_hardware = Hardware(
-                    f"FromQasm",
-                    gate_set=GateSet(f"FromQasm", []),
-                    qubit_connectivity=connectivity
-                )
-            # AstInterpreter can modify hardware, so we need to make a copy
-            gate_chain = GateChain(quantum_hardware.copy())
-            AstInterpreter(gate_chain, hardware_from_qasm)._process_node(ast)
-            num_qubits = gate_chain.quantum_hardware.num_qubits
-
-            return gate_chain
+            interpreter = AstInterpreter.for_hardware(quantum_hardware)
+            interpreter._process_node(ast)
+            return interpreter.gate_chain
 
     @staticmethod
     def from_qasm(input_file, quantum_hardware=None):
@@ -786,16 +998,34 @@ class GateChain:
 
         return cls.converters[format_id].to_gate_chain(circuit_object, **kwargs)
 
-    def convert_to(self, format_id, **kwargs):
+    def convert_to(self, format_id, use_cache=False, **kwargs):
         """Converts GateChain object to one of frameworks or formats
+
+        With ``use_cache=True`` results are memoized by the gate chain :meth:`fingerprint`, so repeated conversions
+        of an unchanged chain return the same object. It is shared between the calls and must not be modified.
+
         :param format_id: Format ID
         :type format_id: str
-
+        :param use_cache: return memoized result, a new object is created by default
+        :type use_cache: bool
         """
         if format_id not in self.converters:
             raise RuntimeError(f"Format ID {format_id} is not supported")
-
-        return self.converters[format_id].from_gate_chain(self, **kwargs)
+        if not use_cache or kwargs:
+            return self.converters[format_id].from_gate_chain(self, **kwargs)
+
+        hw = self.quantum_hardware
+        key = (format_id, self.fingerprint(), len(self.chain), id(hw), hw.num_qubits)
+        try:
+            self._converted.move_to_end(key)
+            return self._converted[key]
+        except KeyError:
+            pass
+        circuit_object = self.converters[format_id].from_gate_chain(self, **kwargs)
+        self._converted[key] = circuit_object
+        while len(self._converted) > self.max_converted_objects:
+            self._converted.popitem(last=False)
+        return circuit_object
 
     @classmethod
     def register_converter(cls, converter_class):
@@ -840,6 +1070,62 @@ class AstInterpreter:
         self.bit_stack = [{}]
         self.hardware_from_qasm = hardware_from_qasm
 
+    @classmethod
+    def for_hardware(cls, quantum_hardware=None):
+        """Create interpreter populating a new gate chain
+
+        :param quantum_hardware: hardware, if None the hardware is built from the registers and gates
+        :type quantum_hardware: Hardware
+        :rtype: AstInterpreter
+        """
+        hardware_from_qasm = quantum_hardware is None
+        if quantum_hardware is None:
+            connectivity = All2All(0)
+            quantum_hardware = Hardware(
+                f"FromQasm",
+                gate_set=GateSet(f"FromQasm", []),
+                qubit_connectivity=connectivity
+            )
+        # AstInterpreter can modify hardware, so we need to make a copy
+        return cls(GateChain(quantum_hardware.copy()), hardware_from_qasm)
+
+    def add_qreg(self, name, size):
+        """Declare quantum register"""
+        if self.hardware_from_qasm:
+            self.gate_chain.quantum_hardware.num_qubits += size
+            num_qubits = self.gate_chain.quantum_hardware.num_qubits
+            self.gate_chain.quantum_hardware.qubit_connectivity = All2All(num_qubits)
+            self.gate_chain.quantum_hardware.update_name()
+        self.gate_chain.add_qreg_mapping(name, size)
+
+    def add_creg(self, name, size):
+        """Declare classical register"""
+        if self.hardware_from_qasm:
+            self.gate_chain.quantum_hardware.num_cbits += size
+        self.gate_chain.add_creg_mapping(name, size)
+
+    def add_operation(self, name, params, qargs, cargs=()):
+        """Add operation by OPENQASM name, e.g. from an in-memory circuit
+
+        :param name: OPENQASM gate name, ``measure`` or ``barrier``
+        :type name: str
+        :param params: gate parameters
+        :type params: list
+        :param qargs: qubit indices
+        :type qargs: list
+        :param cargs: classical bit indices (measure)
+        :type cargs: list
+        """
+        if name == "measure":
+            for idx, idy in zip(qargs, cargs):
+                meas_gate = Measure()
+                meas_gate.condition = None
+                self.gate_chain.add_gate(meas_gate, connections=[idx], cregs=[idy])
+        elif name == "barrier":
+            self.gate_chain.add_gate(Barrier(), connections=list(qargs), cregs=[])
+        else:
+            self._add_gate_chain_gate(name, params, list(qargs))
+
     def _process_bit_id(self, node):
         """Process an Id or IndexedId node as a bit or register type
 
@@ -943,7 +1229,7 @@ class AstInterpreter:
         id1 = self._process_bit_id(node.children[1])
 
         if len(id0) != len(id1):
-            raise QiskitError("Internal error: reg size mismatch", "line=%s" % node.line, "file=%s" % node.file)
+            raise QasmError("Internal error: reg size mismatch", "line=%s" % node.line, "file=%s" % node.file)
         for idx, idy in zip(id0, id1):
             meas_gate = Measure()
             meas_gate.condition = None
@@ -973,17 +1259,10 @@ class AstInterpreter:
             self._process_children(node)
 
         elif node.type == "qreg":
-            if self.hardware_from_qasm:
-                self.gate_chain.quantum_hardware.num_qubits += node.index
-                num_qubits = self.gate_chain.quantum_hardware.num_qubits
-                self.gate_chain.quantum_hardware.qubit_connectivity = All2All(num_qubits)
-                self.gate_chain.quantum_hardware.update_name()
-            self.gate_chain.add_qreg_mapping(node.name, node.index)
+            self.add_qreg(node.name, node.index)
 
         elif node.type == "creg":
-            if self.hardware_from_qasm:
-                self.gate_chain.quantum_hardware.num_cbits += node.index
-            self.gate_chain.add_creg_mapping(node.name, node.index)
+            self.add_creg(node.name, node.index)
 
         elif node.type == "id":
             raise RuntimeError("Internal Error: _process_node on id")
@@ -1076,11 +1355,13 @@ class AstInterpreter:
         self.gate_chain.add_gate(op, qargs)
 
     def _create_op(self, name, params):
-        if name in self.gate_chain.quantum_hardware.gate_set.gates_by_qasm_name:
-            op = self.gate_chain.quantum_hardware.gate_set.gates_by_qasm_name[name](*params)
+        gate_set = self.gate_chain.quantum_hardware.gate_set
+        gate_class = gate_set.gates_by_qasm_name.get(name)
+        if gate_class is not None:
+            op = gate_class(*params)
         elif self.hardware_from_qasm and name in qasm_gate_table_all:
-            self.gate_chain.quantum_hardware.gate_set.gate_list.append(qasm_gate_table_all[name])
-            op = self.gate_chain.quantum_hardware.gate_set.gates_by_qasm_name[name](*params)
+            gate_set.add_gate(qasm_gate_table_all[name])
+            op = gate_set.gates_by_qasm_name[name](*params)
         elif name in self.gates:
             raise NotImplementedError()
         else:
@@ -1088,7 +1369,12 @@ class AstInterpreter:
         return op
 
 
-from arline_quantum.gate_chain.converters import QiskitGateChainConverter, CirqGateChainConverter
+from arline_quantum.gate_chain.converters import (
+    CirqGateChainConverter,
+    PytketGateChainConverter,
+    QiskitGateChainConverter,
+)
 
 GateChain.register_converter(QiskitGateChainConverter)
 GateChain.register_converter(CirqGateChainConverter)
+GateChain.register_converter(PytketGateChainConverter)
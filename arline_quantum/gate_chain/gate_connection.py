@@ -14,11 +14,13 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from arline_quantum.gate_chain import gate_chain
-from arline_quantum.hardware import hardware_by_name
+from arline_quantum.gate_chain.commutation import CommutationChecker
 from arline_quantum.gates.measure import Measure
 
 
+_commutation_checkers = {}  # Shared memoizing commutation oracles by tolerance
+
+
 class GateConnection:
     def __init__(self, quantum_hardware, gate, connections, cregs=[]):
         self._quantum_hardware = quantum_hardware
@@ -78,20 +80,8 @@ class GateConnection:
     def commute(self, other_gate_conn, tol=1e-7):
         """ Return True if gate operators commute, False otherwise
         """
-        conn1 = set(self._connections)
-        conn2 = set(other_gate_conn._connections)
-
-        if len(conn1.intersection(conn2)) == 0:
-            return True
-
-        conn_mapping = {v: k for k, v in (enumerate(conn1.union(conn2)))}
-
-        hw_cfg = {"gate_set": [], "num_qubits": len(conn_mapping)}
-        hw = hardware_by_name(hw_cfg)
-        gc1 = gate_chain.GateChain(hw)
-        gc2 = gate_chain.GateChain(hw)
-
-        gc1.add_gate(self._gate, [conn_mapping[n] for n in self.connections])
-        gc2.add_gate(other_gate_conn._gate, [conn_mapping[n] for n in other_gate_conn.connections])
-
-        return (abs(gc1.matrix.dot(gc2.matrix) - gc2.matrix.dot(gc1.matrix)) < tol).all()
+        try:
+            checker = _commutation_checkers[tol]
+        except KeyError:
+            checker = _commutation_checkers[tol] = CommutationChecker(tol=tol)
+        return checker.commute(self._gate, self._connections, other_gate_conn._gate, other_gate_conn._connections)
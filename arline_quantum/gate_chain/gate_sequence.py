@@ -0,0 +1,239 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from collections.abc import MutableSequence
+from itertools import chain as iter_chain, islice
+
+_BITS = 5
+_WIDTH = 1 << _BITS  # branching factor of the trie and size of the leaves
+_MASK = _WIDTH - 1
+
+
+def _new_path(shift, leaf):
+    """Node of level ``shift`` containing a single leaf"""
+    node = leaf
+    for _ in range(0, shift, _BITS):
+        node = (node,)
+    return node
+
+
+def _push_leaf(node, shift, index, leaf):
+    """Return copy of the node with the leaf of elements starting at ``index`` appended"""
+    i = (index >> shift) & _MASK
+    if shift == _BITS:
+        return node + (leaf,)
+    if i < len(node):
+        return node[:i] + (_push_leaf(node[i], shift - _BITS, index, leaf),)
+    return node + (_new_path(shift - _BITS, leaf),)
+
+
+def _assoc(node, shift, index, value):
+    """Return copy of the node with element ``index`` replaced"""
+    i = (index >> shift) & _MASK
+    child = value if shift == 0 else _assoc(node[i], shift - _BITS, index, value)
+    return node[:i] + (child,) + node[i + 1 :]
+
+
+def _leaves(node, shift):
+    if shift == 0:
+        yield node
+    else:
+        for child in node:
+            yield from _leaves(child, shift - _BITS)
+
+
+def _build_trie(leaves):
+    """Root and shift of a trie with the leaves"""
+    shift = _BITS
+    while len(leaves) > _WIDTH:
+        leaves = [tuple(leaves[i : i + _WIDTH]) for i in range(0, len(leaves), _WIDTH)]
+        shift += _BITS
+    return tuple(leaves), shift
+
+
+class GateSequence(MutableSequence):
+    """Persistent sequence of gate connections, storage of :attr:`.GateChain.chain`
+
+    Elements have stable integer coordinates: a 32-way trie of immutable tuples holds elements
+    :math:`0 \\ldots body - 1`, a tail list of up to 32 elements follows it
+    and a head list (reversed) holds elements with negative coordinates added with :meth:`appendleft`.
+    A sequence is a window ``[start, stop)`` of the coordinates.
+
+    Copies and slices with step 1 are :math:`O(1)` and share all the storage. The trie is never modified,
+    the tail and head lists are only extended, by the sequence whose window reaches their end
+    (other sequences sharing the list copy their part of it, at most 32 elements for the tail).
+    So copies are independent and appending to any of them is :math:`O(1)` amortized
+    (:math:`O(\\log_{32} n)` when a full tail is moved to the trie), random access is :math:`O(\\log_{32} n)`.
+    Insertion and deletion rebuild the sequence in :math:`O(n)`.
+
+    :param iterable: elements
+    :type iterable: iterable
+    """
+
+    __slots__ = ("_head", "_root", "_shift", "_body", "_tail", "_start", "_stop")
+
+    def __init__(self, iterable=()):
+        self._rebuild(list(iterable))
+
+    def _rebuild(self, elements):
+        body = len(elements) - len(elements) % _WIDTH
+        leaves = [tuple(elements[i : i + _WIDTH]) for i in range(0, body, _WIDTH)]
+        self._root, self._shift = _build_trie(leaves)
+        self._body = body
+        self._head = []
+        self._tail = elements[body:]
+        self._start, self._stop = 0, len(elements)
+
+    def _view(self, start, stop):
+        view = GateSequence.__new__(GateSequence)
+        view._head, view._root, view._shift, view._body, view._tail = (
+            self._head,
+            self._root,
+            self._shift,
+            self._body,
+            self._tail,
+        )
+        view._start, view._stop = start, stop
+        return view
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def _coordinate(self, index):
+        n = self._stop - self._start
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("GateSequence index out of range")
+        return self._start + index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return self._view(self._start + start, self._start + max(start, stop))
+            return GateSequence(self[i] for i in range(start, stop, step))
+        c = self._coordinate(index)
+        if c < 0:
+            return self._head[-1 - c]
+        if c >= self._body:
+            return self._tail[c - self._body]
+        node = self._root
+        for shift in range(self._shift, 0, -_BITS):
+            node = node[(c >> shift) & _MASK]
+        return node[c & _MASK]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            elements = list(self)
+            elements[index] = value
+            self._rebuild(elements)
+            return
+        c = self._coordinate(index)
+        if c < 0:
+            self._head = self._head[: -self._start]
+            self._head[-1 - c] = value
+        elif c >= self._body:
+            self._tail = self._tail[: self._stop - self._body]
+            self._tail[c - self._body] = value
+        else:
+            self._root = _assoc(self._root, self._shift, c, value)
+
+    def __delitem__(self, index):
+        elements = list(self)
+        del elements[index]
+        self._rebuild(elements)
+
+    def insert(self, index, value):
+        elements = list(self)
+        elements.insert(index, value)
+        self._rebuild(elements)
+
+    def append(self, value):
+        stop, body = self._stop, self._body
+        if stop < body:
+            # View ending inside the trie
+            self._rebuild(list(self))
+            stop, body = self._stop, self._body
+        num_tail = stop - body
+        if num_tail == _WIDTH:
+            if body == 1 << (self._shift + _BITS):
+                self._root = (self._root, _new_path(self._shift, tuple(self._tail)))
+                self._shift += _BITS
+            else:
+                self._root = _push_leaf(self._root, self._shift, body, tuple(self._tail))
+            self._body = body + _WIDTH
+            self._tail = [value]
+        else:
+            if num_tail != len(self._tail):
+                # The tail is shared with a sequence which appended to it
+                self._tail = self._tail[:num_tail]
+            self._tail.append(value)
+        self._stop = stop + 1
+
+    def appendleft(self, value):
+        start = self._start
+        if start > 0:
+            # View starting inside the trie or the tail
+            self._rebuild(list(self))
+            start = 0
+        if -start != len(self._head):
+            # The head is shared with a sequence which appended to it
+            self._head = self._head[:-start] if start else []
+        self._head.append(value)
+        self._start = start - 1
+
+    def extend(self, values):
+        if values is self:
+            values = list(values)
+        for value in values:
+            self.append(value)
+
+    def clear(self):
+        self._rebuild([])
+
+    def __iter__(self):
+        start, stop, body = self._start, self._stop, self._body
+        parts = []
+        if start < 0:
+            head = self._head
+            parts.append(islice(reversed(head), len(head) + start, len(head) + min(stop, 0)))
+        if stop > 0 and start < body:
+            first = max(start, 0)
+            leaves = islice(_leaves(self._root, self._shift), first >> _BITS, None)
+            offset = first & _MASK
+            parts.append(islice(iter_chain.from_iterable(leaves), offset, offset + min(stop, body) - first))
+        if stop > body:
+            parts.append(islice(self._tail, max(start - body, 0), stop - body))
+        return iter_chain.from_iterable(parts)
+
+    def __reversed__(self):
+        return reversed(list(self))
+
+    def __copy__(self):
+        return self._view(self._start, self._stop)
+
+    def __reduce__(self):
+        return GateSequence, (list(self),)
+
+    def __eq__(self, other):
+        if isinstance(other, GateSequence):
+            return len(self) == len(other) and all(a is b or a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"GateSequence({list(self)})"
@@ -0,0 +1,120 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import numpy as np
+
+from arline_quantum.gates.barrier import Barrier
+
+layer_modes = ("asap", "alap")
+
+
+class Layers:
+    """Parallel layers (moments) of a gate chain
+
+    Every gate is placed to the earliest (``"asap"``) or the latest (``"alap"``) layer allowed by the gates
+    on the same qubits and classical bits, layers are computed in one pass over the gate chain.
+    As in ``QuantumCircuit.depth`` of Qiskit, barriers synchronize their qubits but don't occupy a layer.
+
+    :param gate_connections: sequence of :class:`.GateConnection`
+    :type gate_connections: collections.abc.Sequence
+    :param num_qubits: number of qubits
+    :type num_qubits: int
+    :param num_cbits: number of classical bits
+    :type num_cbits: int
+    :param mode: ``"asap"`` or ``"alap"``
+    :type mode: str
+
+    :ivar np.array levels: layer of every gate connection, -1 for barriers
+    :ivar int depth: number of layers
+    """
+
+    def __init__(self, gate_connections, num_qubits, num_cbits=0, mode="asap"):
+        if mode not in layer_modes:
+            raise ValueError(f"Unknown layer mode {mode}, expected one of {layer_modes}")
+        self.mode = mode
+        self.num_qubits = num_qubits
+        num_gates = len(gate_connections)
+        stack = [0] * (num_qubits + num_cbits)
+        levels = [-1] * num_gates
+        qubit_gates = []  # (qubit, gate index) pairs
+        order = range(num_gates - 1, -1, -1) if mode == "alap" else range(num_gates)
+        elements = reversed(gate_connections) if mode == "alap" else gate_connections
+        for i, el in zip(order, elements):
+            wires = list(el.connections)
+            wires.extend(num_qubits + c for c in el.cregs)
+            level = max([stack[w] for w in wires], default=0)
+            if isinstance(el.gate, Barrier):
+                for w in wires:
+                    stack[w] = level
+                continue
+            for w in wires:
+                stack[w] = level + 1
+            levels[i] = level
+            qubit_gates.extend((q, i) for q in el.connections)
+        self.depth = max(stack, default=0)
+        self.levels = np.array(levels, dtype=np.int64)
+        if mode == "alap":
+            self.levels[self.levels >= 0] = self.depth - 1 - self.levels[self.levels >= 0]
+        self._qubit_gates = np.array(qubit_gates, dtype=np.int64).reshape(-1, 2)
+        self._layers = None
+
+    @property
+    def layers(self):
+        """Indices of gate connections in every layer
+
+        :rtype: list of np.array
+        """
+        if self._layers is None:
+            placed = np.flatnonzero(self.levels >= 0)
+            placed = placed[np.argsort(self.levels[placed], kind="stable")]
+            counts = np.bincount(self.levels[self.levels >= 0], minlength=self.depth)
+            self._layers = np.split(placed, np.cumsum(counts)[:-1]) if self.depth else []
+        return self._layers
+
+    def __len__(self):
+        return self.depth
+
+    def __getitem__(self, layer):
+        return self.layers[layer]
+
+    def __iter__(self):
+        return iter(self.layers)
+
+    def qubit_busy_layers(self):
+        """Number of layers in which every qubit is used
+
+        :rtype: np.array
+        """
+        return np.bincount(self._qubit_gates[:, 0], minlength=self.num_qubits)
+
+    def qubit_idle_layers(self, active_only=False):
+        """Number of layers in which every qubit is idle
+
+        :param active_only: count only idle layers between the first and the last gate on the qubit
+            (depends on the mode), unused qubits have no idle layers
+        :type active_only: bool
+        :rtype: np.array
+        """
+        busy = self.qubit_busy_layers()
+        if not active_only:
+            return self.depth - busy
+        qubits, levels = self._qubit_gates[:, 0], self.levels[self._qubit_gates[:, 1]]
+        first = np.full(self.num_qubits, self.depth, dtype=np.int64)
+        last = np.full(self.num_qubits, -1, dtype=np.int64)
+        np.minimum.at(first, qubits, levels)
+        np.maximum.at(last, qubits, levels)
+        return np.where(busy > 0, last - first + 1 - busy, 0)
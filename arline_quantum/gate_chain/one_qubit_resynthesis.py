@@ -0,0 +1,227 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import numpy as np
+
+from arline_quantum.gates.gate import Gate
+from arline_quantum.gates.h import H
+from arline_quantum.gates.r import R
+from arline_quantum.gates.rx import Rx
+from arline_quantum.gates.rz import Rz
+from arline_quantum.gates.u3 import U3
+
+
+def euler_angles_zyz(mats):
+    r"""Euler angles of single qubit unitaries, :math:`U = e^{i \gamma} R_z(\phi) R_y(\theta) R_z(\lambda)`
+
+    :param mats: array of unitaries, shape (N, 2, 2)
+    :type mats: np.array
+    :return: arrays theta, phi, lambda, gamma
+    :rtype: tuple
+    """
+    mats = np.asarray(mats, dtype=complex)
+    coeff = 1 / np.sqrt(np.linalg.det(mats))
+    phase = -np.angle(coeff)
+    su = mats * coeff[:, None, None]
+    theta = 2 * np.arctan2(np.abs(su[:, 1, 0]), np.abs(su[:, 0, 0]))
+    half_phi_plus_lam = np.angle(su[:, 1, 1])
+    half_phi_minus_lam = np.angle(su[:, 1, 0])
+    phi = half_phi_plus_lam + half_phi_minus_lam
+    lam = half_phi_plus_lam - half_phi_minus_lam
+    return theta, phi, lam, phase
+
+
+def euler_angles_zxz(mats):
+    r"""Euler angles of single qubit unitaries, :math:`U = e^{i \gamma} R_z(\phi) R_x(\theta) R_z(\lambda)`
+
+    :param mats: array of unitaries, shape (N, 2, 2)
+    :type mats: np.array
+    :return: arrays theta, phi, lambda, gamma
+    :rtype: tuple
+    """
+    theta, phi, lam, phase = euler_angles_zyz(mats)
+    return theta, phi + np.pi / 2, lam - np.pi / 2, phase
+
+
+def euler_angles_u3(mats):
+    r"""Angles of single qubit unitaries, :math:`U = e^{i \gamma} U_3(\theta, \phi, \lambda)`
+
+    :param mats: array of unitaries, shape (N, 2, 2)
+    :type mats: np.array
+    :return: arrays theta, phi, lambda, gamma
+    :rtype: tuple
+    """
+    theta, phi, lam, phase = euler_angles_zyz(mats)
+    return theta, phi, lam, phase - (phi + lam) / 2
+
+
+def mod_2pi(angle):
+    """Wrap angle to :math:`[-\\pi, \\pi)`"""
+    return (angle + np.pi) % (2 * np.pi) - np.pi
+
+
+def _is_zero(angle, tol):
+    return abs(mod_2pi(angle)) < tol
+
+
+def _emit_rz(angle, tol):
+    return [] if _is_zero(angle, tol) else [Rz(mod_2pi(angle))]
+
+
+def _emit_u3(theta, phi, lam, tol):
+    if _is_zero(theta, tol) and _is_zero(phi + lam, tol):
+        return []
+    return [U3(theta, mod_2pi(phi), mod_2pi(lam))]
+
+
+def _emit_zxz(theta, phi, lam, tol):
+    if _is_zero(theta, tol):
+        return _emit_rz(phi + lam, tol)
+    return _emit_rz(lam, tol) + [Rx(theta)] + _emit_rz(phi, tol)
+
+
+_rx_plus_pi2 = Rx.make_discrete(np.pi / 2)
+_rx_minus_pi2 = Rx.make_discrete(-np.pi / 2)
+
+
+def _emit_rigetti(theta, phi, lam, tol):
+    if _is_zero(theta, tol):
+        return _emit_rz(phi + lam, tol)
+    return _emit_rz(lam, tol) + [_rx_plus_pi2(), Rz(theta), _rx_minus_pi2()] + _emit_rz(phi, tol)
+
+
+def _emit_google(theta, phi, lam, tol):
+    # U3(theta, phi, lam) = U3(theta, phi, -phi) Rz(phi + lam), U3(theta, phi, -phi) = R(theta, phi + pi / 2)
+    gates = _emit_rz(phi + lam, tol)
+    if not _is_zero(theta, tol):
+        gates.append(R(theta, mod_2pi(phi + np.pi / 2)))
+    return gates
+
+
+def _emit_zhz(theta, phi, lam, tol):
+    # Rx(theta) = H Rz(theta) H, Rx(pi / 2) = Rz(-pi / 2) H Rz(-pi / 2) up to global phase
+    if _is_zero(theta, tol):
+        return _emit_rz(phi + lam, tol)
+    if _is_zero(theta - np.pi / 2, tol):
+        return _emit_rz(lam - np.pi / 2, tol) + [H()] + _emit_rz(phi - np.pi / 2, tol)
+    return _emit_rz(lam, tol) + [H(), Rz(theta), H()] + _emit_rz(phi, tol)
+
+
+#: Target single qubit bases: name -> (angles function, gates emitter)
+one_qubit_bases = {
+    "u3": (euler_angles_u3, _emit_u3),
+    "zxz": (euler_angles_zxz, _emit_zxz),
+    "rigetti": (euler_angles_zyz, _emit_rigetti),
+    "google": (euler_angles_u3, _emit_google),
+    "zhz": (euler_angles_zxz, _emit_zhz),
+}
+
+
+def one_qubit_basis(gate_classes):
+    """Find single qubit basis of :data:`one_qubit_bases` which can be expressed with the gate classes
+
+    :param gate_classes: gate classes of the target gate set
+    :type gate_classes: list
+    :return: basis name, None if the gate classes don't contain universal continuous single qubit gates
+    :rtype: str
+    """
+    gate_classes = set(gate_classes)
+    if U3 in gate_classes:
+        return "u3"
+    if Rz in gate_classes:
+        if Rx in gate_classes:
+            return "zxz"
+        if R in gate_classes:
+            return "google"
+        rx_angles = [
+            g().args[0] for g in gate_classes if issubclass(g, Rx) and g.is_discrete and g.num_angles == 0
+        ]
+        if np.isclose(rx_angles, np.pi / 2).any() and np.isclose(rx_angles, -np.pi / 2).any():
+            return "rigetti"
+        if H in gate_classes:
+            return "zhz"
+    return None
+
+
+def resynthesize_one_qubit_runs(ops, basis="u3", tol=1e-8, native=()):
+    """Merge maximal runs of single qubit gates on every qubit and resynthesize them in the target basis
+
+    Run unitaries are multiplied in a batch over all runs and Euler angles are computed for all runs at once.
+    Runs equal to identity (up to global phase) are removed, zero angle rotations are skipped.
+    Runs of native gates are kept if resynthesis doesn't make them shorter.
+    Multi-qubit gates, measurements and barriers close the runs on their qubits.
+
+    :param ops: sequence of (gate, connections, cregs)
+    :type ops: iterable
+    :param basis: target basis, key of :data:`one_qubit_bases`
+    :type basis: str
+    :param tol: tolerance for identity runs and zero angles
+    :type tol: float
+    :param native: gate classes of the target gate set
+    :type native: iterable
+    :return: list of (gate, connections, cregs)
+    :rtype: list
+    """
+    angles_func, emit = one_qubit_bases[basis]
+    native = set(native)
+
+    out = []  # (gate, connections, cregs) or index of a run
+    runs = []
+    run_qubits = []
+    pending = {}
+    for g, conn, cregs in ops:
+        op = (g, conn, cregs)
+        if isinstance(g, Gate) and g.num_qubits == 1 and not cregs:
+            pending.setdefault(conn[0], []).append(g)
+            continue
+        for q in conn:
+            run = pending.pop(q, None)
+            if run:
+                out.append(len(runs))
+                runs.append(run)
+                run_qubits.append(q)
+        out.append(op)
+    for q, run in pending.items():
+        out.append(len(runs))
+        runs.append(run)
+        run_qubits.append(q)
+
+    if not runs:
+        return out
+
+    # Multiply run unitaries, one batched matmul for every position in the runs
+    lengths = np.array([len(r) for r in runs])
+    mats = np.tile(np.eye(2, dtype=complex), (len(runs), 1, 1))
+    for k in range(lengths.max()):
+        sel = np.flatnonzero(lengths > k)
+        us = np.array([runs[i][k]._u for i in sel])
+        mats[sel] = us @ mats[sel]
+
+    theta, phi, lam, _ = (a.tolist() for a in angles_func(mats))
+
+    result = []
+    for op in out:
+        if isinstance(op, tuple):
+            result.append(op)
+        else:
+            conn = [run_qubits[op]]
+            gates = emit(theta[op], phi[op], lam[op], tol)
+            run = runs[op]
+            if len(run) <= len(gates) and all(type(g) in native for g in run):
+                gates = run
+            result.extend((g, conn, []) for g in gates)
+    return result
@@ -0,0 +1,313 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from collections import deque
+
+import numpy as np
+
+from arline_quantum.gates.cnot import Cnot
+from arline_quantum.utils.bits import pack_bits, unpack_bits
+
+
+class ParityMatrix:
+    """Square binary matrix over GF(2) with bit-packed rows
+
+    Row :math:`i` of the parity matrix of a Cnot circuit is the parity of input qubits stored in qubit :math:`i`,
+    :math:`Cnot(c, t)` adds row :math:`c` to row :math:`t`.
+
+    :param num_qubits: matrix size
+    :type num_qubits: int
+
+    :ivar np.array rows: packed rows, uint64 array of shape (num_qubits, words)
+    """
+
+    def __init__(self, num_qubits):
+        self.num_qubits = num_qubits
+        self.rows = pack_bits(np.eye(num_qubits, dtype=bool))
+
+    @classmethod
+    def from_array(cls, matrix):
+        """Create parity matrix from a binary array
+
+        :param matrix: binary array of shape (n, n)
+        :type matrix: np.array
+        :rtype: ParityMatrix
+        """
+        matrix = np.asarray(matrix) % 2
+        parity_matrix = cls.__new__(cls)
+        parity_matrix.num_qubits = matrix.shape[0]
+        parity_matrix.rows = pack_bits(matrix.astype(bool))
+        return parity_matrix
+
+    @classmethod
+    def from_gate_chain(cls, gate_chain):
+        """Create parity matrix of Cnot-only gate chain
+
+        :param gate_chain: gate chain
+        :type gate_chain: GateChain
+        :rtype: ParityMatrix
+
+        :raises ValueError: when the gate chain contains gates other than Cnot
+        """
+        parity_matrix = cls(gate_chain.quantum_hardware.num_qubits)
+        rows = parity_matrix.rows
+        for el in gate_chain.chain:
+            if type(el.gate) is not Cnot:
+                raise ValueError("Gate chain should consist of CNOTs only")
+            cntrl, targ = el.connections
+            rows[targ] ^= rows[cntrl]
+        return parity_matrix
+
+    def to_array(self):
+        """Return matrix as int64 array"""
+        return unpack_bits(self.rows, self.num_qubits).astype(np.int64)
+
+    def copy(self):
+        parity_matrix = self.__class__.__new__(self.__class__)
+        parity_matrix.num_qubits = self.num_qubits
+        parity_matrix.rows = self.rows.copy()
+        return parity_matrix
+
+    def add_row(self, src, dst):
+        """Add row ``src`` to row ``dst`` (apply :math:`Cnot(src, dst)`)"""
+        self.rows[dst] ^= self.rows[src]
+
+    def swap_rows(self, i, j):
+        self.rows[[i, j]] = self.rows[[j, i]]
+
+    def transpose(self):
+        """Return transposed matrix
+
+        :rtype: ParityMatrix
+        """
+        return self.from_array(unpack_bits(self.rows, self.num_qubits).T)
+
+    def column(self, j):
+        """Return column ``j`` as boolean array"""
+        return ((self.rows[:, j // 64] >> np.uint64(j % 64)) & np.uint64(1)).astype(bool)
+
+    def __getitem__(self, key):
+        i, j = key
+        return int((self.rows[i, j // 64] >> np.uint64(j % 64)) & np.uint64(1))
+
+    def gaussian_elimination(self):
+        """Reduce matrix to row echelon form in place
+
+        :return: rank and list of row operations ``(src, dst)``, swaps are stored as three row additions
+        :rtype: tuple
+        """
+        rows = self.rows
+        ops = []
+        rank = 0
+        for j in range(self.num_qubits):
+            col = self.column(j)
+            candidates = np.flatnonzero(col[rank:]) + rank
+            if len(candidates) == 0:
+                continue
+            pivot = candidates[0]
+            if pivot != rank:
+                # Set pivot bit with row addition instead of swap
+                rows[rank] ^= rows[pivot]
+                ops.append((int(pivot), rank))
+                col = self.column(j)
+            targets = np.flatnonzero(col)
+            targets = targets[targets != rank]
+            if len(targets):
+                rows[targets] ^= rows[rank]
+                ops.extend((rank, int(t)) for t in targets)
+            rank += 1
+        return rank, ops
+
+    def rank(self):
+        return self.copy().gaussian_elimination()[0]
+
+    def is_invertible(self):
+        return self.rank() == self.num_qubits
+
+    def inverse(self):
+        """Return inverse matrix
+
+        :rtype: ParityMatrix
+        :raises ValueError: if the matrix is singular
+        """
+        reduced = self.copy()
+        rank, ops = reduced.gaussian_elimination()
+        if rank != self.num_qubits:
+            raise ValueError("Parity matrix is singular")
+        inverse = self.__class__(self.num_qubits)
+        for src, dst in ops:
+            inverse.rows[dst] ^= inverse.rows[src]
+        return inverse
+
+    def __matmul__(self, other):
+        a = unpack_bits(self.rows, self.num_qubits).astype(np.int64)
+        b = unpack_bits(other.rows, other.num_qubits).astype(np.int64)
+        return self.from_array((a @ b) % 2)
+
+    def __eq__(self, other):
+        if not isinstance(other, ParityMatrix) or other.num_qubits != self.num_qubits:
+            return False
+        return np.array_equal(unpack_bits(self.rows, self.num_qubits), unpack_bits(other.rows, other.num_qubits))
+
+    def __str__(self):
+        return str(self.to_array())
+
+
+def _lower_cnot_synthesis(parity_matrix, section_size):
+    """Eliminate lower triangular part of the matrix in place, return list of row operations"""
+    n = parity_matrix.num_qubits
+    rows = parity_matrix.rows
+    ops = []
+    for start in range(0, n, section_size):
+        stop = min(start + section_size, n)
+        # Remove duplicate sub-row patterns in the section
+        patterns = np.zeros(n, dtype=np.int64)
+        for j in range(start, stop):
+            patterns |= parity_matrix.column(j).astype(np.int64) << (j - start)
+        first_row = {}
+        for i in range(start, n):
+            p = patterns[i]
+            if p == 0:
+                continue
+            if p in first_row:
+                rows[i] ^= rows[first_row[p]]
+                ops.append((first_row[p], i))
+            else:
+                first_row[p] = i
+        # Gaussian elimination of the section columns
+        for j in range(start, stop):
+            col = parity_matrix.column(j)
+            below = np.flatnonzero(col[j + 1:]) + j + 1
+            if len(below) == 0:
+                continue
+            if not col[j]:
+                rows[j] ^= rows[below[0]]
+                ops.append((int(below[0]), j))
+            rows[below] ^= rows[j]
+            ops.extend((j, int(i)) for i in below)
+    return ops
+
+
+def pmh_synthesis(parity_matrix, section_size=None):
+    """Synthesize Cnot circuit of a parity matrix with Patel-Markov-Hayes algorithm
+
+    See https://arxiv.org/abs/quant-ph/0302002
+
+    :param parity_matrix: invertible parity matrix
+    :type parity_matrix: ParityMatrix
+    :param section_size: number of columns processed together, :math:`\\log_2(n) / 2` by default
+    :type section_size: int
+    :return: list of Cnot ``(control, target)`` in circuit order
+    :rtype: list
+
+    :raises ValueError: if the matrix is singular
+    """
+    n = parity_matrix.num_qubits
+    if section_size is None:
+        section_size = max(1, int(np.log2(max(n, 2)) / 2))
+    if not parity_matrix.is_invertible():
+        raise ValueError("Parity matrix is singular")
+    work = parity_matrix.copy()
+    lower = _lower_cnot_synthesis(work, section_size)
+    work = work.transpose()
+    upper = _lower_cnot_synthesis(work, section_size)
+    # lower ops reduce the matrix to an upper triangular U, column ops of U^T reduce it to identity
+    return [(t, c) for c, t in upper] + lower[::-1]
+
+
+class _ShortestPaths:
+    """Directed shortest paths in qubit connectivity graph, computed with BFS per source on demand"""
+
+    def __init__(self, qubit_connectivity):
+        adj = np.asarray(qubit_connectivity.connectivity)
+        self._neighbours = [np.flatnonzero(adj[i]).tolist() for i in range(qubit_connectivity.num_qubits)]
+        self._parents = {}
+
+    def path(self, start, end):
+        if start not in self._parents:
+            parents = {start: None}
+            queue = deque([start])
+            while queue:
+                q = queue.popleft()
+                for nb in self._neighbours[q]:
+                    if nb not in parents:
+                        parents[nb] = q
+                        queue.append(nb)
+            self._parents[start] = parents
+        parents = self._parents[start]
+        if end not in parents:
+            raise ValueError(f"Qubit {end} isn't reachable from qubit {start}")
+        path = [end]
+        while path[-1] != start:
+            path.append(parents[path[-1]])
+        return path[::-1]
+
+
+def long_range_cnot(path):
+    """Cnot between the ends of a path of connected qubits, built from :math:`4(k-1)` nearest neighbour Cnots
+
+    :param path: qubits ``[control, ..., target]``, all Cnots are applied along the path direction
+    :type path: list
+    :return: list of Cnot ``(control, target)``
+    :rtype: list
+    """
+    k = len(path) - 1
+    if k == 1:
+        return [tuple(path)]
+    steps = [(path[i], path[i + 1]) for i in range(k)]
+    return steps + steps[k - 2::-1] + steps[1:] + steps[k - 2:0:-1]
+
+
+def route_cnots(cnots, qubit_connectivity):
+    """Replace Cnots between unconnected qubits with Cnot chains along the shortest paths
+
+    :param cnots: list of Cnot ``(control, target)``
+    :type cnots: list
+    :param qubit_connectivity: qubit connectivity
+    :type qubit_connectivity: QubitConnectivity
+    :return: list of Cnot ``(control, target)``
+    :rtype: list
+    """
+    paths = None
+    result = []
+    for c, t in cnots:
+        if qubit_connectivity.check_connection([c, t]):
+            result.append((c, t))
+        else:
+            if paths is None:
+                paths = _ShortestPaths(qubit_connectivity)
+            result.extend(long_range_cnot(paths.path(c, t)))
+    return result
+
+
+def synthesize_cnot_circuit(parity_matrix, qubit_connectivity=None, section_size=None):
+    """Synthesize Cnot circuit of a parity matrix
+
+    :param parity_matrix: invertible parity matrix
+    :type parity_matrix: ParityMatrix
+    :param qubit_connectivity: if given, Cnots between unconnected qubits are replaced by Cnot chains along
+        the shortest paths
+    :type qubit_connectivity: QubitConnectivity
+    :param section_size: PMH section size
+    :type section_size: int
+    :return: list of Cnot ``(control, target)``
+    :rtype: list
+    """
+    cnots = pmh_synthesis(parity_matrix, section_size)
+    if qubit_connectivity is None:
+        return cnots
+    return route_cnots(cnots, qubit_connectivity)
@@ -0,0 +1,148 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+from arline_quantum.gates.gate import Gate
+
+
+class ChainBlock:
+    """Convex block of a gate chain
+
+    Gates of the block can be executed together: no path of the dependency DAG leaves the block and enters it again.
+    Local qubit ``i`` of the block is the qubit ``qubits[i]`` of the gate chain.
+
+    :param indices: indices of the block gates in the gate chain, increasing
+    :type indices: list
+    :param qubits: qubits of the block, increasing
+    :type qubits: list
+    """
+
+    def __init__(self, indices, qubits):
+        self.indices = indices
+        self.qubits = qubits
+
+    @property
+    def remapping_dict(self):
+        """Relabeling of the gate chain qubits to the local qubits ``{q_old: q_new}``"""
+        return {q: i for i, q in enumerate(self.qubits)}
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __eq__(self, other):
+        return isinstance(other, ChainBlock) and self.indices == other.indices and self.qubits == other.qubits
+
+    def __repr__(self):
+        return f"ChainBlock(indices={self.indices}, qubits={self.qubits})"
+
+
+def partition_gate_connections(gate_connections, num_qubits, max_qubits, max_gates=None):
+    """Split gate connections into convex blocks of bounded width
+
+    Blocks are grown one at a time from the per-wire frontier of the not yet placed gates
+    (a gate is ready when it is the first unplaced gate on all its qubits and classical bits).
+    Ready gates acting on the block qubits are added first, then the block is extended with the earliest ready gate
+    which keeps the block within ``max_qubits``. The block is closed when no ready gate fits or it has ``max_gates``
+    gates. Every block is a contiguous part of a topological order, so the blocks are convex and the list of blocks
+    is in topological order. Instructions (barriers, measurements), gates with classical bits and gates wider
+    than ``max_qubits`` form single element blocks.
+
+    :param gate_connections: sequence of :class:`.GateConnection`
+    :type gate_connections: collections.abc.Sequence
+    :param num_qubits: number of qubits
+    :type num_qubits: int
+    :param max_qubits: maximal number of qubits in a block
+    :type max_qubits: int
+    :param max_gates: maximal number of gates in a block, unlimited by default
+    :type max_gates: int
+    :return: list of :class:`ChainBlock`
+    :rtype: list
+    """
+    if max_gates is None:
+        max_gates = len(gate_connections)
+    qubits = []
+    wires = []
+    opaque = []
+    wire_elements = {}  # wire -> element indices, classical bits follow the qubits
+    for i, el in enumerate(gate_connections):
+        el_wires = list(el.connections)
+        el_wires.extend(num_qubits + c for c in el.cregs)
+        qubits.append(el.connections)
+        wires.append(el_wires)
+        opaque.append(bool(el.cregs) or not isinstance(el.gate, Gate) or len(el.connections) > max_qubits)
+        for w in el_wires:
+            wire_elements.setdefault(w, []).append(i)
+
+    # Number of wires where the element isn't the first unplaced one
+    waiting = [len(w) for w in wires]
+    for elements in wire_elements.values():
+        waiting[elements[0]] -= 1
+    position = dict.fromkeys(wire_elements, 0)
+    ready = {i for i, n in enumerate(waiting) if n == 0}
+
+    blocks = []
+    block = []
+    block_qubits = set()
+    inside = []  # ready gates on the block qubits
+
+    def fits_inside(j):
+        return not opaque[j] and block_qubits.issuperset(wires[j])
+
+    while ready:
+        if inside:
+            i = inside.pop()
+        else:
+            i = None
+            if block:
+                best = None
+                for j in ready:
+                    if opaque[j]:
+                        continue
+                    num_new = len(block_qubits.union(wires[j])) - len(block_qubits)
+                    if len(block_qubits) + num_new <= max_qubits and (best is None or (num_new, j) < best):
+                        best = (num_new, j)
+                if best is None:
+                    blocks.append(ChainBlock(sorted(block), sorted(block_qubits)))
+                    block, block_qubits = [], set()
+                    continue
+                i = best[1]
+            else:
+                i = min(ready)
+        ready.remove(i)
+        block.append(i)
+        grown = not block_qubits.issuperset(qubits[i])
+        block_qubits.update(qubits[i])
+
+        for w in wires[i]:
+            elements = wire_elements[w]
+            position[w] += 1
+            if position[w] < len(elements):
+                j = elements[position[w]]
+                waiting[j] -= 1
+                if waiting[j] == 0:
+                    ready.add(j)
+                    if not grown and fits_inside(j):
+                        inside.append(j)
+
+        if opaque[i] or len(block) >= max_gates:
+            blocks.append(ChainBlock(sorted(block), sorted(block_qubits)))
+            block, block_qubits, inside = [], set(), []
+        elif grown:
+            inside = [j for j in ready if fits_inside(j)]
+    if block:
+        blocks.append(ChainBlock(sorted(block), sorted(block_qubits)))
+    return blocks
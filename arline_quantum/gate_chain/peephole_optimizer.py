@@ -0,0 +1,165 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import numpy as np
+
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.gate_connection import GateConnection
+from arline_quantum.gates.gate import Gate
+from arline_quantum.gates.cry import Cry
+from arline_quantum.gates.crx import Crx
+from arline_quantum.gates.crz import Crz
+from arline_quantum.gates.cu1 import Cu1
+from arline_quantum.gates.cz import Cz
+from arline_quantum.gates.identity import I
+from arline_quantum.gates.rx import Rx
+from arline_quantum.gates.ry import Ry
+from arline_quantum.gates.rz import Rz
+from arline_quantum.gates.swap import Swap
+from arline_quantum.gates.u1 import U1
+from arline_quantum.gates.xx import Xx
+from arline_quantum.gates.yy import Yy
+from arline_quantum.gates.zz import Zz
+
+
+# Single angle rotations merged by adding angles, with the period (up to global phase) of the angle
+rotation_periods = {
+    Rx: 2 * np.pi,
+    Ry: 2 * np.pi,
+    Rz: 2 * np.pi,
+    U1: 2 * np.pi,
+    Xx: 2 * np.pi,
+    Yy: 2 * np.pi,
+    Zz: 2 * np.pi,
+    Cu1: 2 * np.pi,
+    Crx: 4 * np.pi,
+    Cry: 4 * np.pi,
+    Crz: 4 * np.pi,
+}
+
+# Gates which can be equal to identity
+identity_checks = set(rotation_periods) | {I}
+
+# Gates invariant under permutation of qubits
+symmetric_gates = {Cz, Swap, Cu1, Xx, Yy, Zz}
+
+
+class PeepholeOptimizer:
+    """Native peephole optimization pass
+
+    Removes adjacent gate / inverse gate pairs (:math:`H H`, :math:`CNOT CNOT`, :math:`T T^\\dagger`, ...),
+    merges consecutive rotations around the same axis (:class:`.Rz`, :class:`.Rx`, :class:`.U1`,
+    :class:`.Zz`, ...) and drops identity-angle gates.
+
+    The pass keeps a per-qubit frontier (stack of surviving gates on every qubit). A gate is compared only with
+    the gates on top of the stacks of its qubits, and a cancellation exposes the previous gates again, so chains
+    of nested cancellations (e.g. :math:`H T T^\\dagger H`) are removed in a single linear pass.
+
+    :param tol: tolerance for identity angles and inverse checks
+    :type tol: float
+    """
+
+    def __init__(self, tol=1e-8):
+        self.tol = tol
+        self._inverse_by_types = {}
+
+    def run(self, gate_chain):
+        """Optimize gate chain
+
+        :param gate_chain: gate chain to optimize
+        :type gate_chain: GateChain
+        :return: optimized gate chain
+        :rtype: GateChain
+        """
+        hw = gate_chain.quantum_hardware
+        nodes = list(gate_chain.chain)
+        alive = [True] * len(nodes)
+        frontier = {}
+
+        for i, el in enumerate(nodes):
+            g, conn = el.gate, el.connections
+            if not isinstance(g, Gate):
+                for q in conn:
+                    frontier.setdefault(q, []).append(i)
+                continue
+            if type(g) in identity_checks and self._is_identity(g):
+                alive[i] = False
+                continue
+
+            # Predecessor acting on the same qubits and adjacent on each of them
+            stacks = [frontier.setdefault(q, []) for q in conn]
+            p = stacks[0][-1] if stacks[0] else None
+            if p is not None:
+                for s in stacks:
+                    if not s or s[-1] != p:
+                        p = None
+                        break
+            if p is not None and isinstance(nodes[p].gate, Gate) and self._same_qubits(nodes[p], el):
+                merged = self._merge(nodes[p].gate, g)
+                if merged is not None:
+                    alive[i] = False
+                    if merged is False or self._is_identity(merged):
+                        alive[p] = False
+                        for s in stacks:
+                            s.pop()
+                    else:
+                        nodes[p] = GateConnection(hw, merged, nodes[p].connections, nodes[p].cregs)
+                    continue
+            for s in stacks:
+                s.append(i)
+
+        new_chain = GateChain(hw)
+        new_chain.qreg_mapping = {k: dict(v) for k, v in gate_chain.qreg_mapping.items()}
+        new_chain.creg_mapping = {k: dict(v) for k, v in gate_chain.creg_mapping.items()}
+        new_chain.chain.extend(el for el, a in zip(nodes, alive) if a)
+        return new_chain
+
+    def _same_qubits(self, el_1, el_2):
+        conn_1, conn_2 = el_1.connections, el_2.connections
+        if len(conn_1) != len(conn_2):
+            return False
+        if list(conn_1) == list(conn_2):
+            return True
+        return type(el_1.gate) is type(el_2.gate) and type(el_1.gate) in symmetric_gates and (
+            sorted(conn_1) == sorted(conn_2)
+        )
+
+    def _merge(self, g_1, g_2):
+        """Return merged gate, False if the gates cancel each other, None if they can't be merged"""
+        t_1, t_2 = type(g_1), type(g_2)
+        if t_1 is t_2 and t_1 in rotation_periods:
+            return t_1(g_1._args[0] + g_2._args[0])
+        if t_1.is_discrete and t_2.is_discrete:
+            try:
+                inverse = self._inverse_by_types[t_1, t_2]
+            except KeyError:
+                prod = g_2._u @ g_1._u
+                inverse = bool(abs(abs(np.trace(prod)) / len(prod) - 1) < self.tol)
+                self._inverse_by_types[t_1, t_2] = inverse
+            if inverse:
+                return False
+        return None
+
+    def _is_identity(self, g):
+        t = type(g)
+        if t is I:
+            return True
+        if t in rotation_periods:
+            period = rotation_periods[t]
+            a = g._args[0] % period
+            return a < self.tol or period - a < self.tol
+        return False
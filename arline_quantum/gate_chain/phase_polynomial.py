@@ -0,0 +1,264 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import numpy as np
+
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.gate_connection import GateConnection
+from arline_quantum.gates.cnot import Cnot
+from arline_quantum.gates.rz import Rz
+from arline_quantum.gates.s import S, Sd
+from arline_quantum.gates.t import T, Td
+from arline_quantum.gates.u1 import U1
+from arline_quantum.gates.x import X
+from arline_quantum.gates.z import Z
+
+
+# Diagonal gates diag(1, exp(i * angle)), angle is None for gates with angle argument
+phase_gate_angles = {
+    T: np.pi / 4,
+    Td: -np.pi / 4,
+    S: np.pi / 2,
+    Sd: -np.pi / 2,
+    Z: np.pi,
+    Rz: None,
+    U1: None,
+}
+
+# Clifford+T gates for multiples of pi / 4
+_phase_gates_by_eighths = [[], [T], [S], [S, T], [Z], [Z, T], [Sd], [Td]]
+
+
+def phase_gates(angle, tol=1e-8):
+    """Return gates implementing diag(1, exp(i * angle)), Clifford+T gates are used for multiples of pi / 4
+
+    :param angle: angle in radians
+    :type angle: float
+    :param tol: tolerance
+    :type tol: float
+    :return: list of gates
+    :rtype: list
+    """
+    eighths = angle / (np.pi / 4)
+    k = round(eighths)
+    if abs(eighths - k) < tol:
+        return [g() for g in _phase_gates_by_eighths[k % 8]]
+    return [Rz(angle)]
+
+
+def _phase_angle(gate):
+    angle = phase_gate_angles[type(gate)]
+    return gate.args[0] if angle is None else angle
+
+
+class PhasePolynomial:
+    """Phase polynomial of a circuit of Cnot, X and diagonal phase gates
+
+    The circuit acts as :math:`|x\\rangle \\to e^{i \\sum_f \\theta_f f(x)} |A x \\oplus b\\rangle`, where :math:`f`
+    are parities of input bits. Parities are stored as integer bit masks (rows of the Cnot parity matrix),
+    so terms with identical parity are merged through a dictionary lookup.
+
+    Other gates are applied by :meth:`reset_qubits`, which replaces the parities of their qubits by fresh path
+    variables. Variables are compacted when there are too many of them (see :attr:`max_extra_variables`),
+    so the masks stay bounded: parities are rewritten in a basis of the span of the qubit parities, and terms
+    outside of the span, which can't be merged anymore, are closed.
+
+    :param num_qubits: number of qubits
+    :type num_qubits: int
+
+    :ivar list angles: total angle of every term, in the order of the first occurrence
+    :ivar list parities: output parity mask of every qubit
+    :ivar list affine: output affine bit of every qubit
+    :ivar int num_variables: number of variables
+    """
+
+    max_extra_variables = 64  #: variables are compacted when there are more than ``2 * num_qubits`` + this
+
+    def __init__(self, num_qubits):
+        self.num_qubits = num_qubits
+        self.angles = []
+        self.parities = [1 << q for q in range(num_qubits)]
+        self.affine = [0] * num_qubits
+        self.num_variables = num_qubits
+        self._term_indices = {}  # parity mask -> index in angles, open terms only
+
+    @classmethod
+    def from_gate_chain(cls, gate_chain):
+        """Create phase polynomial of a gate chain
+
+        :param gate_chain: gate chain of Cnot, X and phase gates
+        :type gate_chain: GateChain
+        :rtype: PhasePolynomial
+
+        :raises ValueError: when the gate chain contains other gates
+        """
+        polynomial = cls(gate_chain.quantum_hardware.num_qubits)
+        for el in gate_chain.chain:
+            polynomial.apply_gate(el.gate, el.connections)
+        return polynomial
+
+    @property
+    def terms(self):
+        """Parity mask -> angle of the terms which can be merged with further phase gates
+
+        :rtype: dict
+        """
+        return {p: self.angles[i] for p, i in self._term_indices.items()}
+
+    @staticmethod
+    def supports(gate):
+        """Check if the gate is Cnot, X or phase gate"""
+        gate_class = type(gate)
+        return gate_class is Cnot or gate_class is X or gate_class in phase_gate_angles
+
+    def apply_gate(self, gate, connections):
+        """Apply gate at the end of the circuit
+
+        :return: index of the term in :attr:`angles` for phase gates, None for Cnot and X
+        :rtype: int
+
+        :raises ValueError: when the gate isn't Cnot, X or phase gate
+        """
+        gate_class = type(gate)
+        if gate_class is Cnot:
+            c, t = connections
+            self.parities[t] ^= self.parities[c]
+            self.affine[t] ^= self.affine[c]
+        elif gate_class is X:
+            self.affine[connections[0]] ^= 1
+        elif gate_class in phase_gate_angles:
+            q = connections[0]
+            angle = _phase_angle(gate)
+            # exp(i angle (1 - f)) = exp(i angle) exp(-i angle f)
+            return self.add_term(self.parities[q], -angle if self.affine[q] else angle)
+        else:
+            raise ValueError(f"Gate {gate.name} isn't supported by phase polynomial")
+        return None
+
+    def add_term(self, parity, angle):
+        """Add angle to the term with the parity
+
+        :return: index of the term in :attr:`angles`
+        :rtype: int
+        """
+        index = self._term_indices.get(parity)
+        if index is None:
+            index = self._term_indices[parity] = len(self.angles)
+            self.angles.append(angle)
+        else:
+            self.angles[index] += angle
+        return index
+
+    def reset_qubits(self, qubits):
+        """Replace parities of the qubits by fresh variables, e.g. after a gate which isn't a phase polynomial gate"""
+        for q in qubits:
+            self.parities[q] = 1 << self.num_variables
+            self.affine[q] = 0
+            self.num_variables += 1
+        if self.num_variables > 2 * self.num_qubits + self.max_extra_variables:
+            self._compact()
+
+    def _compact(self):
+        # Gaussian elimination over GF(2): basis vectors are reduced by the previous ones, pivot is the highest bit
+        basis = []  # (pivot bit, basis vector, new variable mask)
+
+        def reduce(v):
+            mask = 0
+            for pivot, b, e in basis:
+                if (v >> pivot) & 1:
+                    v ^= b
+                    mask ^= e
+            return v, mask
+
+        parities = []
+        for p in self.parities:
+            v, mask = reduce(p)
+            if v:
+                e = 1 << len(basis)
+                basis.append((v.bit_length() - 1, v, e))
+                mask ^= e
+            parities.append(mask)
+        term_indices = {}
+        for p, index in self._term_indices.items():
+            v, mask = reduce(p)
+            if not v:
+                term_indices[mask] = index
+        self.parities = parities
+        self.num_variables = len(basis)
+        self._term_indices = term_indices
+
+    def parity_matrix(self):
+        """Return output Cnot parity matrix as int64 array"""
+        return np.array([[(p >> j) & 1 for j in range(self.num_qubits)] for p in self.parities], dtype=np.int64)
+
+
+class PhaseFoldingOptimizer:
+    """T-count reduction by phase folding
+
+    Every qubit carries a parity of path variables tracked by :class:`PhasePolynomial`. Gates other than Cnot, X
+    and phase gates (:data:`phase_gate_angles`) replace the parities of their qubits by fresh variables.
+    Phase gates applied to identical parities are merged (dictionary indexed by the parity mask):
+    the total angle is placed at the first occurrence as Clifford+T gates and the other occurrences are removed.
+    The pass is linear in the number of gates up to the periodic variable compaction.
+
+    :param tol: tolerance for zero angles and multiples of :math:`\\pi / 4`
+    :type tol: float
+    """
+
+    def __init__(self, tol=1e-8):
+        self.tol = tol
+
+    def run(self, gate_chain):
+        """Optimize gate chain
+
+        :param gate_chain: gate chain to optimize
+        :type gate_chain: GateChain
+        :return: optimized gate chain
+        :rtype: GateChain
+        """
+        hw = gate_chain.quantum_hardware
+        polynomial = PhasePolynomial(hw.num_qubits)
+        out = []  # GateConnection or index of a merged phase term
+        first_occurrences = []  # (qubit, affine bit) of every term
+        for el in gate_chain.chain:
+            g, conn = el.gate, el.connections
+            if el.cregs or not polynomial.supports(g):
+                polynomial.reset_qubits(conn)
+                out.append(el)
+                continue
+            affine_bit = polynomial.affine[conn[0]]
+            term = polynomial.apply_gate(g, conn)
+            if term is None:
+                out.append(el)
+            elif term == len(first_occurrences):
+                first_occurrences.append((conn[0], affine_bit))
+                out.append(term)
+
+        new_chain = GateChain(hw)
+        new_chain.qreg_mapping = {k: dict(v) for k, v in gate_chain.qreg_mapping.items()}
+        new_chain.creg_mapping = {k: dict(v) for k, v in gate_chain.creg_mapping.items()}
+        for el in out:
+            if isinstance(el, GateConnection):
+                new_chain.chain.append(el)
+                continue
+            angle = polynomial.angles[el]
+            q, affine_bit = first_occurrences[el]
+            if affine_bit:
+                angle = -angle
+            for g in phase_gates(angle, self.tol):
+                new_chain.chain.append(GateConnection(hw, g, [q], []))
+        return new_chain
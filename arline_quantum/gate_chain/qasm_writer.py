@@ -0,0 +1,136 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from functools import lru_cache
+
+from arline_quantum.gates.gate import Gate
+from arline_quantum.gates.measure import Measure
+
+
+@lru_cache(maxsize=1 << 16)
+def format_angle(angle):
+    """Format angle as in :meth:`.Gate.to_qasm` (decimal representation), cached
+
+    :param angle: angle in radians
+    :type angle: float
+    :rtype: str
+    """
+    return Gate.format_args(angle, representation="decimal")[0]
+
+
+class _Template:
+    """QASM prefix of a gate class: static string or gate name followed by formatted angles"""
+
+    __slots__ = ("prefix", "with_args")
+
+    def __init__(self, prefix, with_args):
+        self.prefix = prefix
+        self.with_args = with_args
+
+
+def _make_template(gate):
+    qasm = gate.to_qasm()
+    args = getattr(gate, "args", ())
+    if not args:
+        return _Template(qasm, False)
+    name = qasm.split("(", 1)[0]
+    if qasm == name + "(" + ",".join(format_angle(a) for a in args) + ")":
+        return _Template(name + "(", True)
+    # Custom formatting, call to_qasm for every gate
+    return None
+
+
+class QasmWriter:
+    """Streaming OPENQASM 2.0 writer of gate chains
+
+    The output is identical to :meth:`.GateChain.to_qasm`. Gate prefixes are computed once per gate class,
+    angles are formatted with the cached :func:`format_angle` and lines are written to the file object in chunks.
+
+    :param qreg_name: quantum register name
+    :type qreg_name: str
+    :param creg_name: classical register name
+    :type creg_name: str
+    :param chunk_size: number of lines per write call
+    :type chunk_size: int
+    """
+
+    def __init__(self, qreg_name="q", creg_name="c", chunk_size=4096):
+        self.qreg_name = qreg_name
+        self.creg_name = creg_name
+        self.chunk_size = chunk_size
+        self._templates = {}
+
+    def header(self, num_qubits):
+        return (
+            "// Copyright (c) 2019 Turation Ltd\n"
+            "\n"
+            "OPENQASM 2.0;\n"
+            'include "qelib1.inc";\n'
+            "\n"
+            f"qreg {self.qreg_name}[{num_qubits}];\n"
+            f"creg {self.creg_name}[{num_qubits}];\n"
+        )
+
+    def lines(self, gate_chain):
+        """Generate QASM lines of the gate chain operations (without line breaks)"""
+        qreg_name, creg_name = self.qreg_name, self.creg_name
+        templates = self._templates
+        operands = {}  # connections -> qubit operands string
+        for el in gate_chain.chain:
+            gate = el.gate
+            conn = el.connections
+            if isinstance(gate, Measure):
+                yield f"{gate.to_qasm()} {qreg_name}[{conn[0]}] -> {creg_name}[{el.cregs[0]}];"
+                continue
+            gate_class = type(gate)
+            try:
+                template = templates[gate_class]
+            except KeyError:
+                template = templates[gate_class] = _make_template(gate)
+            if template is None:
+                prefix = gate.to_qasm()
+            elif template.with_args:
+                prefix = template.prefix + ",".join([format_angle(a) for a in gate.args]) + ")"
+            else:
+                prefix = template.prefix
+            key = tuple(conn)
+            try:
+                qubits = operands[key]
+            except KeyError:
+                qubits = operands[key] = " " + ", ".join([f"{qreg_name}[{q}]" for q in conn]) + ";"
+            yield prefix + qubits
+
+    def write(self, gate_chain, file):
+        """Write gate chain to a text file object
+
+        :param gate_chain: gate chain
+        :type gate_chain: GateChain
+        :param file: text file object
+        """
+        file.write(self.header(gate_chain.quantum_hardware.num_qubits))
+        if not gate_chain.chain:
+            file.write("\n")
+            return
+        chunk = []
+        for line in self.lines(gate_chain):
+            chunk.append(line)
+            if len(chunk) == self.chunk_size:
+                chunk.append("")
+                file.write("\n".join(chunk))
+                chunk = []
+        chunk.append("")
+        file.write("\n".join(chunk))
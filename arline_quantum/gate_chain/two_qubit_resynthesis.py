@@ -0,0 +1,453 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+from itertools import permutations, repeat
+
+import numpy as np
+
+from arline_quantum.estimators.estimators import TwoQubitGateCountCostFunction
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.gate_connection import GateConnection
+from arline_quantum.gate_chain.one_qubit_resynthesis import (
+    euler_angles_u3,
+    one_qubit_basis,
+    resynthesize_one_qubit_runs,
+)
+from arline_quantum.gates.cnot import Cnot
+from arline_quantum.gates.cz import Cz
+from arline_quantum.gates.gate import Gate
+from arline_quantum.gates.u3 import U3
+from arline_quantum.gates.xx import Xx
+
+# Two qubit matrices use the order of GateChain.matrix: local qubit 0 is the least significant one,
+# single qubit gates a0 on qubit 0 and a1 on qubit 1 give np.kron(a1, a0)
+_SWAP = np.eye(4)[[0, 2, 1, 3]].astype(complex)
+_CNOT01 = np.eye(4)[:, [0, 3, 2, 1]].astype(complex)  # control 0, target 1
+_CNOT10 = np.eye(4)[:, [0, 1, 3, 2]].astype(complex)  # control 1, target 0
+
+# Local unitaries are real orthogonal matrices in the magic basis
+_MAGIC = np.array([[1, 0, 0, 1j], [0, 1j, 1, 0], [0, 1j, -1, 0], [1, 0, 0, -1j]]) / np.sqrt(2)
+_MAGIC_DAGGER = _MAGIC.conj().T
+
+_PERMUTATIONS = np.array(list(permutations(range(4))))
+_DIAGONALIZATION_COEFFS = (0.7071067811865476, -1.6180339887498949, 0.31622776601683794, 2.23606797749979)
+
+#: Two qubit gates which can replace Cnot in the resynthesized blocks
+entangler_gates = {Cnot: Cnot, Cz: Cz, Xx: lambda: Xx(np.pi / 2)}
+
+
+def _kron(a0, a1):
+    """Batched two qubit local matrices of single qubit matrices on qubits 0 and 1"""
+    return np.einsum("nij,nkl->nikjl", a1, a0).reshape(-1, 4, 4)
+
+
+def _rotations(pauli, angles):
+    """Batched rotations :math:`\\exp(-i \\theta P / 2)`"""
+    angles = np.asarray(angles, dtype=float)[:, None, None]
+    return np.cos(angles / 2) * np.eye(2) - 1j * np.sin(angles / 2) * pauli
+
+
+_X = np.array([[0, 1], [1, 0]], dtype=complex)
+_Y = np.array([[0, -1j], [1j, 0]])
+_Z = np.diag([1, -1]).astype(complex)
+
+
+def two_qubit_gate_matrix(gate, connections):
+    """Matrix of a gate on local qubits ``[0]``, ``[1]``, ``[0, 1]`` or ``[1, 0]``"""
+    u = np.asarray(gate._u, dtype=complex)
+    if gate.num_qubits == 1:
+        return np.kron(np.eye(2), u) if connections[0] == 0 else np.kron(u, np.eye(2))
+    # Gate matrices have the first qubit as the most significant one
+    return _SWAP @ u @ _SWAP if connections[0] == 0 else u
+
+
+def _su4(mats):
+    return mats / np.linalg.det(mats)[:, None, None] ** 0.25
+
+
+def _real_eigenbasis(mats):
+    """Real orthogonal eigenvectors (determinant 1) and eigenvalues of complex symmetric unitaries
+
+    Real and imaginary parts of the matrices commute, they are diagonalized together through a real combination.
+    """
+    n = len(mats)
+    vectors = np.empty(mats.shape, dtype=float)
+    todo = np.arange(n)
+    for coeff in _DIAGONALIZATION_COEFFS:
+        m = mats[todo]
+        _, vecs = np.linalg.eigh(m.real + coeff * m.imag)
+        d = np.swapaxes(vecs, 1, 2) @ m @ vecs
+        off_diagonal = np.abs(d - d * np.eye(4)).max(axis=(1, 2))
+        ok = off_diagonal < 1e-7
+        vectors[todo[ok]] = vecs[ok]
+        todo = todo[~ok]
+        if len(todo) == 0:
+            break
+    else:
+        raise ValueError("Failed to diagonalize magic basis matrices")
+    vectors[np.linalg.det(vectors) < 0, :, 0] *= -1
+    eigenvalues = np.einsum("nji,njk,nki->ni", vectors, mats, vectors)
+    return vectors, eigenvalues
+
+
+def _magic_square(mats):
+    """:math:`U_B^T U_B` of SU(4) matrices in the magic basis and the matrices :math:`U_B`"""
+    up = _MAGIC_DAGGER @ _su4(mats) @ _MAGIC
+    return np.swapaxes(up, 1, 2) @ up, up
+
+
+def weyl_coordinates(mats):
+    """Coordinates :math:`(a, b, c)` of two qubit unitaries :math:`U = k_1 e^{i(a XX + b YY + c ZZ)} k_2`
+
+    :math:`k_1` and :math:`k_2` are local unitaries. Coordinates are defined up to permutations,
+    sign changes of two coordinates and shifts by :math:`\\pi / 2`.
+
+    :param mats: array of unitaries, shape (N, 4, 4)
+    :type mats: np.array
+    :return: coordinates, shape (N, 3)
+    :rtype: np.array
+    """
+    mats = np.asarray(mats, dtype=complex)
+    square, _ = _magic_square(mats)
+    # Eigenvalues of the square are exp(2i theta_k), theta = (a - b + c, -a + b + c, a + b - c, -a - b - c)
+    theta = np.sort(np.angle(np.linalg.eigvals(square)) / 2, axis=1)
+    # theta_k are defined mod pi, choose them with zero sum
+    shifts = np.rint(theta.sum(axis=1) / np.pi).astype(int)
+    for k in range(4):
+        theta[shifts > k, 3 - k] -= np.pi
+        theta[shifts < -k, k] += np.pi
+    return np.stack(
+        [(theta[:, 0] + theta[:, 2]) / 2, (theta[:, 1] + theta[:, 2]) / 2, (theta[:, 0] + theta[:, 1]) / 2], axis=1
+    )
+
+
+def _reduced_coordinates(coordinates):
+    """Coordinates shifted by multiples of :math:`\\pi / 2` to :math:`[-\\pi / 4, \\pi / 4)`"""
+    return (coordinates + np.pi / 4) % (np.pi / 2) - np.pi / 4
+
+
+def num_cnots(mats, tol=1e-8):
+    """Minimal number of Cnot gates implementing two qubit unitaries
+
+    :param mats: array of unitaries, shape (N, 4, 4)
+    :type mats: np.array
+    :param tol: tolerance of the coordinates
+    :type tol: float
+    :return: int array of shape (N,), values 0 ... 3
+    :rtype: np.array
+    """
+    reduced = np.abs(_reduced_coordinates(weyl_coordinates(mats)))
+    zero = reduced < tol
+    quarter = np.abs(reduced - np.pi / 4) < tol
+    counts = np.full(len(reduced), 3)
+    counts[zero.any(axis=1)] = 2
+    counts[(zero.sum(axis=1) == 2) & quarter.any(axis=1)] = 1
+    counts[zero.all(axis=1)] = 0
+    return counts
+
+
+def _local_equivalence(mats, targets):
+    """Local unitaries :math:`k_1, k_2` such that :math:`U = k_1 T k_2` up to global phase
+
+    ``mats`` and ``targets`` should have equal Weyl coordinates.
+    """
+    square_u, up = _magic_square(mats)
+    square_t, tp = _magic_square(targets)
+    vectors_u, values_u = _real_eigenbasis(square_u)
+    vectors_t, values_t = _real_eigenbasis(square_t)
+
+    # SU(4) matrices are defined up to the factor i^k, match the spectra up to the sign and the order
+    candidates = values_t[:, _PERMUTATIONS]
+    costs = np.stack(
+        [np.abs(s * values_u[:, None, :] - candidates).sum(axis=2) for s in (1, -1)], axis=1
+    ).reshape(len(mats), -1)
+    best = costs.argmin(axis=1)
+    negate = best >= len(_PERMUTATIONS)
+    up[negate] *= 1j
+    order = _PERMUTATIONS[best % len(_PERMUTATIONS)]
+    vectors_t = np.take_along_axis(vectors_t, order[:, None, :], axis=2)
+    vectors_t[np.linalg.det(vectors_t) < 0, :, 0] *= -1
+
+    # (U_B O)^T (U_B O) = T_B^T T_B, so Q = U_B O T_B^-1 is real orthogonal and U_B = Q T_B O^T
+    orthogonal = vectors_u @ np.swapaxes(vectors_t, 1, 2)
+    q = (up @ orthogonal @ np.swapaxes(tp.conj(), 1, 2)).real
+    k1 = _MAGIC @ q @ _MAGIC_DAGGER
+    k2 = _MAGIC @ np.swapaxes(orthogonal, 1, 2) @ _MAGIC_DAGGER
+    return k1, k2
+
+
+def _local_factors(mats):
+    """Single qubit factors ``a0, a1`` of local two qubit unitaries ``np.kron(a1, a0)``"""
+    n = len(mats)
+    rearranged = mats.reshape(n, 2, 2, 2, 2).transpose(0, 1, 3, 2, 4).reshape(n, 4, 4)
+    u, s, vh = np.linalg.svd(rearranged)
+    scale = np.sqrt(s[:, 0])[:, None]
+    return (scale * vh[:, 0, :]).reshape(n, 2, 2), (scale * u[:, :, 0]).reshape(n, 2, 2)
+
+
+def _templates(mats, counts, tol):
+    """Circuits of Cnots and single qubit rotations with the Weyl coordinates of the unitaries
+
+    :return: dict count -> (indices, template matrices, steps), steps are in time order,
+        "cnot01" or "cnot10" for Cnots and arrays of local two qubit matrices
+    """
+    coordinates = weyl_coordinates(mats)
+    templates = {}
+    for count in range(4):
+        indices = np.flatnonzero(counts == count)
+        if len(indices) == 0:
+            continue
+        n = len(indices)
+        if count == 0:
+            steps = []
+        elif count == 1:
+            steps = ["cnot01"]
+        elif count == 2:
+            # exp(i (x XX + z ZZ)) = Cnot01 (Rx(-2x) x Rz(-2z)) Cnot01
+            reduced = _reduced_coordinates(coordinates[indices])
+            others = np.argsort(np.abs(reduced), axis=1)[:, 1:]
+            x, z = np.take_along_axis(reduced, others, axis=1).T
+            steps = ["cnot01", _kron(_rotations(_X, -2 * x), _rotations(_Z, -2 * z)), "cnot01"]
+        else:
+            # Vatan-Williams circuit, https://arxiv.org/abs/quant-ph/0308006
+            a, b, c = coordinates[indices].T
+            first = _kron(np.tile(np.eye(2, dtype=complex), (n, 1, 1)), _rotations(_Y, np.pi / 2 - 2 * b))
+            second = _kron(_rotations(_Z, 2 * c - np.pi / 2), _rotations(_Y, np.pi / 2 - 2 * a))
+            steps = ["cnot10", first, "cnot01", second, "cnot10"]
+        matrices = np.tile(np.eye(4, dtype=complex), (n, 1, 1))
+        for step in steps:
+            if isinstance(step, str):
+                matrices = (_CNOT01 if step == "cnot01" else _CNOT10) @ matrices
+            else:
+                matrices = step @ matrices
+        templates[count] = (indices, matrices, steps)
+    return templates
+
+
+_entangler_locals = {}  # entangler class -> {"cnot01": (k1, k2), "cnot10": (k1, k2)}
+
+
+def _cnot_locals(entangler):
+    """Local unitaries expressing Cnots through the entangler on qubits ``[0, 1]``"""
+    try:
+        return _entangler_locals[entangler]
+    except KeyError:
+        e = two_qubit_gate_matrix(entangler_gates[entangler](), [0, 1])[None]
+        result = {name: _local_equivalence(cnot[None], e) for name, cnot in [("cnot01", _CNOT01), ("cnot10", _CNOT10)]}
+        _entangler_locals[entangler] = result
+        return result
+
+
+def two_qubit_decompose(mats, entangler=Cnot, tol=1e-8):
+    """Decompose two qubit unitaries with the minimal number of entangling gates
+
+    The unitaries are classified by their Weyl coordinates (:func:`num_cnots`) and matched
+    to template circuits by the KAK decomposition :math:`U = k_1 T k_2`, all steps are batched over the unitaries.
+    Single qubit gates are returned as :class:`.U3`, consecutive single qubit gates are merged.
+
+    :param mats: array of unitaries, shape (N, 4, 4), see :func:`two_qubit_gate_matrix` for the qubit order
+    :type mats: np.array
+    :param entangler: entangling gate class, key of :data:`entangler_gates`
+    :type entangler: type
+    :param tol: tolerance of the Weyl coordinates
+    :type tol: float
+    :return: for every unitary list of (gate, connections) on local qubits 0 and 1
+    :rtype: list
+    """
+    mats = np.asarray(mats, dtype=complex)
+    cnot_locals = _cnot_locals(entangler)
+    make_entangler = entangler_gates[entangler]
+    results = [None] * len(mats)
+    for indices, matrices, steps in _templates(mats, num_cnots(mats, tol), tol).values():
+        n = len(indices)
+        k1, k2 = _local_equivalence(mats[indices], matrices)
+        # Time ordered local layers between the entangling gates
+        layers = [k2]
+        for step in steps + [k1]:
+            if isinstance(step, str):
+                e1, e2 = cnot_locals[step]
+                layers[-1] = e2 @ layers[-1]
+                layers.append(np.broadcast_to(e1, (n, 4, 4)))
+            else:
+                layers[-1] = step @ layers[-1]
+        factors = [_local_factors(layer) for layer in layers]
+        angles = [[np.stack(a, axis=1).tolist() for a in (euler_angles_u3(a0)[:3], euler_angles_u3(a1)[:3])]
+                  for a0, a1 in factors]
+        for k, i in enumerate(indices):
+            ops = []
+            for layer, (angles0, angles1) in enumerate(angles):
+                if layer:
+                    ops.append((make_entangler(), [0, 1]))
+                ops.append((U3(*angles0[k]), [0]))
+                ops.append((U3(*angles1[k]), [1]))
+            results[i] = ops
+    return results
+
+
+def collect_two_qubit_blocks(gate_connections):
+    """Collect maximal two qubit blocks
+
+    A block is started by a two qubit gate together with the preceding single qubit gates on its qubits,
+    later gates acting only on the block qubits are added while the block is open on their qubits.
+    Instructions, gates with classical bits and gates on more than two qubits close the blocks on their qubits.
+    Every block can be placed at the position of its first two qubit gate.
+
+    :param gate_connections: sequence of :class:`.GateConnection`
+    :type gate_connections: collections.abc.Sequence
+    :return: output sequence and blocks, the output contains gate connections and block indices,
+        a block is a tuple of its qubits and a list of gate connections
+    :rtype: tuple
+    """
+    out = []
+    blocks = []
+    open_blocks = {}  # qubit -> block index
+    pending = {}  # qubit -> single qubit gates, which aren't in a block yet
+
+    def close(q):
+        open_blocks.pop(q, None)
+        out.extend(pending.pop(q, []))
+
+    for el in gate_connections:
+        conn = el.connections
+        if not isinstance(el.gate, Gate) or el.cregs or len(conn) > 2:
+            for q in conn:
+                close(q)
+            out.append(el)
+        elif len(conn) == 1:
+            q = conn[0]
+            if q in open_blocks:
+                blocks[open_blocks[q]][1].append(el)
+            else:
+                pending.setdefault(q, []).append(el)
+        else:
+            q0, q1 = conn
+            b = open_blocks.get(q0)
+            if b is not None and open_blocks.get(q1) == b:
+                blocks[b][1].append(el)
+                continue
+            open_blocks.pop(q0, None)
+            open_blocks.pop(q1, None)
+            qubits = sorted(conn)
+            block = pending.pop(qubits[0], []) + pending.pop(qubits[1], []) + [el]
+            open_blocks[q0] = open_blocks[q1] = len(blocks)
+            out.append(len(blocks))
+            blocks.append((qubits, block))
+    for q in list(pending):
+        close(q)
+    return out, blocks
+
+
+def two_qubit_block_matrices(blocks):
+    """Unitaries of two qubit blocks, batched over the blocks
+
+    :param blocks: blocks of :func:`collect_two_qubit_blocks`
+    :type blocks: list
+    :return: array of shape (N, 4, 4), local qubit ``i`` is ``qubits[i]`` of the block
+    :rtype: np.array
+    """
+    lengths = np.array([len(gates) for _, gates in blocks])
+    mats = np.tile(np.eye(4, dtype=complex), (len(blocks), 1, 1))
+    for k in range(lengths.max(initial=0)):
+        sel = np.flatnonzero(lengths > k)
+        gates = []
+        for i in sel:
+            qubits, block = blocks[i]
+            el = block[k]
+            gates.append(two_qubit_gate_matrix(el.gate, [qubits.index(q) for q in el.connections]))
+        mats[sel] = np.array(gates) @ mats[sel]
+    return mats
+
+
+class TwoQubitResynthesisOptimizer:
+    """Resynthesis of two qubit blocks with the minimal number of entangling gates
+
+    Maximal two qubit blocks are collected by :func:`collect_two_qubit_blocks`, their unitaries are decomposed
+    by :func:`two_qubit_decompose` with Cnot, Cz or Xx gates. A block is replaced if the resynthesized block
+    is cheaper under the estimator and its gates respect the qubit connectivity.
+
+    :param entangler: entangling gate class (Cnot, Cz or Xx), by default the first one in the hardware gate set,
+        Cnot if the gate set doesn't contain them
+    :type entangler: type
+    :param estimator: estimator of the block cost, number of two qubit gates by default
+    :type estimator: Estimator
+    :param basis: single qubit basis, key of :data:`.one_qubit_bases`, by default chosen by the hardware gate set
+    :type basis: str
+    :param tol: tolerance of the Weyl coordinates and single qubit angles
+    :type tol: float
+    :param executor: ``concurrent.futures`` executor to decompose chunks of blocks in parallel
+    :type executor: concurrent.futures.Executor
+    :param chunk_size: number of blocks decomposed in a batch by the executor
+    :type chunk_size: int
+    """
+
+    def __init__(self, entangler=None, estimator=None, basis=None, tol=1e-8, executor=None, chunk_size=1024):
+        self.entangler = entangler
+        self.estimator = estimator if estimator is not None else TwoQubitGateCountCostFunction()
+        self.basis = basis
+        self.tol = tol
+        self.executor = executor
+        self.chunk_size = chunk_size
+
+    def run(self, gate_chain):
+        """Optimize gate chain
+
+        :param gate_chain: gate chain to optimize
+        :type gate_chain: GateChain
+        :return: optimized gate chain
+        :rtype: GateChain
+        """
+        hw = gate_chain.quantum_hardware
+        gate_classes = hw.gate_set.gate_list
+        entangler = self.entangler
+        if entangler is None:
+            entangler = next((g for g in entangler_gates if g in gate_classes), Cnot)
+        basis = self.basis or one_qubit_basis(gate_classes) or "u3"
+
+        out, blocks = collect_two_qubit_blocks(gate_chain.chain)
+        decompositions = []
+        if blocks:
+            mats = two_qubit_block_matrices(blocks)
+            chunks = [mats[i: i + self.chunk_size] for i in range(0, len(mats), self.chunk_size)]
+            args = (chunks, repeat(entangler), repeat(self.tol))
+            mapper = map if self.executor is None else self.executor.map
+            for result in mapper(two_qubit_decompose, *args):
+                decompositions.extend(result)
+
+        connectivity = hw.qubit_connectivity
+        new_chain = GateChain(hw)
+        new_chain.qreg_mapping = {k: dict(v) for k, v in gate_chain.qreg_mapping.items()}
+        new_chain.creg_mapping = {k: dict(v) for k, v in gate_chain.creg_mapping.items()}
+        for el in out:
+            if isinstance(el, GateConnection):
+                new_chain.chain.append(el)
+                continue
+            qubits, block = blocks[el]
+            ops = [(g, [qubits[q] for q in conn], []) for g, conn in decompositions[el]]
+            ops = resynthesize_one_qubit_runs(ops, basis, self.tol)
+            new_block = [GateConnection(hw, g, conn, cregs) for g, conn, cregs in ops]
+            if all(connectivity.check_connection(c.connections) for c in new_block) and self._cost(
+                hw, new_block
+            ) < self._cost(hw, block):
+                block = new_block
+            new_chain.chain.extend(block)
+        return new_chain
+
+    def _cost(self, hw, block):
+        block_chain = GateChain(hw)
+        block_chain.chain.extend(block)
+        return self.estimator.calculate_cost(block_chain)
@@ -15,6 +15,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
+from collections import OrderedDict
 from copy import copy
 
 from arline_quantum.gates import gate_by_name, qasm_gate_table
@@ -31,17 +32,74 @@ class GateSet:
     :type name: str
     """
 
+    #: Maximal number of discrete gate classes kept by :meth:`discrete_variant`
+    max_discrete_variants = 256
+
     def __init__(self, name, gate_list):
         self.gate_list = gate_list
         self.name = name
+        self._discrete_variants = OrderedDict()
+
+    @property
+    def gate_list(self):
+        return self._gate_list
+
+    @gate_list.setter
+    def gate_list(self, gate_list):
+        self._gate_list = gate_list
+        self._invalidate_indexes()
+
+    def _invalidate_indexes(self):
+        self._gates_by_name = None
+        self._gates_by_qasm_name = None
+        self._supported_classes = {}
+        self._indexed_gates = None
+
+    def _update_indexes(self):
+        # Indexes are keyed by the gate classes, so any in-place edit of ``gate_list`` is detected
+        gates = tuple(self._gate_list)
+        if self._indexed_gates == gates:
+            return
+        self._invalidate_indexes()
+        self._gates_by_name = {g.__name__: g for g in gates}
+        gate_classes = set(gates)
+        self._gates_by_qasm_name = {name: g for name, g in qasm_gate_table.items() if g in gate_classes}
+        self._indexed_gates = gates
 
     @property
     def gates_by_name(self):
-        return {g.__name__: g for g in self.gate_list}
+        """Cached dictionary gate name -> gate class, should not be modified
+
+        :rtype: dict
+        """
+        self._update_indexes()
+        return self._gates_by_name
 
     @property
     def gates_by_qasm_name(self):
-        return {name: g for name, g in qasm_gate_table.items() if g in self.gate_list}
+        """Cached dictionary QASM gate name -> gate class, should not be modified
+
+        :rtype: dict
+        """
+        self._update_indexes()
+        return self._gates_by_qasm_name
+
+    def supports_gate_class(self, gate_class):
+        """Check if gates of the class belong to the gate set (the class is a gate set class or its subclass)
+
+        Results are cached per class, so the check is a dictionary lookup.
+
+        :param gate_class: gate class
+        :type gate_class: type
+        :rtype: bool
+        """
+        self._update_indexes()
+        try:
+            return self._supported_classes[gate_class]
+        except KeyError:
+            supported = any(issubclass(gate_class, g) for g in self._gate_list)
+            self._supported_classes[gate_class] = supported
+            return supported
 
     def gate_by_name(self, gate_name):
         """
@@ -85,10 +143,39 @@ class GateSet:
             return self
         else:
             new_gate_set = copy(self)
+            new_gate_set._discrete_variants = OrderedDict(self._discrete_variants)
             new_gate_set.name = self.name + "_strip_{}".format(num_qubits)
             new_gate_set.gate_list = [g for g in self.gate_list if g.num_qubits <= num_qubits]
             return new_gate_set
 
+    def discrete_variant(self, gate_class, *args):
+        """Discrete gate class of a continuous gate of the gate set with fixed args
+
+        Classes are created with :meth:`.Gate.make_discrete`, so the same args give the same class.
+        The gate set keeps the last :attr:`max_discrete_variants` requested classes.
+
+        :param gate_class: continuous gate class of the gate set
+        :type gate_class: type
+        :return: discrete gate class
+        :rtype: type
+        """
+        if gate_class not in self.gate_list:
+            raise ValueError(f"Gate {gate_class.__name__} isn't in the gate set {self.name}")
+        discrete_class = gate_class.make_discrete(*args)
+        self._discrete_variants[discrete_class] = None
+        self._discrete_variants.move_to_end(discrete_class)
+        while len(self._discrete_variants) > self.max_discrete_variants:
+            self._discrete_variants.popitem(last=False)
+        return discrete_class
+
+    @property
+    def discrete_variants(self):
+        """Discrete gate classes requested with :meth:`discrete_variant`, the least recently used first
+
+        :rtype: list
+        """
+        return list(self._discrete_variants)
+
     def get_gate_set_size(self):
         """Get gate set size
 
@@ -105,6 +192,7 @@ class GateSet:
         """
         if gate not in self.gate_list:
             self.gate_list.append(gate)
+            self._invalidate_indexes()
 
     def __str__(self):
         s = "{" + ", ".join(self.get_gate_names()) + "}"
@@ -157,6 +245,7 @@ from arline_quantum.gate_sets import ibm
 from arline_quantum.gate_sets import ionq
 from arline_quantum.gate_sets import pyzx
 from arline_quantum.gate_sets import rigetti
+from arline_quantum.gate_sets import voqc
 
 
 GateSet.register_gate_set_class(arline.ArlineGateSet)
@@ -168,3 +257,4 @@ GateSet.register_gate_set_class(ibm.IbmGateSet)
 GateSet.register_gate_set_class(ionq.IonqGateSet)
 GateSet.register_gate_set_class(pyzx.PyzxGateSet)
 GateSet.register_gate_set_class(rigetti.RigettiGateSet)
+GateSet.register_gate_set_class(voqc.VoqcGateSet)
@@ -15,11 +15,8 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
-import importlib
+from functools import lru_cache
 import re
-from inspect import isclass
-
-from sympy.parsing.sympy_parser import parse_expr
 
 from arline_quantum.gates.ccnot import Ccnot
 from arline_quantum.gates.ch import Ch
@@ -51,6 +48,7 @@ from arline_quantum.gates.y import Y
 from arline_quantum.gates.yy import Yy
 from arline_quantum.gates.z import Z
 from arline_quantum.gates.zz import Zz
+from arline_quantum.utils.expression import evaluate_expression
 
 __all__ = [  # TODO update gates
     "ccnot",
@@ -84,27 +82,80 @@ __all__ = [  # TODO update gates
     "zz",
 ]
 
-print("Loading gates names...")
-__gates_by_names__ = {}
+#: Gate classes available by name in :func:`gate_by_name` and hardware configs
+gate_classes = [
+    Ccnot,
+    Ch,
+    Cnot,
+    Crx,
+    Cry,
+    Crz,
+    Cswap,
+    Cu1,
+    Cu3,
+    Cy,
+    Cz,
+    H,
+    I,
+    R,
+    Rx,
+    Ry,
+    Rz,
+    S,
+    Sd,
+    Swap,
+    T,
+    Td,
+    U1,
+    U2,
+    U3,
+    X,
+    Xx,
+    Y,
+    Yy,
+    Z,
+    Zz,
+]
+
+__gates_by_names__ = {cl.__name__: cl for cl in gate_classes}
+
+
+def register_gate(gate_class):
+    """Register gate class for :func:`gate_by_name`
 
-for f in __all__:
-    m = importlib.import_module("arline_quantum.gates." + f)
-    for v in dir(m):
-        cl = getattr(m, v)
-        if isclass(cl) and issubclass(cl, Gate):
-            if cl == Gate:
-                continue
-            __gates_by_names__[cl.__name__] = cl
+    :param gate_class: gate class
+    :type gate_class: type
+    :return: gate class, so the function can be used as a class decorator
+    :rtype: type
+    """
+    __gates_by_names__[gate_class.__name__] = gate_class
+    gate_by_name.cache_clear()
+    return gate_class
 
 
+_gate_name_pattern = re.compile(r"\s*(\w+)\s*(?:\((.*)\))?\s*")
+
+
+@lru_cache(maxsize=None)
 def gate_by_name(name):
-    if "(" in name:
-        # parse argument
-        classname = re.sub(r"(.*)\(.*", r"\1", name)
-        angles = re.sub(r".*\((.*)\)", r"\1", name)
-        angles_f = [float(parse_expr(f)) for f in angles.split(",")]
-        return __gates_by_names__[classname].make_discrete(*angles_f, class_name=name)
-    return __gates_by_names__[name]
+    """Return gate class by name
+
+    Names with arguments, e.g. ``Rx(pi/2)``, create discrete gate classes.
+    Arguments are evaluated with :func:`~arline_quantum.utils.expression.evaluate_expression`,
+    equal arguments give the same class with a canonical name (see :meth:`.Gate.make_discrete`).
+
+    :param name: gate name
+    :type name: str
+    :rtype: type
+    """
+    match = _gate_name_pattern.fullmatch(name)
+    if match is None:
+        raise KeyError(name)
+    classname, angles = match.groups()
+    if angles is None:
+        return __gates_by_names__[classname]
+    angles_f = [evaluate_expression(f) for f in angles.split(",")]
+    return __gates_by_names__[classname].make_discrete(*angles_f)
 
 
 qasm_gate_table = {
@@ -75,6 +75,11 @@ class Ccnot(Gate):
             dtype=np.complex_,
         )
 
+    def dagger(self):
+        """ Produce daggered gate
+        """
+        return self
+
     def to_qasm(self):
         r"""Describes how the gate will be shown in OPENQASM format
         """
@@ -74,6 +74,11 @@ class Cswap(Gate):
             dtype=np.complex_,
         )
 
+    def dagger(self):
+        """ Produce daggered gate
+        """
+        return self
+
     def to_qasm(self, *args):
         r"""Describes how the gate will be shown in OPENQASM format
         """
@@ -72,6 +72,11 @@ class Cz(Gate):
         )
         # fmt: on
 
+    def dagger(self):
+        """ Produce daggered gate
+        """
+        return self
+
     def to_qasm(self):
         r"""Describes how the gate will be shown in OPENQASM format
         """
@@ -17,12 +17,20 @@
 
 import numpy as np
 import types
+import weakref
 
 from fractions import Fraction
 
 from arline_quantum.gates.instruction import Instruction
 
 
+# Discrete gate classes by (continuous class, class name, rounded args), see Gate.make_discrete
+_discrete_classes = weakref.WeakValueDictionary()
+
+#: Number of decimals of the angles in the discrete gate classes cache
+DISCRETE_ANGLES_DECIMALS = 12
+
+
 class Gate(Instruction):
     """An abstract quantum gate class
     """
@@ -136,9 +144,24 @@ class Gate(Instruction):
 
     @classmethod
     def make_discrete(cls, *args, class_name=None):
+        """Create discrete gate class with fixed args
+
+        Classes are cached by the continuous class and the args rounded to :data:`DISCRETE_ANGLES_DECIMALS`
+        decimals, so the same discrete gate is always the same class object named ``Name(args)``, whatever spelling
+        of the args was used to create it. A class with another name is a subclass of this class, cached by the name.
+        The cache holds weak references, classes which are not used anymore are released.
+
+        :param args: gate args
+        :param class_name: class name, ``Name(args)`` by default
+        :type class_name: str
+        :return: discrete gate class
+        :rtype: type
+        """
         if cls.is_discrete:
             return cls
-        else:
+        key = (cls, tuple(round(float(a), DISCRETE_ANGLES_DECIMALS) + 0.0 for a in args))
+        discrete_class = _discrete_classes.get(key)
+        if discrete_class is None:
 
             def discrete_init(self):
                 cls.__init__(self, *args)
@@ -151,12 +174,17 @@ class Gate(Instruction):
 
                 return g
 
-            if class_name is None:
-                class_name = f"{cls.__name__}({cls.args_to_str(*args)})"
-
-            discrete_class = type(class_name, (cls,), {"__init__": discrete_init, "is_discrete": True})
+            name = f"{cls.__name__}({cls.args_to_str(*args)})"
+            discrete_class = type(name, (cls,), {"__init__": discrete_init, "is_discrete": True})
             discrete_class._continuous_dagger = discrete_class.dagger
             discrete_class.dagger = dagger
             discrete_class.num_angles = 0
 
+            _discrete_classes[key] = discrete_class
+        if class_name is None or class_name == discrete_class.__name__:
             return discrete_class
+        named_key = key + (class_name,)
+        named_class = _discrete_classes.get(named_key)
+        if named_class is None:
+            named_class = _discrete_classes[named_key] = type(class_name, (discrete_class,), {})
+        return named_class
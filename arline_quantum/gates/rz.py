@@ -57,6 +57,14 @@ class Rz(Gate):
         phi = self._args[0]
         return np.array([[1, 0], [0, np.exp(1j * phi)]], dtype=np.complex_)
 
+    def dagger(self):
+        """ Produce daggerd gate
+
+        :return: new dagger gate
+        :rtype: Gate
+        """
+        return Rz(-self.args[0])
+
     def to_qasm(self):
         r"""Describes how the gate will be shown in OPENQASM format
         """
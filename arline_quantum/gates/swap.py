@@ -67,6 +67,11 @@ class Swap(Gate):
         )
         # fmt: on
 
+    def dagger(self):
+        """ Produce daggered gate
+        """
+        return self
+
     def to_qasm(self, *args):
         r"""Describes how the gate will be shown in OPENQASM format
         """
@@ -57,6 +57,14 @@ class U1(Gate):
         lam = args[0]
         return np.array([[1, 0], [0, np.exp(1j * lam)]], dtype=complex)
 
+    def dagger(self):
+        """ Produce daggerd gate
+
+        :return: new dagger gate
+        :rtype: Gate
+        """
+        return U1(-self.args[0])
+
     def to_qasm(self):
         r"""Describes how the gate will be shown in OPENQASM format
         """
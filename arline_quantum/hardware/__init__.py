@@ -26,6 +26,7 @@ from arline_quantum.hardware import (
     rigetti,
     pyzx,
 )
+from arline_quantum.hardware.calibration import CalibrationTable
 from arline_quantum.hardware.hardware import Hardware
 from arline_quantum.qubit_connectivities.qubit_connectivity import All2All, QubitConnectivity
 
@@ -73,6 +74,10 @@ def hardware_by_name(hardware):
             except:
                 pass
 
+            if "calibration" in hardware:
+                hw.calibration = CalibrationTable.from_config(hardware["calibration"])
+            if "estimators" in hardware or "noise_estimator" in hardware:
+                hw.set_estimators(hardware.get("estimators"), hardware.get("noise_estimator"))
             return hw
         else:
             # Create Hardware
@@ -86,6 +91,17 @@ def hardware_by_name(hardware):
             num_gates = None
             if "num_gates" in hardware:
                 num_gates = hardware["num_gates"]
-            return Hardware(name, gate_set, connectivity, num_gates)
+            calibration = None
+            if "calibration" in hardware:
+                calibration = CalibrationTable.from_config(hardware["calibration"])
+            return Hardware(
+                name,
+                gate_set,
+                connectivity,
+                num_gates,
+                calibration=calibration,
+                estimators=hardware.get("estimators"),
+                noise_estimator=hardware.get("noise_estimator"),
+            )
     else:
         raise TypeError("Wrong hardware input type")
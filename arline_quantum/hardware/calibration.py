@@ -0,0 +1,285 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import csv
+import json
+
+import numpy as np
+
+
+class CalibrationTable:
+    """Calibration data of quantum hardware
+
+    Per-qubit data are arrays indexed by qubit, two qubit gate errors are indexed by the edges of the qubit
+    connectivity: ``edges[k]`` is a pair of qubits and ``two_qubit_error[k]`` is its gate error.
+    :attr:`edge_index` maps a pair of qubits to its edge, an edge is used in both directions
+    unless the reverse pair has its own entry. Times are given in arbitrary but consistent units.
+
+    :param num_qubits: number of qubits
+    :type num_qubits: int
+    :param edges: calibrated qubit pairs, array of shape (E, 2)
+    :type edges: np.array
+    :param t1: T1 relaxation time of every qubit, infinite by default
+    :type t1: np.array
+    :param t2: T2 dephasing time of every qubit, infinite by default
+    :type t2: np.array
+    :param single_qubit_error: single qubit gate error of every qubit
+    :type single_qubit_error: np.array
+    :param readout_error: measurement error of every qubit
+    :type readout_error: np.array
+    :param two_qubit_error: two qubit gate error of every edge
+    :type two_qubit_error: np.array
+    :param single_qubit_gate_time: duration of single qubit gates
+    :type single_qubit_gate_time: float
+    :param two_qubit_gate_time: duration of two qubit gates
+    :type two_qubit_gate_time: float
+
+    :ivar np.array edge_index: edge of every qubit pair, int64 array of shape (num_qubits, num_qubits),
+        -1 for pairs without calibration
+    """
+
+    qubit_fields = ("t1", "t2", "single_qubit_error", "readout_error")  #: per-qubit arrays
+
+    def __init__(
+        self,
+        num_qubits,
+        edges=(),
+        t1=None,
+        t2=None,
+        single_qubit_error=None,
+        readout_error=None,
+        two_qubit_error=None,
+        single_qubit_gate_time=0.0,
+        two_qubit_gate_time=0.0,
+    ):
+        self.num_qubits = num_qubits
+        self.t1 = self._qubit_array(t1, np.inf, "t1")
+        self.t2 = self._qubit_array(t2, np.inf, "t2")
+        self.single_qubit_error = self._qubit_array(single_qubit_error, 0.0, "single_qubit_error")
+        self.readout_error = self._qubit_array(readout_error, 0.0, "readout_error")
+
+        self.edges = np.array(edges, dtype=np.int64).reshape(-1, 2)
+        if two_qubit_error is None:
+            two_qubit_error = np.zeros(len(self.edges))
+        self.two_qubit_error = np.array(two_qubit_error, dtype=np.float64)
+        if self.two_qubit_error.shape != (len(self.edges),):
+            raise ValueError(f"two_qubit_error should have {len(self.edges)} elements, one per edge")
+        if len(self.edges) and (self.edges.min() < 0 or self.edges.max() >= num_qubits):
+            raise ValueError(f"Edge qubits should be in range [0, {num_qubits})")
+
+        self.single_qubit_gate_time = float(single_qubit_gate_time)
+        self.two_qubit_gate_time = float(two_qubit_gate_time)
+
+        self.edge_index = np.full((num_qubits, num_qubits), -1, dtype=np.int64)
+        k = np.arange(len(self.edges))
+        # Reverse pairs first, so the pairs listed explicitly take precedence
+        self.edge_index[self.edges[:, 1], self.edges[:, 0]] = k
+        self.edge_index[self.edges[:, 0], self.edges[:, 1]] = k
+
+    def _qubit_array(self, values, default, name):
+        if values is None:
+            return np.full(self.num_qubits, default, dtype=np.float64)
+        values = np.array(values, dtype=np.float64)
+        if values.shape != (self.num_qubits,):
+            raise ValueError(f"{name} should have {self.num_qubits} elements, one per qubit")
+        return values
+
+    @classmethod
+    def from_hardware(cls, quantum_hardware):
+        """Create uniform calibration from the scalar gate fidelities of the hardware
+
+        Every connected qubit pair gets :attr:`.Hardware.two_qubit_gate_fidelity`, every qubit gets
+        :attr:`.Hardware.single_qubit_gate_fidelity`, coherence times are infinite.
+
+        :param quantum_hardware: hardware
+        :type quantum_hardware: Hardware
+        :rtype: CalibrationTable
+        """
+        n = quantum_hardware.num_qubits
+        edges = np.argwhere(np.asarray(quantum_hardware.qubit_connectivity.connectivity) != 0)
+        return cls(
+            n,
+            edges=edges,
+            single_qubit_error=np.full(n, 1 - quantum_hardware.single_qubit_gate_fidelity),
+            two_qubit_error=np.full(len(edges), 1 - quantum_hardware.two_qubit_gate_fidelity),
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create calibration from a dictionary
+
+        Per-qubit fields (:attr:`qubit_fields`) are lists indexed by qubit, ``"edges"`` is a list of qubit pairs
+        and ``"two_qubit_error"`` is a list indexed by edge. ``"num_qubits"`` may be omitted if any per-qubit field
+        is given. None coherence times are infinite (see :meth:`to_dict`).
+
+        :param data: calibration data, e.g. loaded from JSON
+        :type data: dict
+        :rtype: CalibrationTable
+        """
+        data = dict(data)
+        for name in ("t1", "t2"):
+            if data.get(name) is not None:
+                data[name] = [np.inf if v is None else v for v in data[name]]
+        num_qubits = data.pop("num_qubits", None)
+        if num_qubits is None:
+            try:
+                num_qubits = next(len(data[f]) for f in cls.qubit_fields if f in data)
+            except StopIteration:
+                raise ValueError("Calibration should contain num_qubits or per-qubit data")
+        return cls(num_qubits, **data)
+
+    def to_dict(self):
+        """Return calibration as a JSON serializable dictionary, infinite times are stored as None
+
+        :rtype: dict
+        """
+        data = {"num_qubits": self.num_qubits}
+        for f in self.qubit_fields:
+            data[f] = [None if np.isinf(v) else float(v) for v in getattr(self, f)]
+        data["edges"] = self.edges.tolist()
+        data["two_qubit_error"] = self.two_qubit_error.tolist()
+        data["single_qubit_gate_time"] = self.single_qubit_gate_time
+        data["two_qubit_gate_time"] = self.two_qubit_gate_time
+        return data
+
+    @classmethod
+    def from_json(cls, path):
+        """Load calibration from JSON file (see :meth:`from_dict`)
+
+        :param path: file path
+        :type path: str
+        :rtype: CalibrationTable
+        """
+        with open(path) as f:
+            data = json.load(f)
+        return cls.from_dict(data)
+
+    def to_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def from_csv(cls, qubits_path, edges_path=None, num_qubits=None, **kwargs):
+        """Load calibration from CSV files with header rows
+
+        The qubit file has a ``qubit`` column and any of :attr:`qubit_fields` columns, the edge file has
+        ``qubit0``, ``qubit1`` and ``two_qubit_error`` columns. Empty cells take default values.
+
+        :param qubits_path: per-qubit data file path
+        :type qubits_path: str
+        :param edges_path: per-edge data file path
+        :type edges_path: str
+        :param num_qubits: number of qubits, the largest qubit index + 1 by default
+        :type num_qubits: int
+        :param kwargs: other :class:`CalibrationTable` arguments, e.g. gate times
+        :rtype: CalibrationTable
+        """
+        with open(qubits_path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        qubits = [int(r["qubit"]) for r in rows]
+        if num_qubits is None:
+            num_qubits = max(qubits) + 1
+        defaults = {"t1": np.inf, "t2": np.inf, "single_qubit_error": 0.0, "readout_error": 0.0}
+        for name in cls.qubit_fields:
+            if rows and name in rows[0]:
+                values = np.full(num_qubits, defaults[name])
+                for q, r in zip(qubits, rows):
+                    if r[name] not in ("", None):
+                        values[q] = float(r[name])
+                kwargs[name] = values
+
+        if edges_path is not None:
+            with open(edges_path, newline="") as f:
+                rows = list(csv.DictReader(f))
+            kwargs["edges"] = [(int(r["qubit0"]), int(r["qubit1"])) for r in rows]
+            kwargs["two_qubit_error"] = [float(r["two_qubit_error"] or 0) for r in rows]
+        return cls(num_qubits, **kwargs)
+
+    @classmethod
+    def from_config(cls, cfg):
+        """Create calibration from a hardware configuration entry
+
+        :param cfg: JSON file path, dictionary ``{"qubits_csv": path, "edges_csv": path, ...}``
+            (other keys are passed to :meth:`from_csv`) or calibration data (see :meth:`from_dict`)
+        :type cfg: str or dict
+        :rtype: CalibrationTable
+        """
+        if isinstance(cfg, CalibrationTable):
+            return cfg
+        if isinstance(cfg, str):
+            return cls.from_json(cfg)
+        if "qubits_csv" in cfg:
+            cfg = dict(cfg)
+            return cls.from_csv(cfg.pop("qubits_csv"), cfg.pop("edges_csv", None), **cfg)
+        return cls.from_dict(cfg)
+
+    def subset(self, qubits):
+        """Return calibration of the given qubits, qubit ``qubits[i]`` becomes qubit ``i``
+
+        :param qubits: list of qubits
+        :type qubits: list
+        :rtype: CalibrationTable
+        """
+        qubits = np.asarray(qubits, dtype=np.int64)
+        local = np.full(self.num_qubits, -1, dtype=np.int64)
+        local[qubits] = np.arange(len(qubits))
+        edges = local[self.edges]
+        keep = (edges >= 0).all(axis=1)
+        return self.__class__(
+            len(qubits),
+            edges=edges[keep],
+            two_qubit_error=self.two_qubit_error[keep],
+            single_qubit_gate_time=self.single_qubit_gate_time,
+            two_qubit_gate_time=self.two_qubit_gate_time,
+            **{f: getattr(self, f)[qubits] for f in self.qubit_fields},
+        )
+
+    def log_single_qubit_fidelity(self):
+        """:math:`\\log(1 - e)` of single qubit gate error of every qubit"""
+        return np.log1p(-self.single_qubit_error)
+
+    def log_two_qubit_fidelity(self):
+        """:math:`\\log(1 - e)` of two qubit gate error of every edge with NaN appended,
+        so indexing with :attr:`edge_index` gives NaN for uncalibrated pairs"""
+        return np.append(np.log1p(-self.two_qubit_error), np.nan)
+
+    def log_readout_fidelity(self):
+        """:math:`\\log(1 - e)` of measurement error of every qubit"""
+        return np.log1p(-self.readout_error)
+
+    def log_idle_fidelity(self, time):
+        """Logarithm of average fidelity of every qubit after amplitude and phase damping for ``time``
+
+        :math:`F = 1/2 + e^{-t / T_1} / 6 + e^{-t / T_2} / 3`
+
+        :param time: time of every qubit
+        :type time: np.array
+        :rtype: np.array
+        """
+        time = np.asarray(time, dtype=np.float64)
+        return np.log(0.5 + np.exp(-time / self.t1) / 6 + np.exp(-time / self.t2) / 3)
+
+    def __eq__(self, other):
+        if not isinstance(other, CalibrationTable) or other.num_qubits != self.num_qubits:
+            return False
+        return (
+            all(np.array_equal(getattr(self, f), getattr(other, f)) for f in self.qubit_fields)
+            and np.array_equal(self.edges, other.edges)
+            and np.array_equal(self.two_qubit_error, other.two_qubit_error)
+            and self.single_qubit_gate_time == other.single_qubit_gate_time
+            and self.two_qubit_gate_time == other.two_qubit_gate_time
+        )
@@ -15,16 +15,18 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
+from collections import OrderedDict
 from copy import deepcopy
 
-import networkx as nx
 import re
 
+import numpy as np
+
+from arline_quantum.estimators.estimators import CalibratedFidelityEstimator, Estimator, IbmCostFunction
+from arline_quantum.hardware.calibration import CalibrationTable
 from arline_quantum.qubit_connectivities.qubit_connectivity import All2All, QubitConnectivity
 
-from cirq import LineQubit
-from qiskit.providers.models import GateConfig, QasmBackendConfiguration
-from qiskit.providers.fake_provider.fake_backend import FakeBackend
+# Networkx, Cirq and Qiskit are imported in the export methods, so they are loaded only when used
 
 
 class Hardware:
@@ -42,8 +44,25 @@ class Hardware:
     :type gate_set: GateSet
     :param num_gates: number of each type of gate, if :code:`num_gates[key] = -1`,
     :type num_gates: dictionary
+    :param calibration: per-qubit and per-edge calibration data
+    :type calibration: CalibrationTable
+    :param estimators: cost estimators, :class:`.Estimator` objects or their configurations
+        (see :meth:`.Estimator.from_config`) with optional ``"weight"`` entry,
+        :class:`.IbmCostFunction` by default
+    :type estimators: list
+    :param noise_estimator: noise estimator or its configuration, :class:`.CalibratedFidelityEstimator` by default
+    :type noise_estimator: Estimator or dict
+
+    :ivar list estimators: cost estimators
+    :ivar list estimator_weights: weights of the cost estimators
+    :ivar Estimator noise_estimator: noise estimator
     """
 
+    max_cached_estimates = 4096  #: number of memoized :meth:`estimate` results
+
+    _calibration = None
+    _derived_calibration = None  # (single qubit fidelity, two qubit fidelity, connectivity, table)
+
     def __init__(
         self,
         name,
@@ -52,6 +71,9 @@ class Hardware:
         num_gates=None,
         single_qubit_gate_fidelity=.999,
         two_qubit_gate_fidelity=.99,
+        calibration=None,
+        estimators=None,
+        noise_estimator=None,
     ):
         if not isinstance(qubit_connectivity, QubitConnectivity):
             raise Exception("qubit_connectivity must be QubitConnectivity object")
@@ -63,6 +85,9 @@ class Hardware:
 
         self.single_qubit_gate_fidelity = single_qubit_gate_fidelity
         self.two_qubit_gate_fidelity = two_qubit_gate_fidelity
+        self._estimates = OrderedDict()  # (content fingerprint, ...) -> (costs, noise)
+        self.calibration = calibration
+        self.set_estimators(estimators, noise_estimator)
 
         self.num_gates = {g: -1 for g in self.gate_set.get_gate_names()}
         if num_gates is not None:
@@ -71,6 +96,114 @@ class Hardware:
     def copy(self):
         return deepcopy(self)
 
+    @property
+    def calibration(self):
+        return self._calibration
+
+    @calibration.setter
+    def calibration(self, calibration):
+        if calibration is not None and calibration.num_qubits != self.num_qubits:
+            raise ValueError(
+                f"Calibration is defined for {calibration.num_qubits} qubits, hardware has {self.num_qubits} qubits"
+            )
+        self._calibration = calibration
+        self.clear_estimates()
+
+    def get_calibration(self):
+        """Return calibration table, uniform table built from the scalar fidelities if it isn't set
+
+        The uniform table is cached until the fidelities or the qubit connectivity change,
+        memoized :meth:`estimate` results are dropped when it is rebuilt.
+
+        :rtype: CalibrationTable
+        """
+        if self._calibration is not None:
+            return self._calibration
+        connectivity = np.asarray(self.qubit_connectivity.connectivity)
+        derived = self._derived_calibration
+        if (
+            derived is None
+            or derived[0] != self.single_qubit_gate_fidelity
+            or derived[1] != self.two_qubit_gate_fidelity
+            or not np.array_equal(derived[2], connectivity)
+        ):
+            table = CalibrationTable.from_hardware(self)
+            derived = (self.single_qubit_gate_fidelity, self.two_qubit_gate_fidelity, connectivity.copy(), table)
+            self._derived_calibration = derived
+            self.clear_estimates()
+        return derived[3]
+
+    def set_estimators(self, estimators=None, noise_estimator=None):
+        """Set cost estimators and noise estimator, see :class:`Hardware` parameters"""
+        if estimators is None:
+            estimators = [IbmCostFunction()]
+        self.estimators = []
+        self.estimator_weights = []
+        for estimator in estimators:
+            weight = 1
+            if isinstance(estimator, dict):
+                weight = estimator.get("weight", 1)
+                estimator = Estimator.from_config(estimator)
+            self.estimators.append(estimator)
+            self.estimator_weights.append(weight)
+        if noise_estimator is None:
+            noise_estimator = CalibratedFidelityEstimator()
+        elif isinstance(noise_estimator, dict):
+            noise_estimator = Estimator.from_config(noise_estimator)
+        self.noise_estimator = noise_estimator
+        self.clear_estimates()
+
+    def clear_estimates(self):
+        """Drop memoized :meth:`estimate` results
+
+        Call after changing the estimators or the arrays of :attr:`calibration` in place.
+        """
+        self._estimates.clear()
+
+    def estimate(self, gate_chain):
+        """Evaluate all cost estimators and the noise estimator
+
+        The estimators are evaluated together, so they share the structural data cached by the gate chain
+        (:meth:`.GateChain.layers`, :meth:`.GateChain.qubit_arrays`). Results are memoized by the gate chain content
+        fingerprint (:meth:`.GateChain.fingerprint`) and the hardware fidelities, so repeated queries for the same
+        gate chain, its copies and equal gate chains don't evaluate the estimators again. The results are dropped
+        when the calibration table changes (see :meth:`get_calibration`), in-place edits of the arrays of
+        :attr:`calibration` need :meth:`clear_estimates`.
+
+        :param gate_chain: gate chain on this hardware
+        :type gate_chain: GateChain
+        :return: costs of every estimator of :attr:`estimators` and noise
+        :rtype: tuple
+        """
+        self.get_calibration()  # drops the memoized results if the derived calibration is rebuilt
+        key = (
+            gate_chain.fingerprint(),
+            len(gate_chain),
+            self.num_qubits,
+            self.single_qubit_gate_fidelity,
+            self.two_qubit_gate_fidelity,
+        )
+        try:
+            self._estimates.move_to_end(key)
+            return self._estimates[key]
+        except KeyError:
+            pass
+        costs = tuple(estimator.calculate_cost(gate_chain) for estimator in self.estimators)
+        result = (costs, self.noise_estimator.calculate_cost(gate_chain))
+        self._estimates[key] = result
+        while len(self._estimates) > self.max_cached_estimates:
+            self._estimates.popitem(last=False)
+        return result
+
+    def calculate_gate_chain_cost(self, gate_chain):
+        """Weighted sum of the costs of :attr:`estimators`, see :meth:`estimate`"""
+        costs, _ = self.estimate(gate_chain)
+        return sum(w * c for w, c in zip(self.estimator_weights, costs))
+
+    def calculate_gate_chain_noise(self, gate_chain):
+        """Noise of the gate chain estimated by :attr:`noise_estimator`, see :meth:`estimate`"""
+        return self.estimate(gate_chain)[1]
+
     @property
     def num_qubits(self):
         return self.qubit_connectivity.num_qubits
@@ -94,6 +227,9 @@ class Hardware:
         self.name = f"{match.group(1)}{self.num_qubits}Q"
 
     def convert_to_qiskit_hardware(self):
+        from qiskit.providers.models import GateConfig, QasmBackendConfiguration
+        from qiskit.providers.fake_provider.fake_backend import FakeBackend
+
         configuration = QasmBackendConfiguration(
             backend_name=self.name,
             backend_version="0.0.0",
@@ -112,6 +248,9 @@ class Hardware:
         return hardware
 
     def convert_to_nx_graph(self):
+        import networkx as nx
+        from cirq import LineQubit
+
         adj_matrix = self.qubit_connectivity.connectivity
         # if not np.array_equal(adj_matrix, adj_matrix.T):
         #     raise Exception("CirQ graph supports only non-directed adjacency graphs")
@@ -16,11 +16,44 @@
 Exception for errors raised while parsing OPENQASM.
 """
 
-from qiskit.exceptions import QiskitError
 
+from importlib.util import find_spec
 
-class QasmError(QiskitError):
-    """Base class for errors raised while parsing OPENQASM."""
+_qiskit_compatible_classes = {}
+
+
+def _qiskit_compatible(cls):
+    """Subclass of cls and QiskitError if Qiskit is installed, cls otherwise
+
+    Qiskit is imported only when a parser error is raised.
+    """
+    try:
+        return _qiskit_compatible_classes[cls]
+    except KeyError:
+        pass
+    compatible = cls
+    if find_spec("qiskit") is not None:
+        from qiskit.exceptions import QiskitError
+
+        if not issubclass(cls, QiskitError):
+            attributes = {"__module__": cls.__module__, "_error_class": cls}
+            compatible = type(cls.__name__, (cls, QiskitError), attributes)
+            _qiskit_compatible_classes[compatible] = compatible
+    _qiskit_compatible_classes[cls] = compatible
+    return compatible
+
+
+# Modified: derived from Exception instead of QiskitError, so the parser doesn't import Qiskit.
+# Raised errors are still instances of QiskitError when Qiskit is installed, see _qiskit_compatible
+class QasmError(Exception):
+    """Base class for errors raised while parsing OPENQASM.
+
+    If Qiskit is installed, raised errors are also instances of ``qiskit.exceptions.QiskitError``,
+    so code catching ``QiskitError`` keeps working.
+    """
+
+    def __new__(cls, *msg):
+        return super().__new__(_qiskit_compatible(cls), *msg)
 
     def __init__(self, *msg):
         """Set the error message."""
@@ -30,3 +63,7 @@ class QasmError(QiskitError):
     def __str__(self):
         """Return the message."""
         return repr(self.msg)
+
+    def __reduce__(self):
+        # The Qiskit compatible class isn't importable by name, errors are pickled as the original class
+        return type(self).__dict__.get("_error_class", type(self)), self.args, self.__dict__
@@ -0,0 +1,47 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+
+
+_popcount8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def num_words(num_bits):
+    """Number of uint64 words to store ``num_bits`` bits"""
+    return max(1, (num_bits + 63) // 64)
+
+
+def pack_bits(bits):
+    """Pack last axis of a boolean array into uint64 words (bit ``k`` is bit ``k % 64`` of word ``k // 64``)"""
+    bits = np.asarray(bits, dtype=bool)
+    size = 64 * num_words(bits.shape[-1])
+    padded = np.zeros(bits.shape[:-1] + (size,), dtype=bool)
+    padded[..., :bits.shape[-1]] = bits
+    return np.packbits(padded, axis=-1, bitorder="little").view("<u8").astype(np.uint64)
+
+
+def unpack_bits(words, num_bits):
+    """Unpack last axis of uint64 words into a boolean array of ``num_bits`` bits"""
+    words = np.ascontiguousarray(words, dtype="<u8")
+    bits = np.unpackbits(words.view(np.uint8), axis=-1, bitorder="little")
+    return bits[..., :num_bits].astype(bool)
+
+
+def popcount(words):
+    """Number of set bits over the last axis of uint64 words"""
+    words = np.ascontiguousarray(words, dtype="<u8")
+    return _popcount8[words.view(np.uint8)].sum(axis=-1)
@@ -0,0 +1,117 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import ast
+from fractions import Fraction
+import math
+import operator
+
+# Constants with 50 digits, so rational multiples like pi/3 are rounded to float exactly once
+_pi = Fraction("3.1415926535897932384626433832795028841971693993751")
+_e = Fraction("2.7182818284590452353602874713526624977572470936999")
+
+_constants = {
+    "pi": _pi,
+    "e": _e,
+    "E": _e,
+}
+
+_functions = {
+    "sqrt": math.sqrt,
+    "exp": math.exp,
+    "log": math.log,
+    "ln": math.log,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+}
+
+_binary_operators = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: None,  # see _power
+}
+
+_unary_operators = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+def _power(base, exponent):
+    if isinstance(exponent, Fraction) and exponent.denominator == 1 and abs(exponent) <= 64:
+        return base ** exponent.numerator
+    base, exponent = float(base), float(exponent)
+    if base < 0 and not exponent.is_integer():
+        # The result would be complex
+        raise ValueError("Negative number raised to a non-integer power")
+    return base ** exponent
+
+
+def _evaluate(node, expr):
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body, expr)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        # Literals are exact fractions, e.g. 0.15 is 3/20
+        return Fraction(repr(node.value))
+    if isinstance(node, ast.Name) and node.id in _constants:
+        return _constants[node.id]
+    if isinstance(node, ast.BinOp) and type(node.op) in _binary_operators:
+        left, right = _evaluate(node.left, expr), _evaluate(node.right, expr)
+        if isinstance(node.op, ast.Pow):
+            return _power(left, right)
+        return _binary_operators[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _unary_operators:
+        return _unary_operators[type(node.op)](_evaluate(node.operand, expr))
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in _functions
+        and len(node.args) == 1
+        and not node.keywords
+    ):
+        return _functions[node.func.id](float(_evaluate(node.args[0], expr)))
+    raise ValueError(f"Unsupported expression: {expr}")
+
+
+def evaluate_expression(expr):
+    """Evaluate numeric expression like ``-2*pi/3`` without ``eval``
+
+    Numbers, constants ``pi`` and ``e``, operators ``+ - * / **`` and functions
+    ``sqrt exp log ln sin cos tan asin acos atan`` are supported.
+    Arithmetic is exact (fractions) until a function or a non-integer power is applied.
+
+    :param expr: expression
+    :type expr: str
+    :return: value
+    :rtype: float
+
+    :raises ValueError: if the expression contains anything else
+    """
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError:
+        raise ValueError(f"Invalid expression: {expr}")
+    try:
+        return float(_evaluate(tree, expr))
+    except ArithmeticError as e:
+        raise ValueError(f"Can't evaluate expression {expr}: {e}")
@@ -0,0 +1,100 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Calibrated fidelity estimator benchmark
+
+Sets a random calibration table on the hardware of a random chain of U3, Rz, H and Cnot gates and evaluates
+:class:`.CalibratedFidelityEstimator`, a per-gate Python loop over the same table and :class:`.IbmCostFunction`.
+The first evaluation builds the cached qubit arrays, the decoherence term needs the cached layers.
+
+Usage: python benchmarks/calibrated_fidelity.py [--num-gates 100000] [--num-qubits 20] [--repeat 10]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from arline_quantum.estimators import CalibratedFidelityEstimator, IbmCostFunction
+from arline_quantum.hardware.calibration import CalibrationTable
+
+from qasm_writer import random_chain
+
+
+def _timeit(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def python_loop_cost(chain, table):
+    cost = 0
+    for el in chain.chain:
+        q = el.connections
+        if len(q) == 1:
+            cost -= np.log(1 - table.single_qubit_error[q[0]])
+        else:
+            cost -= np.log(1 - table.two_qubit_error[table.edge_index[q[0], q[1]]])
+    return cost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-gates", type=int, default=100000)
+    parser.add_argument("--num-qubits", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    chain = random_chain(args.num_gates, args.num_qubits)
+    n = args.num_qubits
+    rng = np.random.default_rng(0)
+    edges = np.argwhere(~np.eye(n, dtype=bool))
+    table = CalibrationTable(
+        n,
+        edges=edges,
+        t1=rng.uniform(50, 150, n),
+        t2=rng.uniform(30, 100, n),
+        single_qubit_error=rng.uniform(1e-4, 1e-3, n),
+        two_qubit_error=rng.uniform(5e-3, 3e-2, len(edges)),
+        single_qubit_gate_time=0.035,
+        two_qubit_gate_time=0.3,
+    )
+    chain.quantum_hardware.calibration = table
+    estimator = CalibratedFidelityEstimator(decoherence=False)
+    decoherence_estimator = CalibratedFidelityEstimator()
+
+    cost, first_time = _timeit(estimator.calculate_cost, chain)
+    _, layers_time = _timeit(chain.layers)
+    _, repeat_time = _timeit(lambda: [estimator.calculate_cost(chain) for _ in range(args.repeat)])
+    _, decoherence_time = _timeit(
+        lambda: [decoherence_estimator.calculate_cost(chain) for _ in range(args.repeat)]
+    )
+    loop_cost, loop_time = _timeit(python_loop_cost, chain, table)
+    _, ibm_time = _timeit(IbmCostFunction().calculate_cost, chain)
+    assert np.isclose(cost, loop_cost)
+
+    print(f"{args.num_gates} gates, {n} qubits")
+    print(f"first evaluation          {first_time * 1e3:8.1f} ms")
+    print(f"layers (decoherence)      {layers_time * 1e3:8.1f} ms")
+    print(f"cached evaluation         {repeat_time / args.repeat * 1e3:8.1f} ms")
+    print(f"cached with decoherence   {decoherence_time / args.repeat * 1e3:8.1f} ms")
+    print(f"per-gate python loop      {loop_time * 1e3:8.1f} ms")
+    print(f"IbmCostFunction           {ibm_time * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
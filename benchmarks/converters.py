@@ -0,0 +1,113 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Conversion throughput benchmark
+
+Converts a random chain of U3, Rz, H and Cnot gates to Qiskit, Cirq and Pytket circuits and back,
+directly and with the QASM round trip.
+
+Usage: python benchmarks/converters.py [--num-gates 20000] [--num-qubits 20]
+"""
+
+import argparse
+import time
+
+from arline_quantum.gate_chain.gate_chain import GateChain  # registers the converters, import it first
+from arline_quantum.gate_chain.converters import (
+    CirqGateChainConverter,
+    PytketGateChainConverter,
+    QiskitGateChainConverter,
+)
+
+from qasm_writer import random_chain
+
+
+def _qiskit_to_gate_chain_qasm(circuit_object):
+    return GateChain.from_qasm_list_of_lines(circuit_object.qasm().split("\n"))
+
+
+def _cirq_to_gate_chain_qasm(circuit_object):
+    return GateChain.from_qasm_list_of_lines(circuit_object.to_qasm().split("\n"))
+
+
+def _pytket_from_gate_chain_qasm(gate_chain):
+    import pytket.qasm as pyqasm
+
+    return pyqasm.circuit_from_qasm_str(gate_chain.to_qasm(qreg_name="q"))
+
+
+def _pytket_to_gate_chain_qasm(circuit_object):
+    import pytket.qasm as pyqasm
+
+    return GateChain.from_qasm_list_of_lines(pyqasm.circuit_to_qasm_str(circuit_object).split("\n"))
+
+
+def _timeit(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-gates", type=int, default=20000)
+    parser.add_argument("--num-qubits", type=int, default=20)
+    args = parser.parse_args()
+
+    chain = random_chain(args.num_gates, args.num_qubits)
+    cases = [
+        (
+            "qiskit",
+            QiskitGateChainConverter._from_gate_chain_direct,
+            QiskitGateChainConverter._from_gate_chain_qasm,
+            QiskitGateChainConverter._to_gate_chain_direct,
+            _qiskit_to_gate_chain_qasm,
+        ),
+        (
+            "cirq",
+            CirqGateChainConverter._from_gate_chain_direct,
+            CirqGateChainConverter._from_gate_chain_qasm,
+            CirqGateChainConverter._to_gate_chain_direct,
+            _cirq_to_gate_chain_qasm,
+        ),
+        (
+            "pytket",
+            PytketGateChainConverter._from_gate_chain_direct,
+            _pytket_from_gate_chain_qasm,
+            PytketGateChainConverter._to_gate_chain_direct,
+            _pytket_to_gate_chain_qasm,
+        ),
+    ]
+    print(f"{args.num_gates} gates, gates per second (direct / QASM round trip)")
+    warm_up_chain = random_chain(10, args.num_qubits)
+    for name, from_direct, from_qasm, to_direct, to_qasm in cases:
+        # Exclude framework import time
+        to_qasm(from_qasm(warm_up_chain))
+        to_direct(from_direct(warm_up_chain))
+        circuit_object, t_from_direct = _timeit(from_direct, chain)
+        _, t_from_qasm = _timeit(from_qasm, chain)
+        _, t_to_direct = _timeit(to_direct, circuit_object)
+        _, t_to_qasm = _timeit(to_qasm, circuit_object)
+        n = args.num_gates
+        print(
+            f"{name:8} from GateChain: {n / t_from_direct:10.0f} / {n / t_from_qasm:10.0f}"
+            f"    to GateChain: {n / t_to_direct:10.0f} / {n / t_to_qasm:10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Dependency DAG benchmark
+
+Builds the dependency DAG of a random chain of U3, Rz, H and Cnot gates with :class:`.GateChainDag`
+and with Qiskit ``circuit_to_dag`` (the circuit conversion is timed separately),
+then iterates over the nodes in topological order and removes every fourth node.
+
+Usage: python benchmarks/dag.py [--num-gates 100000] [--num-qubits 20]
+"""
+
+import argparse
+import time
+
+from arline_quantum.gate_chain.dag import GateChainDag
+
+from qasm_writer import random_chain
+
+
+def _timeit(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-gates", type=int, default=100000)
+    parser.add_argument("--num-qubits", type=int, default=20)
+    args = parser.parse_args()
+
+    from qiskit.converters import circuit_to_dag
+
+    chain = random_chain(args.num_gates, args.num_qubits)
+    circuit_object, convert_time = _timeit(chain.convert_to, "qiskit")
+
+    dag, build_time = _timeit(GateChainDag, chain)
+    qiskit_dag, qiskit_build_time = _timeit(circuit_to_dag, circuit_object)
+
+    _, order_time = _timeit(lambda: sum(1 for _ in dag.topological_order()))
+    _, qiskit_order_time = _timeit(lambda: sum(1 for _ in qiskit_dag.topological_op_nodes()))
+
+    def remove_nodes():
+        for i in range(0, args.num_gates, 4):
+            dag.remove_node(i)
+
+    def qiskit_remove_nodes():
+        for i, node in enumerate(list(qiskit_dag.topological_op_nodes())):
+            if i % 4 == 0:
+                qiskit_dag.remove_op_node(node)
+
+    _, remove_time = _timeit(remove_nodes)
+    _, qiskit_remove_time = _timeit(qiskit_remove_nodes)
+
+    print(f"{args.num_gates} gates        GateChainDag   Qiskit DAGCircuit")
+    print(f"build               {build_time:8.2f} s   {qiskit_build_time:8.2f} s (+ {convert_time:.2f} s conversion)")
+    print(f"topological order   {order_time:8.2f} s   {qiskit_order_time:8.2f} s")
+    print(f"remove 1/4 nodes    {remove_time:8.2f} s   {qiskit_remove_time:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
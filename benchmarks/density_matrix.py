@@ -0,0 +1,69 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Density matrix simulation benchmark
+
+Simulates a random chain of U3, Rz, H and Cnot gates with :class:`.DensityMatrixSimulator` and uniform calibration
+with T1 / T2 relaxation, with single qubit operations of a layer batched in pairs and without batching.
+
+Usage: python benchmarks/density_matrix.py [--num-gates 200] [--num-qubits 10]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from arline_quantum.gate_chain.density_matrix import DensityMatrixSimulator, NoiseModel
+from arline_quantum.hardware.calibration import CalibrationTable
+
+from qasm_writer import random_chain
+
+
+def _timeit(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-gates", type=int, default=200)
+    parser.add_argument("--num-qubits", type=int, default=10)
+    args = parser.parse_args()
+
+    chain = random_chain(args.num_gates, args.num_qubits)
+    hw = chain.quantum_hardware
+    calibration = CalibrationTable.from_hardware(hw)
+    calibration.t1[:] = 100
+    calibration.t2[:] = 80
+    calibration.single_qubit_gate_time = 0.035
+    calibration.two_qubit_gate_time = 0.3
+    hw.calibration = calibration
+    noise_model = NoiseModel(hw)
+
+    rho, batched_time = _timeit(DensityMatrixSimulator(noise_model, batch_qubits=2).run, chain)
+    unbatched_rho, unbatched_time = _timeit(DensityMatrixSimulator(noise_model, batch_qubits=1).run, chain)
+    assert np.allclose(rho, unbatched_rho)
+
+    print(f"{args.num_gates} gates, {args.num_qubits} qubits, {chain.get_depth()} layers")
+    print(f"batched single qubit operations   {batched_time:8.2f} s")
+    print(f"one contraction per operation     {unbatched_time:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Import time benchmark
+
+Every statement is imported in a fresh interpreter. The script fails if heavy frameworks are loaded
+or the median import time exceeds ``--max-time``.
+
+Usage: python benchmarks/import_time.py [--repeat 5] [--max-time 1.0]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = [
+    "from arline_quantum.gate_chain.gate_chain import GateChain",
+    "from arline_quantum.hardware import hardware_by_name",
+    "from arline_quantum.gate_chain.basis_translator import ArlineTranslator",
+    "from arline_quantum.estimators.estimators import IbmCostFunction",
+]
+
+HEAVY_MODULES = ["qiskit", "cirq", "pytket", "networkx", "sympy", "matplotlib"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [m for m in {heavy!r} if m in sys.modules]]))
+"""
+
+
+def measure(statement):
+    """Import ``statement`` in a fresh interpreter
+
+    :return: import time in seconds and list of loaded heavy modules
+    :rtype: tuple
+    """
+    code = _PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    elapsed, loaded = json.loads(out.strip().splitlines()[-1])
+    return elapsed, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-time", type=float, default=None, help="maximal median import time, seconds")
+    args = parser.parse_args()
+
+    failed = False
+    for statement in STATEMENTS:
+        results = [measure(statement) for _ in range(args.repeat)]
+        median = statistics.median(r[0] for r in results)
+        loaded = results[-1][1]
+        print(f"{median * 1000:8.1f} ms  {statement}" + (f"  (loaded: {', '.join(loaded)})" if loaded else ""))
+        if loaded or (args.max_time is not None and median > args.max_time):
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
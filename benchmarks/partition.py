@@ -0,0 +1,77 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Windowed processing benchmark
+
+Partitions a random chain of U3, Rz, H and Cnot gates into convex blocks with :meth:`.GateChain.partition`,
+optimizes the blocks with :class:`.PeepholeOptimizer` serially and in a ``ProcessPoolExecutor``
+and assembles the result with :meth:`.GateChain.from_blocks`. The whole chain is optimized for comparison.
+
+Usage: python benchmarks/partition.py [--num-gates 200000] [--num-qubits 50] [--max-qubits 4] [--max-gates 500]
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.peephole_optimizer import PeepholeOptimizer
+
+from qasm_writer import random_chain
+
+
+def _timeit(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def optimize(gate_chain):
+    return PeepholeOptimizer().run(gate_chain)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-gates", type=int, default=200000)
+    parser.add_argument("--num-qubits", type=int, default=50)
+    parser.add_argument("--max-qubits", type=int, default=4)
+    parser.add_argument("--max-gates", type=int, default=500)
+    args = parser.parse_args()
+
+    chain = random_chain(args.num_gates, args.num_qubits)
+    hw = chain.quantum_hardware
+
+    blocks, partition_time = _timeit(chain.partition, args.max_qubits, args.max_gates)
+    block_chains, extract_time = _timeit(lambda: [chain.extract_block(b) for b in blocks])
+    _, strip_time = _timeit(chain.strip_empty_qubits)
+
+    optimized, serial_time = _timeit(lambda: [optimize(c) for c in block_chains])
+    with ProcessPoolExecutor() as executor:
+        optimized, parallel_time = _timeit(lambda: list(executor.map(optimize, block_chains, chunksize=16)))
+    assembled, assemble_time = _timeit(GateChain.from_blocks, hw, blocks, optimized)
+    whole, whole_time = _timeit(optimize, chain)
+
+    print(f"{args.num_gates} gates, {len(blocks)} blocks of <= {args.max_qubits} qubits, <= {args.max_gates} gates")
+    print(f"partition            {partition_time:8.2f} s")
+    print(f"extract blocks       {extract_time:8.2f} s")
+    print(f"strip_empty_qubits   {strip_time:8.2f} s")
+    print(f"optimize blocks      {serial_time:8.2f} s serial, {parallel_time:.2f} s in processes")
+    print(f"from_blocks          {assemble_time:8.2f} s ({len(assembled)} gates)")
+    print(f"optimize whole chain {whole_time:8.2f} s ({len(whole)} gates)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""QASM export benchmark
+
+Exports a random chain of U3, Rz, H and Cnot gates with the per-connection ``GateConnection.to_qasm``
+and with :class:`.QasmWriter`, checks that the outputs are identical.
+
+Usage: python benchmarks/qasm_writer.py [--num-gates 1000000] [--num-qubits 20]
+"""
+
+import argparse
+import io
+import time
+
+import numpy as np
+
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.gate_connection import GateConnection
+from arline_quantum.gate_chain.qasm_writer import QasmWriter
+from arline_quantum.gates.cnot import Cnot
+from arline_quantum.gates.h import H
+from arline_quantum.gates.rz import Rz
+from arline_quantum.gates.u3 import U3
+from arline_quantum.hardware import hardware_by_name
+
+
+def random_chain(num_gates, num_qubits, seed=0):
+    hw = hardware_by_name(
+        {
+            "gate_set": ["U3", "Rz", "H", "Cnot"],
+            "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": num_qubits}},
+        }
+    )
+    rng = np.random.default_rng(seed)
+    # Angles from a limited set, as produced by optimizers working with Clifford+T-like circuits
+    angles = (np.pi * rng.integers(-8, 9, 64) / 8 + rng.normal(0, 1, 64) * (rng.random(64) < 0.5)).tolist()
+    h, cnot = H(), Cnot()
+    chain = GateChain(hw)
+    kinds = rng.integers(0, 4, num_gates)
+    qubits = rng.integers(0, num_qubits, (num_gates, 2))
+    args = rng.integers(0, len(angles), (num_gates, 3))
+    for kind, (a, b), (i, j, k) in zip(kinds.tolist(), qubits.tolist(), args.tolist()):
+        if kind == 0:
+            chain.chain.append(GateConnection(hw, U3(angles[i], angles[j], angles[k]), [a], []))
+        elif kind == 1:
+            chain.chain.append(GateConnection(hw, Rz(angles[i]), [a], []))
+        elif kind == 2:
+            chain.chain.append(GateConnection(hw, h, [a], []))
+        else:
+            chain.chain.append(GateConnection(hw, cnot, [a, (a + 1 + b % (num_qubits - 1)) % num_qubits], []))
+    return chain
+
+
+def per_connection_qasm(chain, qreg_name="q", creg_name="c"):
+    num_qubits = chain.quantum_hardware.num_qubits
+    s = "// Copyright (c) 2019 Turation Ltd\n" "\n" "OPENQASM 2.0;\n" 'include "qelib1.inc";\n'
+    s += f"\nqreg {qreg_name}[{num_qubits}];\ncreg {creg_name}[{num_qubits}];\n"
+    return s + "\n".join(g.to_qasm(qreg_name) for g in chain.chain) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-gates", type=int, default=1000000)
+    parser.add_argument("--num-qubits", type=int, default=20)
+    args = parser.parse_args()
+
+    chain = random_chain(args.num_gates, args.num_qubits)
+
+    start = time.perf_counter()
+    reference = per_connection_qasm(chain)
+    per_connection_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    output = io.StringIO()
+    QasmWriter().write(chain, output)
+    writer_time = time.perf_counter() - start
+
+    assert output.getvalue() == reference, "QasmWriter output differs from GateConnection.to_qasm"
+    print(f"{args.num_gates} gates")
+    print(f"GateConnection.to_qasm: {per_connection_time:8.2f} s")
+    print(f"QasmWriter:             {writer_time:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
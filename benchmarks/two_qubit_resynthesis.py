@@ -0,0 +1,98 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Two qubit block resynthesis benchmark
+
+Resynthesizes two qubit blocks of a random chain of U3, Rz, H and Cnot gates with
+:class:`.TwoQubitResynthesisOptimizer` and with Qiskit ``Collect2qBlocks``, ``ConsolidateBlocks`` and
+``UnitarySynthesis`` passes (the circuit conversion isn't timed). Most gates act on neighbouring qubits,
+so the chain has long two qubit blocks.
+
+Usage: python benchmarks/two_qubit_resynthesis.py [--num-gates 20000] [--num-qubits 10]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.gate_connection import GateConnection
+from arline_quantum.gate_chain.two_qubit_resynthesis import TwoQubitResynthesisOptimizer
+from arline_quantum.gates.cnot import Cnot
+from arline_quantum.gates.h import H
+from arline_quantum.gates.u3 import U3
+from arline_quantum.hardware import hardware_by_name
+
+
+def _timeit(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def local_chain(num_gates, num_qubits, seed=0):
+    hw = hardware_by_name(
+        {
+            "gate_set": ["U3", "H", "Cnot"],
+            "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": num_qubits}},
+        }
+    )
+    rng = np.random.default_rng(seed)
+    chain = GateChain(hw)
+    pair = 0
+    for kind, angles in zip(rng.integers(0, 4, num_gates).tolist(), rng.uniform(-np.pi, np.pi, (num_gates, 3))):
+        if rng.random() < 0.05:
+            pair = rng.integers(num_qubits - 1)
+        a, b = pair, pair + 1
+        if kind == 0:
+            chain.chain.append(GateConnection(hw, U3(*angles), [a], []))
+        elif kind == 1:
+            chain.chain.append(GateConnection(hw, H(), [b], []))
+        else:
+            chain.chain.append(GateConnection(hw, Cnot(), [a, b] if kind == 2 else [b, a], []))
+    return chain
+
+
+def cnot_count(gate_chain):
+    return sum(isinstance(el.gate, Cnot) for el in gate_chain.chain)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-gates", type=int, default=20000)
+    parser.add_argument("--num-qubits", type=int, default=10)
+    args = parser.parse_args()
+
+    from qiskit.transpiler import PassManager
+    from qiskit.transpiler.passes import Collect2qBlocks, ConsolidateBlocks, UnitarySynthesis
+
+    chain = local_chain(args.num_gates, args.num_qubits)
+    circuit = chain.convert_to("qiskit")
+
+    optimized, time_native = _timeit(TwoQubitResynthesisOptimizer().run, chain)
+    pass_manager = PassManager(
+        [Collect2qBlocks(), ConsolidateBlocks(basis_gates=["u3", "cx"]), UnitarySynthesis(basis_gates=["u3", "cx"])]
+    )
+    qiskit_circuit, time_qiskit = _timeit(pass_manager.run, circuit)
+
+    print(f"{args.num_gates} gates, {cnot_count(chain)} Cnots")
+    print(f"TwoQubitResynthesisOptimizer {time_native:8.2f} s, {cnot_count(optimized)} Cnots")
+    print(f"Qiskit passes                {time_qiskit:8.2f} s, {qiskit_circuit.count_ops().get('cx', 0)} Cnots")
+
+
+if __name__ == "__main__":
+    main()
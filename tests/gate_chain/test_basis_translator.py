@@ -0,0 +1,197 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+
+import numpy as np
+
+from arline_quantum.gates import Cnot, H, Rz, T, qasm_gate_table
+from arline_quantum.gate_chain.basis_translator import ArlineTranslator
+from arline_quantum.gate_chain.decompositions import (
+    cnot_decompositions,
+    cnot_rebases,
+    decompose_gate,
+    expand_rule,
+    one_qubit_decompositions,
+    rebase_plan,
+)
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.one_qubit_resynthesis import euler_angles_u3, euler_angles_zxz, euler_angles_zyz
+from arline_quantum.gates.rx import Rx
+from arline_quantum.gates.ry import Ry
+from arline_quantum.gates.u3 import U3
+from arline_quantum.gate_sets.gate_set import GateSet
+from arline_quantum.gate_sets.voqc import VoqcGateSet
+from arline_quantum.gates.cz import Cz
+from arline_quantum.gates.s import S
+from arline_quantum.hardware import hardware_by_name
+from arline_quantum.utils.fidelity import unitary_fidelity
+
+
+def make_hardware(num_qubits):
+    return hardware_by_name(
+        {
+            "gate_set_class": "FullGateSet",
+            "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": num_qubits}},
+        }
+    )
+
+
+def random_chain(num_qubits, num_gates, seed):
+    rng = np.random.RandomState(seed)
+    gates = [g for g in qasm_gate_table.values() if g.num_qubits <= num_qubits]
+    gate_chain = GateChain(make_hardware(num_qubits))
+    for _ in range(num_gates):
+        g = gates[rng.randint(len(gates))]
+        conn = list(rng.choice(num_qubits, g.num_qubits, replace=False))
+        gate_chain.add_gate(g(*rng.uniform(-np.pi, np.pi, g.num_angles)), conn)
+    return gate_chain
+
+
+class TestDecompositions(unittest.TestCase):
+    def test_cnot_decompositions(self):
+        for gate_class in cnot_decompositions:
+            with self.subTest(gate=gate_class.__name__):
+                g = gate_class(*[0.3, 1.1, -0.7][:gate_class.num_angles])
+                gate_chain = GateChain(make_hardware(g.num_qubits))
+                gate_chain.add_gate(g, list(range(g.num_qubits)))
+                new_chain = GateChain(make_hardware(g.num_qubits))
+                for dg, conn in decompose_gate(g, list(range(g.num_qubits))):
+                    self.assertTrue(dg.num_qubits == 1 or isinstance(dg, Cnot))
+                    new_chain.add_gate(dg, conn)
+                np.testing.assert_almost_equal(unitary_fidelity(gate_chain.matrix, new_chain.matrix), 1)
+
+    def test_rules(self):
+        for rules in [one_qubit_decompositions, cnot_rebases]:
+            for gate_class, rule in rules.items():
+                if rules is cnot_rebases:
+                    g = Cnot()
+                else:
+                    g = gate_class(*[0.3, 1.1, -0.7][:gate_class.num_angles])
+                with self.subTest(gate=gate_class.__name__):
+                    gate_chain = GateChain(make_hardware(g.num_qubits))
+                    gate_chain.add_gate(g, list(range(g.num_qubits)))
+                    new_chain = GateChain(make_hardware(g.num_qubits))
+                    for dg, conn in expand_rule(rule, g.args, list(range(g.num_qubits))):
+                        new_chain.add_gate(dg, conn)
+                    np.testing.assert_almost_equal(unitary_fidelity(gate_chain.matrix, new_chain.matrix), 1)
+
+    def test_rebase_plan_is_cached(self):
+        plan = rebase_plan([Cz, Rz, H])
+        self.assertIs(plan, rebase_plan([H, Rz, Cz]))
+        self.assertEqual(plan.cost[Cnot], 3)
+        self.assertEqual(plan.rule(Cz), None)
+        with self.assertRaises(ValueError):
+            rebase_plan([Cnot, H, S]).rule(Rz)
+
+
+class TestEulerAngles(unittest.TestCase):
+    def test_euler_angles(self):
+        rng = np.random.RandomState(0)
+        gates = [U3(*rng.uniform(-np.pi, np.pi, 3)) for _ in range(20)] + [T(), H(), Rz(0.1)]
+        mats = np.array([g.u for g in gates])
+        for theta, phi, lam, phase, u in zip(*euler_angles_zyz(mats), mats):
+            v = np.exp(1j * phase) * Rz(phi).u @ Ry(theta).u @ Rz(lam).u
+            np.testing.assert_almost_equal(unitary_fidelity(u, v), 1)
+        for theta, phi, lam, phase, u in zip(*euler_angles_zxz(mats), mats):
+            v = Rz(phi).u @ Rx(theta).u @ Rz(lam).u
+            np.testing.assert_almost_equal(unitary_fidelity(u, v), 1)
+        for theta, phi, lam, phase, u in zip(*euler_angles_u3(mats), mats):
+            np.testing.assert_almost_equal(np.exp(1j * phase) * U3(theta, phi, lam).u, u)
+
+
+class TestArlineTranslator(unittest.TestCase):
+    def test_rebase(self):
+        translator = ArlineTranslator()
+        gate_chain = random_chain(3, 60, seed=1)
+        for method in [
+            "rebase_to_ibm",
+            "rebase_to_google",
+            "rebase_to_ionq",
+            "rebase_to_rigetti",
+            "rebase_to_pyzx",
+            "rebase_to_cx_rz_rx",
+            "rebase_to_voqc",
+            "rebase_to_arline",
+        ]:
+            with self.subTest(method=method):
+                new_chain = getattr(translator, method)(gate_chain)
+                self.assertEqual(new_chain.check_gate_set(), [])
+                self.assertEqual(new_chain.quantum_hardware.num_qubits, 3)
+                np.testing.assert_almost_equal(unitary_fidelity(gate_chain.matrix, new_chain.matrix), 1)
+        self.assertEqual(gate_chain.quantum_hardware.gate_set.__class__.__name__, "FullGateSet")
+
+    def test_rebase_to_registered_gate_set(self):
+        class RyCzGateSet(GateSet):
+            def __init__(self):
+                super().__init__(self.__class__.__name__, [Ry, Rz, H, Cz])
+
+        GateSet.register_gate_set_class(RyCzGateSet)
+        gate_chain = random_chain(3, 30, seed=2)
+        new_chain = ArlineTranslator().rebase(gate_chain, "RyCzGateSet")
+        self.assertEqual(new_chain.check_gate_set(), [])
+        np.testing.assert_almost_equal(unitary_fidelity(gate_chain.matrix, new_chain.matrix), 1)
+        del GateSet.available_gate_set_classes["RyCzGateSet"]
+
+    def test_rebase_to_voqc_gate_count(self):
+        translator = ArlineTranslator()
+        target = VoqcGateSet().gate_list
+        gate_chain = random_chain(3, 60, seed=3)
+        # Gate by gate decomposition without merging single qubit runs
+        plan = rebase_plan(target)
+        gate_by_gate = sum(
+            1 if plan.rule(type(el.gate)) is None else len(plan.apply(el.gate, el.connections))
+            for el in gate_chain.chain
+        )
+        new_chain = translator.rebase_to_voqc(gate_chain)
+        self.assertLessEqual(new_chain.get_num_gates(), gate_by_gate)
+        np.testing.assert_almost_equal(unitary_fidelity(gate_chain.matrix, new_chain.matrix), 1)
+
+        # Native Clifford+T chain isn't made longer
+        rng = np.random.RandomState(4)
+        clifford_t = GateChain(make_hardware(3))
+        gates = [H, S, T, Cnot]
+        for _ in range(60):
+            g = gates[rng.randint(len(gates))]
+            clifford_t.add_gate(g(), list(rng.choice(3, g.num_qubits, replace=False)))
+        new_chain = translator.rebase_to_voqc(clifford_t)
+        self.assertLessEqual(new_chain.get_num_gates(), clifford_t.get_num_gates())
+        np.testing.assert_almost_equal(unitary_fidelity(clifford_t.matrix, new_chain.matrix), 1)
+
+        # Single qubit run is decomposed once
+        run = GateChain(make_hardware(1))
+        for g in [U3(0.3, 1.1, -0.7), Rx(0.5), U3(-1.2, 0.4, 2.0)]:
+            run.add_gate(g, [0])
+        new_chain = translator.rebase_to_voqc(run)
+        self.assertEqual([el.gate.name for el in new_chain.chain], ["Rz", "H", "Rz", "H", "Rz"])
+        np.testing.assert_almost_equal(unitary_fidelity(run.matrix, new_chain.matrix), 1)
+
+    def test_merge_u3_gates(self):
+        gate_chain = GateChain(make_hardware(2))
+        gate_chain.add_gate(H(), [0])
+        gate_chain.add_gate(T(), [0])
+        gate_chain.add_gate(Rz(0.2), [1])
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(H(), [1])
+        gate_chain.add_gate(H(), [1])
+        new_chain = ArlineTranslator().merge_u3_gates(gate_chain)
+        self.assertEqual([el.gate.name for el in new_chain.chain], ["U3", "U3", "Cnot"])
+        np.testing.assert_almost_equal(unitary_fidelity(gate_chain.matrix, new_chain.matrix), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
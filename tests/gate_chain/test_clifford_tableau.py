@@ -0,0 +1,103 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+
+import numpy as np
+
+from arline_quantum.gates import Cnot, Cz, H, S, Sd, Swap, T, X, Y, Z
+from arline_quantum.gate_chain.clifford_tableau import CliffordTableau
+from arline_quantum.gate_chain.commutation import CommutationChecker
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.hardware import hardware_by_name
+
+clifford_gates = [Cnot, Cz, H, S, Sd, Swap, X, Y, Z]
+
+
+def make_hardware(num_qubits):
+    return hardware_by_name(
+        {
+            "gate_set": ["Cnot", "Cz", "H", "S", "Sd", "Swap", "T", "X", "Y", "Z"],
+            "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": num_qubits}},
+        }
+    )
+
+
+def random_clifford_chain(num_qubits, num_gates, rng):
+    gate_chain = GateChain(make_hardware(num_qubits))
+    for _ in range(num_gates):
+        g = clifford_gates[rng.randint(len(clifford_gates))]
+        gate_chain.add_gate(g(), list(rng.choice(num_qubits, g.num_qubits, replace=False)))
+    return gate_chain
+
+
+def pauli_matrix(x, z):
+    """Hermitian Pauli i^{x.z} X^x Z^z, qubit 0 is the most significant"""
+    num_qubits = len(x)
+    p = np.eye(2 ** num_qubits, dtype=complex)
+    for q in range(num_qubits):
+        m = np.linalg.matrix_power(X().u, int(x[q])) @ np.linalg.matrix_power(Z().u, int(z[q]))
+        if x[q] and z[q]:
+            m = 1j * m
+        p = p @ CommutationChecker._local_operator(m, [q], num_qubits)
+    return p
+
+
+class TestCliffordTableau(unittest.TestCase):
+    def test_rows_agree_with_unitary(self):
+        rng = np.random.RandomState(0)
+        n = 3
+        for _ in range(20):
+            gate_chain = random_clifford_chain(n, 25, rng)
+            u = np.eye(2 ** n, dtype=complex)
+            for el in gate_chain.chain:
+                u = CommutationChecker._local_operator(el.gate.u, el.connections, n) @ u
+            x, z, r = gate_chain.clifford_tableau().to_bits()
+            eye = np.eye(2 * n, dtype=bool)
+            for i in range(2 * n):
+                generator = pauli_matrix(eye[i, :n], eye[i, n:])
+                expected = (-1) ** r[i] * pauli_matrix(x[i], z[i])
+                np.testing.assert_almost_equal(u @ generator @ u.conj().T, expected)
+
+    def test_inverse_and_equality(self):
+        rng = np.random.RandomState(1)
+        gate_chain = random_clifford_chain(7, 200, rng)
+        tableau = gate_chain.clifford_tableau()
+        inverse = tableau.inverse()
+        self.assertEqual(tableau.then(inverse), CliffordTableau(7))
+        self.assertEqual(inverse.then(tableau), CliffordTableau(7))
+        self.assertEqual(inverse, gate_chain.dagger().clifford_tableau())
+        self.assertNotEqual(tableau, CliffordTableau(7))
+
+    def test_parity_matrix(self):
+        gate_chain = GateChain(make_hardware(2))
+        gate_chain.add_gate(H(), [0])
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(S(), [1])
+        # Rows: images of X0, X1, Z0, Z1 are Z0, Y1, X0 Y1, Z0 Z1
+        expected = np.array([[0, 0, 1, 0], [0, 1, 0, 1], [1, 1, 0, 1], [0, 0, 1, 1]])
+        np.testing.assert_array_equal(gate_chain.clifford_parity_matrix(), expected.T)
+
+    def test_non_clifford_gate(self):
+        gate_chain = GateChain(make_hardware(1))
+        gate_chain.add_gate(T(), [0])
+        with self.assertRaises(ValueError):
+            gate_chain.clifford_parity_matrix()
+
+
+if __name__ == "__main__":
+    unittest.main()
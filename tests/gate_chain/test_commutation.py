@@ -0,0 +1,73 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+from itertools import permutations
+
+import numpy as np
+
+from arline_quantum.gates import Cnot, Cz, H, Rx, Rz, T, qasm_gate_table
+from arline_quantum.gates.measure import Measure
+from arline_quantum.gate_chain.commutation import CommutationChecker
+
+
+class TestCommutationChecker(unittest.TestCase):
+    def test_rules_agree_with_matrices(self):
+        checker = CommutationChecker()
+        angles = [0.3, 1.1, -0.7]
+        gates = [g(*angles[:g.num_angles]) for g in qasm_gate_table.values()]
+        num_qubits = 3
+        for g1 in gates:
+            for g2 in gates:
+                for c1 in permutations(range(num_qubits), g1.num_qubits):
+                    for c2 in permutations(range(num_qubits), g2.num_qubits):
+                        with self.subTest(g1=str(g1), c1=c1, g2=str(g2), c2=c2):
+                            u1 = CommutationChecker._local_operator(g1.u, c1, num_qubits)
+                            u2 = CommutationChecker._local_operator(g2.u, c2, num_qubits)
+                            ref = np.allclose(u1 @ u2, u2 @ u1, atol=1e-7)
+                            self.assertEqual(checker.commute(g1, list(c1), g2, list(c2)), ref)
+
+    def test_cnot_rules(self):
+        checker = CommutationChecker()
+        self.assertTrue(checker.commute(Cnot(), [0, 1], Cnot(), [0, 2]))
+        self.assertTrue(checker.commute(Cnot(), [0, 2], Cnot(), [1, 2]))
+        self.assertFalse(checker.commute(Cnot(), [0, 1], Cnot(), [1, 2]))
+        self.assertTrue(checker.commute(Cnot(), [0, 1], Rz(0.2), [0]))
+        self.assertTrue(checker.commute(Cnot(), [0, 1], Rx(0.2), [1]))
+        self.assertTrue(checker.commute(Cz(), [0, 1], T(), [1]))
+        self.assertFalse(checker.commute(Cnot(), [0, 1], H(), [0]))
+
+    def test_matrix_fallback_is_memoized(self):
+        checker = CommutationChecker()
+        self.assertTrue(checker.commute(H(), [3], H(), [3]))
+        self.assertTrue(checker.commute(H(), [5], H(), [5]))
+        self.assertEqual(len(checker._cache), 1)
+
+    def test_discrete_gate_rules(self):
+        checker = CommutationChecker()
+        rx_pi2 = Rx.make_discrete(np.pi / 2)()
+        self.assertTrue(checker.commute(rx_pi2, [1], Cnot(), [0, 1]))
+        self.assertEqual(len(checker._cache), 0)
+
+    def test_measure_is_boundary(self):
+        checker = CommutationChecker()
+        self.assertFalse(checker.commute(Measure(), [0], Rz(0.1), [0]))
+        self.assertTrue(checker.commute(Measure(), [0], Rz(0.1), [1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import sys
+import unittest
+from functools import partial
+from unittest import mock
+
+import numpy as np
+
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.converters import (
+    CirqGateChainConverter,
+    PytketGateChainConverter,
+    QiskitGateChainConverter,
+)
+from arline_quantum.gates import qasm_gate_table
+from arline_quantum.gates.measure import Measure
+from arline_quantum.hardware import hardware_by_name
+from arline_quantum.utils.fidelity import unitary_fidelity
+
+from tests.gate_chain.utils import random_chain
+
+
+_random_chain = partial(random_chain, ["U3", "Rz", "Rx", "H", "S", "Td", "Cnot", "Cz", "Swap"], 4, 40, seed=1)
+
+
+class TestConverters(unittest.TestCase):
+    def test_qiskit(self):
+        from qiskit import QuantumCircuit
+
+        gate_chain = _random_chain()
+        gate_chain.add_gate(Measure(), [2], cregs=[1], force_connection=True)
+        circuit_object = gate_chain.convert_to("qiskit")
+        self.assertEqual(circuit_object, QuantumCircuit.from_qasm_str(gate_chain.to_qasm(qreg_name="q")))
+        back = GateChain.convert_from(circuit_object, "qiskit")
+        self.assertEqual(back.to_qasm(), gate_chain.to_qasm())
+        self.assertEqual(back.qreg_mapping, gate_chain.qreg_mapping)
+        self.assertEqual(back.creg_mapping, gate_chain.creg_mapping)
+
+    def test_qiskit_public_append(self):
+        gate_chain = _random_chain()
+        gate_chain.add_gate(Measure(), [2], cregs=[1], force_connection=True)
+        circuit_object = gate_chain.convert_to("qiskit")
+        # QuantumCircuit._append isn't a public Qiskit API
+        with mock.patch.object(QiskitGateChainConverter, "_unchecked_append", side_effect=lambda c: c.append):
+            self.assertEqual(gate_chain.convert_to("qiskit"), circuit_object)
+
+    def test_cirq(self):
+        from cirq.contrib.qasm_import import circuit_from_qasm
+
+        gate_chain = _random_chain()
+        circuit_object = CirqGateChainConverter._from_gate_chain_direct(gate_chain)
+        self.assertEqual(circuit_object, circuit_from_qasm(gate_chain.to_qasm(qreg_name="q")))
+        back = GateChain.convert_from(circuit_object, "cirq")
+        self.assertEqual(back.quantum_hardware.num_qubits, 4)
+        self.assertAlmostEqual(unitary_fidelity(back.matrix, gate_chain.matrix), 1.0)
+
+    def test_cirq_fallback(self):
+        import cirq
+
+        q = cirq.LineQubit.range(2)
+        circuit_object = cirq.Circuit([cirq.H(q[0]), cirq.ISWAP(q[0], q[1]), cirq.measure(q[1], key="m")])
+        gate_chain = GateChain.convert_from(circuit_object, "cirq")
+        self.assertEqual(gate_chain.chain[-1].gate.name, "Measure")
+        # ISWAP has no OPENQASM gate, the circuit is converted through Cirq's QASM export
+        qasm = circuit_object.to_qasm()
+        self.assertEqual(gate_chain.to_qasm(), GateChain.from_qasm_list_of_lines(qasm.split("\n")).to_qasm())
+
+    def test_pytket(self):
+        import pytket.qasm as pyqasm
+
+        gate_chain = _random_chain()
+        circuit_object = gate_chain.convert_to("pytket")
+        self.assertEqual(circuit_object, pyqasm.circuit_from_qasm_str(gate_chain.to_qasm(qreg_name="q")))
+        back = GateChain.convert_from(circuit_object, "pytket")
+        # Pytket orders commands topologically
+        self.assertEqual(back.get_gate_count(), gate_chain.get_gate_count())
+        self.assertAlmostEqual(unitary_fidelity(back.matrix, gate_chain.matrix), 1.0)
+
+    def test_gate_table_round_trip(self):
+        rng = np.random.default_rng(2)
+        for name, cls in qasm_gate_table.items():
+            hw = hardware_by_name(
+                {
+                    "gate_set_class": "FullGateSet",
+                    "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": cls.num_qubits}},
+                }
+            )
+            gate_chain = GateChain(hw)
+            gate_chain.add_gate(cls(*rng.uniform(-np.pi, np.pi, cls.num_angles)), list(range(cls.num_qubits)))
+            for format_id in ["qiskit", "cirq", "pytket"]:
+                with self.subTest(gate=name, format_id=format_id):
+                    back = GateChain.convert_from(gate_chain.convert_to(format_id), format_id)
+                    self.assertEqual(back.quantum_hardware.num_qubits, cls.num_qubits)
+                    self.assertAlmostEqual(unitary_fidelity(back.matrix, gate_chain.matrix), 1.0)
+
+    def test_cirq_parser_unavailable(self):
+        from cirq.contrib.qasm_import import circuit_from_qasm
+
+        # The direct conversion uses the gate table of the Cirq QASM importer, which isn't a public API
+        with mock.patch.dict(sys.modules, {"cirq.contrib.qasm_import._parser": None}):
+            self.assertIsNone(CirqGateChainConverter._qelib_gates())
+        gate_chain = _random_chain()
+        with mock.patch.object(CirqGateChainConverter, "_qelib_gates", return_value=None):
+            circuit_object = gate_chain.convert_to("cirq")
+        self.assertEqual(circuit_object, circuit_from_qasm(gate_chain.to_qasm(qreg_name="q")))
+
+    def test_registered(self):
+        for converter in [QiskitGateChainConverter, CirqGateChainConverter, PytketGateChainConverter]:
+            self.assertIs(GateChain.converters[converter.format_id], converter)
+
+
+if __name__ == "__main__":
+    unittest.main()
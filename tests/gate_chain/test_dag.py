@@ -0,0 +1,103 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+from functools import partial
+
+import numpy as np
+
+from arline_quantum.gate_chain.dag import GateChainDag
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.gate_connection import GateConnection
+from arline_quantum.gates import gate_by_name
+from arline_quantum.gates.measure import Measure
+from arline_quantum.utils.fidelity import unitary_fidelity
+
+from tests.gate_chain.utils import random_chain
+
+
+_random_chain = partial(random_chain, ["U3", "H", "Rz", "Cnot", "Cz"], 4, 50)
+
+
+class TestGateChainDag(unittest.TestCase):
+    def test_build(self):
+        gate_chain = _random_chain()
+        gate_chain.add_gate(Measure(), [1], cregs=[3], force_connection=True)
+        dag = GateChainDag(gate_chain)
+        self.assertEqual(len(dag), len(gate_chain))
+        last = {}
+        for i, el in enumerate(gate_chain.chain):
+            wires = list(el.connections) + [4 + c for c in el.cregs]
+            self.assertEqual(dag.wires(i), wires)
+            self.assertEqual(dag.predecessors(i), [last.get(w, -1) for w in wires])
+            for w in wires:
+                if w in last:
+                    self.assertEqual(dag.successor(last[w], w), i)
+                last[w] = i
+        self.assertEqual(dag.last, [last.get(w, -1) for w in range(8)])
+        self.assertEqual(list(dag.topological_order())[: len(dag.front_layer())], dag.front_layer())
+        self.assertEqual(dag.to_gate_chain().to_qasm(), gate_chain.to_qasm())
+        offsets, wires, prev, _ = dag.predecessor_arrays()
+        self.assertEqual(len(offsets), len(gate_chain) + 1)
+        self.assertEqual(len(wires), len(prev))
+
+    def test_rewrite(self):
+        gate_chain = _random_chain()
+        hw = gate_chain.quantum_hardware
+        dag = GateChainDag(gate_chain)
+        first = gate_chain.chain[0]
+        dag.replace_node(0, GateConnection(hw, first.gate.dagger(), first.connections))
+        for node in [5, 17, 30]:
+            dag.remove_node(node)
+        self.assertEqual(len(dag), len(gate_chain) - 3)
+        with self.assertRaises(ValueError):
+            dag.remove_node(17)
+        self.assertEqual(len(dag), len(gate_chain) - 3)
+
+        reference = GateChain(hw)
+        for k, el in enumerate(gate_chain.chain):
+            if k == 0:
+                reference.add_gate(el.gate.dagger(), el.connections)
+            elif k not in (5, 17, 30):
+                reference.add_gate(el.gate, el.connections)
+        result = dag.to_gate_chain()
+        self.assertEqual(len(result), len(reference))
+        self.assertAlmostEqual(unitary_fidelity(result.matrix, reference.matrix), 1.0)
+
+    def test_exchange(self):
+        hw = _random_chain().quantum_hardware
+        rz, cnot, x = gate_by_name("Rz")(0.3), gate_by_name("Cnot")(), gate_by_name("X")()
+        gate_chain = GateChain(hw)
+        for gate, conn in [(x, [2]), (rz, [0]), (cnot, [0, 1]), (x, [1])]:
+            gate_chain.add_gate(gate, conn)
+        dag = GateChainDag(gate_chain)
+        self.assertEqual(dag.front_layer(), [0, 1])
+        # Rz on the control commutes with Cnot
+        dag.exchange(1, 2)
+        self.assertEqual(dag.first[0], 2)
+        self.assertEqual(dag.predecessors(1), [2])
+        self.assertEqual(dag.successors(2), [1, 3])
+        self.assertEqual(dag.front_layer(), [0, 2])
+        result = dag.to_gate_chain()
+        self.assertEqual([str(el) for el in result.chain][:2], [str(gate_chain.chain[0]), str(gate_chain.chain[2])])
+        self.assertAlmostEqual(unitary_fidelity(result.matrix, gate_chain.matrix), 1.0)
+        with self.assertRaises(ValueError):
+            dag.exchange(0, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+
+import numpy as np
+
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.density_matrix import DensityMatrixSimulator, NoiseModel
+from arline_quantum.estimators import CalibratedFidelityEstimator, DensityMatrixFidelityEstimator
+from arline_quantum.gates.ccnot import Ccnot
+from arline_quantum.gates.cnot import Cnot
+from arline_quantum.gates.h import H
+from arline_quantum.gates.measure import Measure
+from arline_quantum.gates.u3 import U3
+from arline_quantum.gates.x import X
+from arline_quantum.hardware import hardware_by_name
+from arline_quantum.hardware.calibration import CalibrationTable
+
+
+def all2all_hardware(num_qubits, calibration=None):
+    cfg = {
+        "gate_set": ["U3", "H", "X", "Cnot", "Ccnot"],
+        "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": num_qubits}},
+    }
+    if calibration is not None:
+        cfg["calibration"] = calibration
+    return hardware_by_name(cfg)
+
+
+def random_chain(hw, num_gates, seed=0):
+    rng = np.random.default_rng(seed)
+    chain = GateChain(hw)
+    for _ in range(num_gates):
+        qubits = rng.choice(hw.num_qubits, 3, replace=False).tolist()
+        kind = rng.integers(3)
+        if kind == 0:
+            chain.add_gate(U3(*rng.random(3)), qubits[:1])
+        elif kind == 1:
+            chain.add_gate(Cnot(), qubits[:2])
+        else:
+            chain.add_gate(Ccnot(), qubits)
+    return chain
+
+
+class TestDensityMatrixSimulator(unittest.TestCase):
+    def test_noiseless(self):
+        chain = random_chain(all2all_hardware(4), 40)
+        rho = DensityMatrixSimulator().run(chain)
+        psi = chain.matrix[:, 0]
+        np.testing.assert_allclose(rho, np.outer(psi, psi.conj()), atol=1e-12)
+
+    def test_noisy(self):
+        hw = all2all_hardware(4)
+        hw.calibration = CalibrationTable.from_hardware(hw)
+        hw.calibration.t1[:] = [50, 60, 70, 80]
+        hw.calibration.t2[:] = [40, 30, 60, 90]
+        hw.calibration.single_qubit_gate_time = 0.05
+        hw.calibration.two_qubit_gate_time = 0.3
+        chain = random_chain(hw, 40)
+        chain.add_gate(Measure(), [2], [2])
+        rho = DensityMatrixSimulator(NoiseModel(hw)).run(chain)
+        self.assertAlmostEqual(np.trace(rho).real, 1)
+        np.testing.assert_allclose(rho, rho.conj().T, atol=1e-12)
+        self.assertGreater(np.linalg.eigvalsh(rho).min(), -1e-12)
+        np.testing.assert_allclose(DensityMatrixSimulator(NoiseModel(hw), batch_qubits=1).run(chain), rho, atol=1e-12)
+
+    def test_channels(self):
+        t1, t2, time = 50.0, 40.0, 0.3
+        calibration = CalibrationTable(
+            2,
+            edges=[(0, 1)],
+            t1=[t1, t1],
+            t2=[t2, t2],
+            two_qubit_error=[0.02],
+            single_qubit_gate_time=time,
+            two_qubit_gate_time=time,
+        )
+        hw = all2all_hardware(2, calibration)
+        chain = GateChain(hw)
+        chain.add_gate(X(), [1])
+        chain.add_gate(H(), [0])
+        simulator = DensityMatrixSimulator(NoiseModel(hw))
+        rho = simulator.run(chain).reshape(2, 2, 2, 2)
+        # Qubit 1 is the most significant
+        self.assertAlmostEqual(np.einsum("ii->", rho[1, :, 1, :]).real, np.exp(-time / t1))
+        self.assertAlmostEqual(2 * abs(np.einsum("ii->", rho[:, 0, :, 1])), np.exp(-time / t2))
+
+        chain = GateChain(hw)
+        chain.add_gate(Cnot(), [0, 1])
+        rho = DensityMatrixSimulator(NoiseModel(hw, idle_noise=False)).run(chain)
+        self.assertAlmostEqual(rho[0, 0].real, 0.98)
+
+        calibration.readout_error[:] = [0.1, 0.2]
+        probs = simulator.probabilities(np.diag([1.0, 0, 0, 0]))
+        np.testing.assert_allclose(probs, [0.9 * 0.8, 0.1 * 0.8, 0.9 * 0.2, 0.1 * 0.2])
+
+    def test_estimator(self):
+        calibration = {"single_qubit_error": [1e-3] * 5, "edges": [[0, 1], [1, 2]], "two_qubit_error": [0.02, 0.03]}
+        hw = hardware_by_name(
+            {
+                "gate_set": ["H", "Cnot"],
+                "qubit_connectivity": {"class": "Line", "args": {"num_qubits": 5}},
+                "calibration": calibration,
+            }
+        )
+        chain = GateChain(hw)
+        chain.add_gate(Cnot(), [1, 2])
+        estimator = DensityMatrixFidelityEstimator()
+        self.assertAlmostEqual(estimator.calculate_cost(chain), -np.log(0.97))
+        self.assertAlmostEqual(estimator.calculate_cost(chain), CalibratedFidelityEstimator().calculate_cost(chain))
+        chain.add_gate(H(), [0])
+        chain.add_gate(Cnot(), [0, 1])
+        self.assertGreater(estimator.calculate_cost(chain), 0)
+        self.assertEqual(estimator.calculate_cost(GateChain(hw)), 0)
+
+    def test_estimator_noiseless_measure(self):
+        hw = all2all_hardware(3)
+        hw.single_qubit_gate_fidelity = hw.two_qubit_gate_fidelity = 1
+        chain = GateChain(hw)
+        for q in range(3):
+            chain.add_gate(H(), [q])
+        for q in range(3):
+            chain.add_gate(Measure(), [q], [q])
+        # Non-selective measurements don't count as noise
+        self.assertAlmostEqual(DensityMatrixFidelityEstimator().calculate_cost(chain), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
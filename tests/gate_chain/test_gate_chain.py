@@ -15,12 +15,16 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
+import subprocess
+import sys
 import unittest
 from os import path
 import numpy as np
 
 from arline_quantum.gates import gate_by_name
+from arline_quantum.gate_chain.fingerprint import gate_class_id
 from arline_quantum.gate_chain.gate_chain import GateChain, NoQubitConnectionError
+from arline_quantum.gates.measure import Measure
 from arline_quantum.hardware import hardware_by_name
 from arline_quantum.utils.fidelity import unitary_fidelity
 
@@ -204,6 +208,196 @@ class TestGateChain(unittest.TestCase):
         gate_chain.add_gate(cnot, [0, 1])  # Apply CNOT gate to qubits 0 and 1
         gate_chain.add_gate(cnot, [1, 0])  # Apply CNOT gate to qubits 1 and 0
 
+    def test_to_qasm(self):
+        hw = hardware_by_name(
+            {"gate_set_class": "FullGateSet", "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 3}}}
+        )
+        gate_chain = GateChain(hw)
+        for name, conn in [("U3", [0]), ("Cnot", [2, 0]), ("Rx(pi/2)", [1]), ("Cu3", [1, 2]), ("H", [2]), ("U3", [1])]:
+            cls = gate_by_name(name)
+            gate_chain.add_gate(cls(*np.linspace(-np.pi, 0.3, cls.num_angles)), conn)
+        gate_chain.add_gate(Measure(), [1], cregs=[2], force_connection=True)
+        qasm = gate_chain.to_qasm(qreg_name="qr", creg_name="cr")
+        lines = [el.to_qasm("qr", "cr") for el in gate_chain.chain]
+        self.assertTrue(qasm.endswith("creg cr[3];\n" + "\n".join(lines) + "\n"))
+        self.assertEqual(lines[-1], "measure qr[1] -> cr[2];")
+        self.assertEqual(lines[1], "cx qr[2], qr[0];")
+        self.assertEqual(GateChain.from_qasm_string(qasm).to_qasm(qreg_name="qr", creg_name="cr"), qasm)
+
+    def test_fingerprint(self):
+        hw = hardware_by_name(
+            {"gate_set_class": "FullGateSet", "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 3}}}
+        )
+        rng = np.random.default_rng(0)
+        names = ["H", "Cnot", "U3", "Rz", "Swap"]
+
+        def random_gate():
+            cls = gate_by_name(names[rng.integers(len(names))])
+            return cls(*rng.uniform(-np.pi, np.pi, cls.num_angles)), rng.permutation(3)[: cls.num_qubits].tolist()
+
+        gate_chain = GateChain(hw)
+        for _ in range(10):
+            gate_chain.add_gate(*random_gate())
+        gate_chain.fingerprint()
+        for _ in range(60):
+            action = rng.integers(4)
+            if action == 0:
+                gate_chain.add_gate(*random_gate())
+            elif action == 1:
+                gate_chain.add_gate_left(*random_gate())
+            elif action == 2:
+                gate_chain.insert_gate(*random_gate(), position=int(rng.integers(0, len(gate_chain) + 1)))
+            else:
+                gate_chain.delete_gate(int(rng.integers(len(gate_chain))))
+            reference = GateChain(hw)
+            reference.chain.extend(gate_chain.chain)
+            self.assertEqual(gate_chain.fingerprint(), reference.fingerprint())
+            self.assertEqual(gate_chain.structural_fingerprint(), reference.structural_fingerprint())
+        self.assertEqual(gate_chain.copy().fingerprint(), gate_chain.fingerprint())
+
+        shifted = GateChain(hw)
+        for el in gate_chain.chain:
+            gate = el.gate
+            if gate.args:
+                gate = type(gate)(*(a + 0.1 for a in gate.args))
+            shifted.add_gate(gate, el.connections)
+        self.assertNotEqual(shifted.fingerprint(), gate_chain.fingerprint())
+        self.assertEqual(shifted.structural_fingerprint(), gate_chain.structural_fingerprint())
+        self.assertNotEqual(gate_chain.dagger().structural_fingerprint(), gate_chain.structural_fingerprint())
+
+        u3 = gate_by_name("U3")
+        permuted = [GateChain(hw) for _ in range(2)]
+        permuted[0].add_gate(u3(0.1, 0.2, 0.3), [0])
+        permuted[1].add_gate(u3(0.3, 0.2, 0.1), [0])
+        self.assertNotEqual(permuted[0].fingerprint(), permuted[1].fingerprint())
+        same_name = type(u3.__name__, (u3,), {"__module__": __name__})
+        self.assertEqual(same_name.__name__, u3.__name__)
+        self.assertNotEqual(gate_class_id(same_name), gate_class_id(u3))
+
+    def test_insert_gate_front(self):
+        hw = hardware_by_name(
+            {"gate_set_class": "FullGateSet", "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 2}}}
+        )
+        gate_chain = GateChain(hw)
+        gate_chain.add_gate(gate_by_name("Cnot")(), [0, 1])
+        gate_chain.insert_gate(gate_by_name("H")(), [0], 0)
+        reference = GateChain(hw)
+        reference.add_gate(gate_by_name("H")(), [0])
+        reference.add_gate(gate_by_name("Cnot")(), [0, 1])
+        self.assertEqual(gate_chain.chain[0].cregs, [])
+        self.assertEqual(gate_chain.fingerprint(), reference.fingerprint())
+        self.assertEqual(gate_chain.convert_to("qiskit").count_ops(), {"h": 1, "cx": 1})
+        self.assertEqual(gate_chain.get_depth(), 2)
+
+    def test_convert_to_cache(self):
+        hw = hardware_by_name(
+            {"gate_set_class": "FullGateSet", "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 2}}}
+        )
+        gate_chain = GateChain(hw)
+        gate_chain.add_gate(gate_by_name("H")(), [0])
+        circuit_object = gate_chain.convert_to("qiskit", use_cache=True)
+        self.assertIs(gate_chain.convert_to("qiskit", use_cache=True), circuit_object)
+        self.assertIsNot(gate_chain.convert_to("qiskit"), circuit_object)
+        gate_chain.convert_to("qiskit").h(1)
+        self.assertEqual(gate_chain.convert_to("qiskit").count_ops(), {"h": 1})
+        gate_chain.add_gate(gate_by_name("Cnot")(), [0, 1])
+        self.assertEqual(gate_chain.get_depth(), 2)
+        self.assertIsNot(gate_chain.convert_to("qiskit", use_cache=True), circuit_object)
+        gate_chain.chain[1] = gate_chain.chain[0]
+        gate_chain.invalidate_caches()
+        self.assertEqual(gate_chain.get_depth(), 2)
+        self.assertEqual(gate_chain.convert_to("qiskit", use_cache=True).count_ops(), {"h": 2})
+
+    def test_slice_view(self):
+        hw = hardware_by_name(
+            {"gate_set_class": "FullGateSet", "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 3}}}
+        )
+        gate_chain = GateChain(hw)
+        for k in range(20):
+            gate_chain.add_gate(gate_by_name("Rz")(0.1 * k), [k % 3])
+        gate_chain.add_gate_left(gate_by_name("H")(), [0])
+        view = gate_chain[5:12]
+        self.assertIsInstance(view, GateChain)
+        self.assertEqual(len(view), 7)
+        self.assertEqual([el.gate.args[0] for el in view], [0.1 * k for k in range(4, 11)])
+        self.assertIs(view[0], gate_chain[5])
+        view.add_gate(gate_by_name("X")(), [1])
+        view.delete_gate(0)
+        self.assertEqual(len(gate_chain), 21)
+        self.assertEqual(gate_chain[5].gate.args[0], 0.4)
+        self.assertEqual(view[-1].gate.name, "X")
+        np.testing.assert_allclose(gate_chain.copy().matrix, gate_chain.matrix)
+
+    def test_copy_on_write(self):
+        hw = hardware_by_name(
+            {"gate_set_class": "FullGateSet", "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 2}}}
+        )
+        gate_chain = GateChain(hw)
+        for k in range(50):
+            gate_chain.add_gate(gate_by_name("Rz")(0.1 * k), [k % 2])
+        gate_chain.add_gate(gate_by_name("Cnot")(), [0, 1])
+        matrix = gate_chain.matrix
+        candidates = [gate_chain.copy() for _ in range(3)]
+        self.assertIs(candidates[0]._matrix, gate_chain._matrix)
+        for c, name in zip(candidates, ["H", "X", "Cnot"]):
+            c.add_gate(gate_by_name(name)(), [0] if name != "Cnot" else [1, 0])
+            c.add_gate_left(gate_by_name("S")(), [1])
+            self.assertEqual(len(c), 53)
+            reference = GateChain(hw)
+            for el in c:
+                reference.add_gate(el.gate, el.connections)
+            np.testing.assert_allclose(c.matrix, reference.matrix, atol=1e-10)
+        self.assertEqual(len(gate_chain), 51)
+        np.testing.assert_allclose(gate_chain.matrix, matrix)
+
+    def test_block_unitary(self):
+        hw = hardware_by_name(
+            {"gate_set_class": "FullGateSet", "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 53}}}
+        )
+        local_hw = hardware_by_name(
+            {"gate_set_class": "FullGateSet", "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 3}}}
+        )
+        rng = np.random.default_rng(0)
+        gate_chain = GateChain(hw)
+        gate_chain.add_gate(gate_by_name("H")(), [0])
+        local_chain = GateChain(local_hw)
+        qubits = [40, 7, 12]
+        for _ in range(30):
+            name = ["U3", "Cnot", "Ccnot"][rng.integers(3)]
+            conn = rng.choice(3, gate_by_name(name).num_qubits, replace=False).tolist()
+            gate = gate_by_name(name)(*rng.uniform(-np.pi, np.pi, gate_by_name(name).num_angles))
+            gate_chain.add_gate(gate, [qubits[q] for q in conn])
+            local_chain.add_gate(gate, conn)
+        gate_chain.add_gate(gate_by_name("Cnot")(), [0, 40])
+
+        u = gate_chain.block_unitary(1, -1, qubits)
+        np.testing.assert_allclose(u, local_chain._calculate_matrix(), atol=1e-10)
+        self.assertFalse(u.flags.writeable)
+        # Memoized by content, modifications of other gates keep the result
+        gate_chain.add_gate_left(gate_by_name("X")(), [1])
+        self.assertIs(gate_chain.block_unitary(2, 32, qubits), u)
+        self.assertIs(gate_chain.copy()[2:32].block_unitary(qubits=qubits), u)
+        self.assertEqual(gate_chain.block_unitary(0, 2).shape, (4, 4))
+        with self.assertRaises(ValueError):
+            gate_chain.block_unitary(2, 33, qubits)
+
+    def test_lazy_imports(self):
+        code = (
+            "import sys\n"
+            "from arline_quantum.gate_chain.gate_chain import GateChain\n"
+            "from arline_quantum.hardware import hardware_by_name\n"
+            "gate_chain = GateChain.from_qasm_list_of_lines(\n"
+            "    ['OPENQASM 2.0;', 'include \"qelib1.inc\";', 'qreg q[2];', 'h q[0];', 'cx q[0],q[1];']\n"
+            ")\n"
+            "hw = hardware_by_name(\n"
+            "    {'gate_set': ['Cnot', 'H'], 'qubit_connectivity': {'class': 'All2All', 'args': {'num_qubits': 2}}}\n"
+            ")\n"
+            "print(gate_chain.to_qasm(), hw.name)\n"
+            "print(sorted(m for m in ('qiskit', 'cirq', 'pytket', 'networkx', 'sympy') if m in sys.modules))\n"
+        )
+        out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+        self.assertEqual(out.strip().splitlines()[-1], "[]")
+
 
 if __name__ == "__main__":
     unittest.main()
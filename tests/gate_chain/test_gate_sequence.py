@@ -0,0 +1,108 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import pickle
+import unittest
+from copy import copy
+
+import numpy as np
+
+from arline_quantum.gate_chain.gate_sequence import GateSequence
+
+
+class TestGateSequence(unittest.TestCase):
+    def test_random_operations(self):
+        rng = np.random.default_rng(0)
+        sequence, reference = GateSequence(), []
+        views = []
+        for step in range(2000):
+            op = rng.integers(8)
+            n = len(reference)
+            if op == 0:
+                sequence.append(step)
+                reference.append(step)
+            elif op == 1:
+                sequence.appendleft(step)
+                reference.insert(0, step)
+            elif op == 2:
+                i = int(rng.integers(n + 1))
+                sequence.insert(i, step)
+                reference.insert(i, step)
+            elif op == 3 and n:
+                i = int(rng.integers(n))
+                del sequence[i]
+                del reference[i]
+            elif op == 4 and n:
+                i = int(rng.integers(-n, n))
+                self.assertEqual(sequence[i], reference[i])
+                sequence[i] = step
+                reference[i] = step
+            elif op == 5:
+                a, b = sorted(rng.integers(n + 1, size=2).tolist())
+                views.append((sequence[a:b], reference[a:b]))
+            elif op == 6:
+                views.append((copy(sequence), list(reference)))
+            elif op == 7 and views:
+                view, view_reference = views[rng.integers(len(views))]
+                view.appendleft(step)
+                view.append(step)
+                view_reference[:] = [step] + view_reference + [step]
+            self.assertEqual(len(sequence), len(reference))
+        self.assertEqual(list(sequence), reference)
+        self.assertEqual(list(reversed(sequence)), reference[::-1])
+        self.assertEqual(list(sequence[::3]), reference[::3])
+        for view, view_reference in views:
+            self.assertEqual(list(view), view_reference)
+            self.assertEqual(list(reversed(view)), view_reference[::-1])
+
+    def test_shared_storage(self):
+        sequence = GateSequence(range(100))
+        sequence.appendleft(-1)
+        view = sequence[2:60]
+        self.assertIs(view._root, sequence._root)
+        self.assertEqual(list(view), list(range(1, 59)))
+        # Copies share the storage and append independently
+        copies = [copy(sequence) for _ in range(3)]
+        for k, c in enumerate(copies):
+            c.append(1000 + k)
+            c.appendleft(-1000 - k)
+            self.assertIs(c._root, sequence._root)
+        sequence.append(100)
+        for k, c in enumerate(copies):
+            self.assertEqual(list(c), [-1000 - k, -1] + list(range(100)) + [1000 + k])
+        self.assertEqual(list(sequence), [-1] + list(range(101)))
+        view[0] = 100
+        self.assertEqual(sequence[2], 1)
+        self.assertEqual(view[0], 100)
+        restored = pickle.loads(pickle.dumps(view))
+        self.assertEqual(restored, view)
+        self.assertEqual(len(restored), 58)
+
+    def test_large(self):
+        sequence = GateSequence()
+        for k in range(40000):
+            sequence.append(k)
+        self.assertEqual(sequence[33333], 33333)
+        self.assertEqual(list(sequence[1000:1040]), list(range(1000, 1040)))
+        self.assertEqual(list(GateSequence(range(40000))), list(sequence))
+        sequence[20000] = -1
+        self.assertEqual(sequence[20000], -1)
+        self.assertEqual(sum(1 for _ in sequence), 40000)
+
+
+if __name__ == "__main__":
+    unittest.main()
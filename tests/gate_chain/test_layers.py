@@ -0,0 +1,99 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+from functools import partial
+
+import numpy as np
+
+from arline_quantum.estimators.estimators import DepthCostEstimator
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.layers import Layers
+from arline_quantum.gates import gate_by_name
+from arline_quantum.gates.barrier import Barrier
+from arline_quantum.hardware import hardware_by_name
+
+from tests.gate_chain.utils import random_chain
+
+
+_random_chain = partial(random_chain, ["U3", "H", "Cnot", "Cz", "Ccnot"], 5, 60, barrier_every=17, measure_every=13)
+
+
+class TestLayers(unittest.TestCase):
+    def _check_schedule(self, gate_chain, layers):
+        # Gates sharing a qubit or a classical bit are placed in increasing layers
+        last = {}
+        for i, el in enumerate(gate_chain.chain):
+            wires = list(el.connections) + [("c", c) for c in el.cregs]
+            if isinstance(el.gate, Barrier):
+                self.assertEqual(layers.levels[i], -1)
+                continue
+            for w in wires:
+                if w in last:
+                    self.assertGreater(layers.levels[i], last[w])
+                last[w] = layers.levels[i]
+        placed = np.sort(np.concatenate(layers.layers))
+        np.testing.assert_array_equal(placed, np.flatnonzero(layers.levels >= 0))
+        for k, layer in enumerate(layers):
+            self.assertTrue(np.all(layers.levels[layer] == k))
+
+    def test_depth(self):
+        for seed in range(5):
+            gate_chain = _random_chain(seed=seed)
+            asap, alap = gate_chain.layers("asap"), gate_chain.layers("alap")
+            self.assertEqual(asap.depth, gate_chain.convert_to("qiskit").depth())
+            self.assertEqual(alap.depth, asap.depth)
+            self.assertTrue(np.all(alap.levels >= asap.levels))
+            self._check_schedule(gate_chain, asap)
+            self._check_schedule(gate_chain, alap)
+
+    def test_cache(self):
+        gate_chain = _random_chain()
+        layers = gate_chain.layers()
+        self.assertIs(gate_chain.layers(), layers)
+        gate_chain.add_gate(gate_by_name("H")(), [0])
+        self.assertIsNot(gate_chain.layers(), layers)
+        self.assertEqual(len(gate_chain.layers().levels), len(gate_chain))
+        with self.assertRaises(ValueError):
+            gate_chain.layers("middle")
+
+    def test_idle_layers(self):
+        hw = hardware_by_name(
+            {"gate_set_class": "FullGateSet", "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 3}}}
+        )
+        h, cnot = gate_by_name("H")(), gate_by_name("Cnot")()
+        gate_chain = GateChain(hw)
+        for gate, conn in [(h, [0]), (h, [0]), (h, [1]), (cnot, [0, 1]), (h, [0])]:
+            gate_chain.add_gate(gate, conn)
+        asap, alap = gate_chain.layers("asap"), gate_chain.layers("alap")
+        self.assertEqual([list(layer) for layer in asap], [[0, 2], [1], [3], [4]])
+        self.assertEqual([list(layer) for layer in alap], [[0], [1, 2], [3], [4]])
+        np.testing.assert_array_equal(asap.qubit_busy_layers(), [4, 2, 0])
+        np.testing.assert_array_equal(asap.qubit_idle_layers(), [0, 2, 4])
+        np.testing.assert_array_equal(asap.qubit_idle_layers(active_only=True), [0, 1, 0])
+        np.testing.assert_array_equal(alap.qubit_idle_layers(active_only=True), [0, 0, 0])
+        self.assertEqual(len(Layers([], 2)), 0)
+
+    def test_depth_cost_estimator(self):
+        gate_chain = _random_chain()
+        self.assertEqual(DepthCostEstimator().calculate_cost(gate_chain), gate_chain.get_depth())
+        cnot_depth = gate_chain.get_depth_by_gate_type(["Cnot"])
+        self.assertEqual(DepthCostEstimator(["Cnot"]).calculate_cost(gate_chain), cnot_depth)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+
+import numpy as np
+
+from arline_quantum.gates import Cnot, H
+from arline_quantum.gate_chain.cnot_resynthesis import CnotResynthesisOptimizer
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.parity_matrix import ParityMatrix, long_range_cnot, synthesize_cnot_circuit
+from arline_quantum.hardware import hardware_by_name
+from arline_quantum.qubit_connectivities.qubit_connectivity import Line
+from arline_quantum.utils.fidelity import unitary_fidelity
+
+
+def make_hardware(num_qubits, connectivity="All2All"):
+    return hardware_by_name(
+        {
+            "gate_set": ["Cnot", "H"],
+            "qubit_connectivity": {"class": connectivity, "args": {"num_qubits": num_qubits}},
+        }
+    )
+
+
+def random_parity_matrix(num_qubits, num_cnots, rng):
+    parity_matrix = ParityMatrix(num_qubits)
+    for _ in range(num_cnots):
+        c, t = rng.choice(num_qubits, 2, replace=False)
+        parity_matrix.add_row(c, t)
+    return parity_matrix
+
+
+def cnots_parity_matrix(num_qubits, cnots):
+    parity_matrix = ParityMatrix(num_qubits)
+    for c, t in cnots:
+        parity_matrix.add_row(c, t)
+    return parity_matrix
+
+
+class TestParityMatrix(unittest.TestCase):
+    def test_gate_chain_parity_matrix(self):
+        gate_chain = GateChain(make_hardware(3))
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(Cnot(), [1, 2])
+        expected = np.array([[1, 0, 0], [1, 1, 0], [1, 1, 1]])
+        np.testing.assert_array_equal(gate_chain.cnot_parity_matrix(), expected)
+        gate_chain.add_gate(H(), [0])
+        with self.assertRaises(ValueError):
+            gate_chain.cnot_parity_matrix()
+
+    def test_inverse_and_rank(self):
+        rng = np.random.RandomState(0)
+        parity_matrix = random_parity_matrix(100, 500, rng)
+        self.assertEqual(parity_matrix @ parity_matrix.inverse(), ParityMatrix(100))
+        singular = ParityMatrix.from_array([[1, 1, 0], [0, 1, 1], [1, 0, 1]])
+        self.assertEqual(singular.rank(), 2)
+        with self.assertRaises(ValueError):
+            singular.inverse()
+
+    def test_synthesis(self):
+        rng = np.random.RandomState(1)
+        for n in [2, 5, 16, 70]:
+            parity_matrix = random_parity_matrix(n, 10 * n, rng)
+            cnots = synthesize_cnot_circuit(parity_matrix)
+            self.assertEqual(cnots_parity_matrix(n, cnots), parity_matrix)
+            line = Line(n)
+            cnots = synthesize_cnot_circuit(parity_matrix, qubit_connectivity=line)
+            self.assertEqual(cnots_parity_matrix(n, cnots), parity_matrix)
+            self.assertTrue(all(line.check_connection([c, t]) for c, t in cnots))
+
+    def test_long_range_cnot(self):
+        cnots = long_range_cnot([0, 1, 2, 3])
+        self.assertEqual(len(cnots), 8)
+        expected = ParityMatrix(4)
+        expected.add_row(0, 3)
+        self.assertEqual(cnots_parity_matrix(4, cnots), expected)
+
+
+class TestCnotResynthesisOptimizer(unittest.TestCase):
+    def test_optimizer(self):
+        rng = np.random.RandomState(2)
+        n = 6
+        gate_chain = GateChain(make_hardware(n))
+        for _ in range(3):
+            for _ in range(60):
+                gate_chain.add_gate(Cnot(), list(rng.choice(n, 2, replace=False)))
+            gate_chain.add_gate(H(), [rng.randint(n)])
+        new_chain = CnotResynthesisOptimizer().run(gate_chain)
+        self.assertLess(len(new_chain), len(gate_chain))
+        np.testing.assert_almost_equal(unitary_fidelity(gate_chain.matrix, new_chain.matrix), 1)
+
+    def test_connectivity_aware(self):
+        rng = np.random.RandomState(3)
+        n = 5
+        gate_chain = GateChain(make_hardware(n, "Line"))
+        for _ in range(100):
+            q = rng.randint(n - 1)
+            gate_chain.add_gate(Cnot(), [q, q + 1] if rng.randint(2) else [q + 1, q])
+        new_chain = CnotResynthesisOptimizer(connectivity_aware=True).run(gate_chain)
+        self.assertLess(len(new_chain), len(gate_chain))
+        self.assertEqual(new_chain.check_connectivity(), [])
+        self.assertEqual(new_chain.cnot_parity_matrix().tolist(), gate_chain.cnot_parity_matrix().tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+import pickle
+import unittest
+
+import numpy as np
+
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gates import gate_by_name
+from arline_quantum.gates.barrier import Barrier
+from arline_quantum.gates.measure import Measure
+from arline_quantum.hardware import hardware_by_name
+from arline_quantum.utils.fidelity import unitary_fidelity
+
+from tests.gate_chain.utils import random_chain
+
+
+_names = ["U3", "H", "Rz", "Cnot", "Cz"]
+
+
+class TestPartition(unittest.TestCase):
+    def test_partition(self):
+        gate_chain = random_chain(_names + ["Ccnot"], 6, 120)
+        gate_chain.add_gate(Barrier(), [0, 1, 2], force_connection=True)
+        gate_chain.add_gate(Measure(), [1], cregs=[1])
+        gate_chain.add_gate(gate_by_name("H")(), [1])
+        for max_qubits, max_gates in [(2, None), (3, 5), (4, 20)]:
+            blocks = gate_chain.partition(max_qubits, max_gates)
+            indices = [i for block in blocks for i in block.indices]
+            self.assertEqual(sorted(indices), list(range(len(gate_chain))))
+            for block in blocks:
+                wide = len(block) == 1 and len(gate_chain[block.indices[0]].connections) > max_qubits
+                self.assertTrue(len(block.qubits) <= max_qubits or wide)
+                self.assertLessEqual(len(block), max_gates or len(gate_chain))
+            # Blocks are convex and in topological order: gates on every wire keep their order
+            last = {}
+            for i in indices:
+                el = gate_chain[i]
+                for w in list(el.connections) + [("c", c) for c in el.cregs]:
+                    self.assertLess(last.get(w, -1), i)
+                    last[w] = i
+        self.assertLess(len(gate_chain.partition(4, 20)), len(gate_chain) / 4)
+        self.assertEqual(len(gate_chain.partition(6)), 4)
+
+    def test_reassemble(self):
+        gate_chain = random_chain(_names, 6, 120, connectivity="Line")
+        blocks = gate_chain.partition(3, 10)
+        block_chains = []
+        for block in blocks:
+            block_chain = pickle.loads(pickle.dumps(gate_chain.extract_block(block)))
+            self.assertEqual(block_chain.quantum_hardware.num_qubits, len(block.qubits))
+            self.assertEqual(len(block_chain), len(block))
+            block_chains.append(block_chain.dagger().dagger())
+        assembled = GateChain.from_blocks(gate_chain.quantum_hardware, blocks, block_chains)
+        self.assertEqual(len(assembled), len(gate_chain))
+        np.testing.assert_almost_equal(unitary_fidelity(assembled.matrix, gate_chain.matrix), 1)
+
+    def test_strip_empty_qubits(self):
+        hw = hardware_by_name(
+            {"gate_set_class": "FullGateSet", "qubit_connectivity": {"class": "Line", "args": {"num_qubits": 6}}}
+        )
+        gate_chain = GateChain(hw)
+        gate_chain.add_gate(gate_by_name("Cnot")(), [1, 2])
+        gate_chain.add_gate(gate_by_name("H")(), [4])
+        stripped, remapping_dict = gate_chain.strip_empty_qubits()
+        self.assertEqual(remapping_dict, {1: 0, 2: 1, 4: 2})
+        self.assertEqual(stripped.quantum_hardware.num_qubits, 3)
+        self.assertEqual(stripped.quantum_hardware.qubit_connectivity.connections_list, [(0, 1), (1, 0)])
+        self.assertEqual([el.connections for el in stripped], [[0, 1], [2]])
+        stripped, remapping_dict = gate_chain.strip_empty_qubits(num_qubits=4)
+        self.assertEqual(remapping_dict, {1: 0, 2: 1, 3: 2, 4: 3})
+        self.assertEqual(len(stripped.quantum_hardware.qubit_connectivity.connections_list), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+
+import numpy as np
+
+from arline_quantum.gates import Cnot, Cz, H, Rx, Rz, S, Sd, T, Td, U3, Zz
+from arline_quantum.gates.measure import Measure
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.peephole_optimizer import PeepholeOptimizer
+from arline_quantum.hardware import hardware_by_name
+from arline_quantum.utils.fidelity import unitary_fidelity
+
+
+def make_hardware(num_qubits):
+    return hardware_by_name(
+        {
+            "gate_set": ["Cnot", "Cz", "H", "S", "Sd", "T", "Td", "Rx", "Rz", "U3", "Zz"],
+            "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": num_qubits}},
+        }
+    )
+
+
+class TestPeepholeOptimizer(unittest.TestCase):
+    def test_nested_cancellation(self):
+        gate_chain = GateChain(make_hardware(2))
+        gate_chain.add_gate(H(), [0])
+        gate_chain.add_gate(T(), [0])
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(Td(), [0])
+        gate_chain.add_gate(H(), [0])
+        gate_chain.add_gate(S(), [1])
+        gate_chain.add_gate(Sd(), [1])
+        new_chain = PeepholeOptimizer().run(gate_chain)
+        self.assertEqual(len(new_chain), 0)
+
+    def test_rotation_merging(self):
+        gate_chain = GateChain(make_hardware(2))
+        gate_chain.add_gate(Rz(0.3), [0])
+        gate_chain.add_gate(Rz(0.4), [0])
+        gate_chain.add_gate(Rx(0.5), [1])
+        gate_chain.add_gate(Rx(-0.5), [1])
+        gate_chain.add_gate(Zz(0.1), [0, 1])
+        gate_chain.add_gate(Zz(0.2), [1, 0])
+        gate_chain.add_gate(Rz(2 * np.pi), [1])
+        new_chain = PeepholeOptimizer().run(gate_chain)
+        self.assertEqual([el.gate.name for el in new_chain.chain], ["Rz", "Zz"])
+        np.testing.assert_almost_equal([el.gate.args[0] for el in new_chain.chain], [0.7, 0.3])
+        np.testing.assert_almost_equal(unitary_fidelity(gate_chain.matrix, new_chain.matrix), 1)
+
+    def test_no_cancellation_across_gates(self):
+        gate_chain = GateChain(make_hardware(2))
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(H(), [1])
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(Cnot(), [1, 0])
+        gate_chain.add_gate(Cz(), [0, 1])
+        gate_chain.add_gate(Cz(), [1, 0])
+        gate_chain.add_gate(Measure(), [0], cregs=[0])
+        gate_chain.add_gate(Rz(0.2), [0])
+        new_chain = PeepholeOptimizer().run(gate_chain)
+        self.assertEqual([el.gate.name for el in new_chain.chain], ["Cnot", "H", "Cnot", "Cnot", "Measure", "Rz"])
+
+    def test_random_chain_unitary(self):
+        np.random.seed(0)
+        num_qubits = 3
+        gate_chain = GateChain(make_hardware(num_qubits))
+        gates = [H, T, Td, S, Sd, Rz, Rx, Cnot, Cz, Zz, U3]
+        for _ in range(300):
+            g = gates[np.random.randint(len(gates))]
+            args = np.random.choice([0, np.pi / 4, -np.pi / 4, np.pi], g.num_angles)
+            conn = list(np.random.permutation(num_qubits)[:g.num_qubits])
+            gate_chain.add_gate(g(*args), conn)
+        new_chain = PeepholeOptimizer().run(gate_chain)
+        self.assertLess(len(new_chain), len(gate_chain))
+        np.testing.assert_almost_equal(unitary_fidelity(gate_chain.matrix, new_chain.matrix), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
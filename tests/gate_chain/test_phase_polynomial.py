@@ -0,0 +1,122 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from arline_quantum.gates import Cnot, H, S, Sd, T, Td, X, Z
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.phase_polynomial import PhaseFoldingOptimizer, PhasePolynomial
+from arline_quantum.hardware import hardware_by_name
+from arline_quantum.utils.fidelity import unitary_fidelity
+
+
+def make_hardware(num_qubits):
+    return hardware_by_name(
+        {
+            "gate_set": ["Cnot", "H", "S", "Sd", "T", "Td", "X", "Z"],
+            "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": num_qubits}},
+        }
+    )
+
+
+def t_count(gate_chain):
+    return sum(type(el.gate) in (T, Td) for el in gate_chain.chain)
+
+
+class TestPhasePolynomial(unittest.TestCase):
+    def test_terms(self):
+        gate_chain = GateChain(make_hardware(2))
+        gate_chain.add_gate(T(), [0])
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(T(), [1])
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(X(), [0])
+        gate_chain.add_gate(S(), [0])
+        polynomial = PhasePolynomial.from_gate_chain(gate_chain)
+        self.assertEqual(set(polynomial.terms), {0b01, 0b11})
+        np.testing.assert_almost_equal(polynomial.terms[0b01], np.pi / 4 - np.pi / 2)
+        np.testing.assert_almost_equal(polynomial.terms[0b11], np.pi / 4)
+        np.testing.assert_array_equal(polynomial.parity_matrix(), np.eye(2))
+        gate_chain.add_gate(H(), [0])
+        with self.assertRaises(ValueError):
+            PhasePolynomial.from_gate_chain(gate_chain)
+
+
+    def test_compaction(self):
+        polynomial = PhasePolynomial(2)
+        for _ in range(500):
+            polynomial.reset_qubits([1])
+            polynomial.apply_gate(Cnot(), [1, 0])
+            polynomial.apply_gate(T(), [0])
+        bound = 2 * 2 + PhasePolynomial.max_extra_variables
+        self.assertLessEqual(polynomial.num_variables, bound)
+        self.assertLessEqual(max(p.bit_length() for p in polynomial.parities), bound)
+        self.assertEqual(len(polynomial.angles), 500)
+        # Open terms are still merged after the compaction
+        term = polynomial.apply_gate(T(), [0])
+        self.assertEqual(term, 499)
+        np.testing.assert_almost_equal(polynomial.angles[term], np.pi / 2)
+
+
+class TestPhaseFoldingOptimizer(unittest.TestCase):
+    def test_merge_across_cnots(self):
+        gate_chain = GateChain(make_hardware(2))
+        gate_chain.add_gate(T(), [1])
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(T(), [1])
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(H(), [0])
+        gate_chain.add_gate(T(), [1])
+        new_chain = PhaseFoldingOptimizer().run(gate_chain)
+        self.assertEqual([el.gate.name for el in new_chain.chain], ["S", "Cnot", "T", "Cnot", "H"])
+        np.testing.assert_almost_equal(unitary_fidelity(gate_chain.matrix, new_chain.matrix), 1)
+
+    def test_random_clifford_t(self):
+        rng = np.random.RandomState(0)
+        gates = [Cnot, H, S, Sd, T, Td, X, Z, T, Td, Cnot]
+        n = 4
+        for _ in range(10):
+            gate_chain = GateChain(make_hardware(n))
+            for _ in range(120):
+                g = gates[rng.randint(len(gates))]
+                gate_chain.add_gate(g(), list(rng.choice(n, g.num_qubits, replace=False)))
+            new_chain = PhaseFoldingOptimizer().run(gate_chain)
+            self.assertLessEqual(t_count(new_chain), t_count(gate_chain))
+            self.assertEqual(new_chain.check_gate_set(), [])
+            np.testing.assert_almost_equal(unitary_fidelity(gate_chain.matrix, new_chain.matrix), 1)
+
+    def test_compaction(self):
+        rng = np.random.RandomState(1)
+        gates = [Cnot, H, T, Td, Cnot, X]
+        gate_chain = GateChain(make_hardware(3))
+        for _ in range(600):
+            g = gates[rng.randint(len(gates))]
+            gate_chain.add_gate(g(), list(rng.choice(3, g.num_qubits, replace=False)))
+        with mock.patch.object(PhasePolynomial, "max_extra_variables", len(gate_chain)):
+            reference = PhaseFoldingOptimizer().run(gate_chain)
+        with mock.patch.object(PhasePolynomial, "max_extra_variables", 2):
+            new_chain = PhaseFoldingOptimizer().run(gate_chain)
+        self.assertEqual([el.gate.name for el in new_chain.chain], [el.gate.name for el in reference.chain])
+        self.assertLess(t_count(new_chain), t_count(gate_chain))
+        np.testing.assert_almost_equal(unitary_fidelity(gate_chain.matrix, new_chain.matrix), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,11 +15,13 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
+import pickle
 import unittest
 from os import path
 import numpy as np
 
 from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.qasm_parser import QasmError
 
 
 class TestQasmParser(unittest.TestCase):
@@ -56,5 +58,16 @@ class TestQasmParser(unittest.TestCase):
         np.testing.assert_equal(lines_res, lines_ref)
 
 
+    def test_error_is_qiskit_error(self):
+        from qiskit.exceptions import QiskitError
+
+        lines = ["OPENQASM 2.0;", 'include "qelib1.inc";', "qreg q[1];", "foo q[0];"]
+        for error_class in [QasmError, QiskitError]:
+            with self.assertRaises(error_class):
+                GateChain.from_qasm_list_of_lines(lines)
+        error = pickle.loads(pickle.dumps(QasmError("Invalid", "gate")))
+        self.assertIsInstance(error, QiskitError)
+        self.assertEqual(error.msg, "Invalid gate")
+
 if __name__ == "__main__":
     unittest.main()
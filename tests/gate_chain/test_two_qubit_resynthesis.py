@@ -0,0 +1,121 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.linalg import expm
+from scipy.stats import unitary_group
+
+from arline_quantum.estimators.estimators import GateTypeCostEstimator
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_chain.two_qubit_resynthesis import (
+    TwoQubitResynthesisOptimizer,
+    num_cnots,
+    two_qubit_decompose,
+    two_qubit_gate_matrix,
+)
+from arline_quantum.gates import gate_by_name
+from arline_quantum.gates.cnot import Cnot
+from arline_quantum.gates.cz import Cz
+from arline_quantum.gates.measure import Measure
+from arline_quantum.gates.xx import Xx
+from arline_quantum.hardware import hardware_by_name
+from arline_quantum.utils.fidelity import unitary_fidelity
+
+
+def _canonical(a, b, c):
+    x, y, z = (np.array(p, dtype=complex) for p in ([[0, 1], [1, 0]], [[0, -1j], [1j, 0]], [[1, 0], [0, -1]]))
+    return expm(1j * (a * np.kron(x, x) + b * np.kron(y, y) + c * np.kron(z, z)))
+
+
+def _ops_matrix(ops):
+    matrix = np.eye(4, dtype=complex)
+    for g, conn in ops:
+        matrix = two_qubit_gate_matrix(g, conn) @ matrix
+    return matrix
+
+
+class TestTwoQubitResynthesis(unittest.TestCase):
+    def test_decompose(self):
+        local = np.kron(unitary_group.rvs(2, random_state=1), unitary_group.rvs(2, random_state=2))
+        cnot = two_qubit_gate_matrix(Cnot(), [1, 0])
+        mats = np.array(
+            [
+                local,
+                1j * np.eye(4),
+                local @ cnot,
+                local @ _canonical(np.pi / 4, np.pi / 4, 0),
+                _canonical(0.3, 0, 0.2) @ local,
+                two_qubit_gate_matrix(gate_by_name("Swap")(), [0, 1]),
+                _canonical(0.3, 0.2, -0.1),
+                unitary_group.rvs(4, random_state=3),
+            ]
+        )
+        expected = [0, 0, 1, 2, 2, 3, 3, 3]
+        np.testing.assert_array_equal(num_cnots(mats), expected)
+        for entangler in [Cnot, Cz, Xx]:
+            for ops, u, count in zip(two_qubit_decompose(mats, entangler), mats, expected):
+                self.assertEqual(sum(isinstance(g, entangler) for g, _ in ops), count)
+                self.assertAlmostEqual(abs(np.trace(_ops_matrix(ops).conj().T @ u)) / 4, 1)
+
+    def test_optimizer(self):
+        hw = hardware_by_name(
+            {"gate_set_class": "FullGateSet", "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 3}}}
+        )
+        rng = np.random.default_rng(0)
+        gate_chain = GateChain(hw)
+        for _ in range(40):
+            name = ["U3", "Cnot", "Cz", "H"][rng.integers(4)]
+            cls = gate_by_name(name)
+            qubits = [0, 1] if rng.random() < 0.8 else [1, 2]
+            conn = rng.permutation(qubits).tolist()[: cls.num_qubits]
+            gate_chain.add_gate(cls(*rng.uniform(-np.pi, np.pi, cls.num_angles)), conn)
+        gate_chain.add_gate(gate_by_name("Ccnot")(), [0, 1, 2])
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(Cnot(), [0, 1])
+
+        optimized = TwoQubitResynthesisOptimizer().run(gate_chain)
+        two_qubit = [el for el in optimized if el.gate.num_qubits == 2]
+        self.assertLess(len(two_qubit), sum(el.gate.num_qubits == 2 for el in gate_chain) // 2)
+        self.assertEqual(optimized[-1].gate.name, "Ccnot")
+        np.testing.assert_almost_equal(unitary_fidelity(optimized.matrix, gate_chain.matrix), 1)
+
+        with ThreadPoolExecutor(2) as executor:
+            estimator = GateTypeCostEstimator({"Cnot": 10, "Cz": 1})
+            optimizer = TwoQubitResynthesisOptimizer(Cz, estimator, executor=executor, chunk_size=1)
+            optimized_cz = optimizer.run(gate_chain)
+        self.assertEqual({el.gate.name for el in optimized_cz if el.gate.num_qubits >= 2}, {"Cz", "Ccnot"})
+        np.testing.assert_almost_equal(unitary_fidelity(optimized_cz.matrix, gate_chain.matrix), 1)
+
+    def test_keep_cheaper_blocks(self):
+        hw = hardware_by_name(
+            {"gate_set_class": "FullGateSet", "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 2}}}
+        )
+        gate_chain = GateChain(hw)
+        gate_chain.add_gate(gate_by_name("H")(), [0])
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(Measure(), [1], cregs=[1])
+        gate_chain.add_gate(Cnot(), [1, 0])
+        optimized = TwoQubitResynthesisOptimizer().run(gate_chain)
+        self.assertEqual(optimized.to_qasm(), gate_chain.to_qasm())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gates import gate_by_name
+from arline_quantum.gates.barrier import Barrier
+from arline_quantum.gates.measure import Measure
+from arline_quantum.hardware import hardware_by_name
+
+
+def random_chain(names, num_qubits, num_gates, seed=0, connectivity="All2All", barrier_every=None, measure_every=None):
+    """Random gate chain on FullGateSet hardware
+
+    :param names: names of gates to sample (see :func:`.gate_by_name`), angles are uniform in [-pi, pi)
+    :type names: list
+    :param num_qubits: number of qubits
+    :type num_qubits: int
+    :param num_gates: number of gates
+    :type num_gates: int
+    :param seed: random seed
+    :type seed: int
+    :param connectivity: qubit connectivity class, gates act on adjacent qubits for ``"Line"``
+    :type connectivity: str
+    :param barrier_every: every ``barrier_every``-th gate is a two qubit barrier
+    :type barrier_every: int
+    :param measure_every: every ``measure_every``-th gate (unless it's a barrier) is a measurement
+    :type measure_every: int
+    :rtype: GateChain
+    """
+    hw = hardware_by_name(
+        {
+            "gate_set_class": "FullGateSet",
+            "qubit_connectivity": {"class": connectivity, "args": {"num_qubits": num_qubits}},
+        }
+    )
+    rng = np.random.default_rng(seed)
+    gate_chain = GateChain(hw)
+    for i in range(num_gates):
+        if barrier_every and i % barrier_every == barrier_every - 1:
+            gate_chain.add_gate(Barrier(), rng.choice(num_qubits, 2, replace=False).tolist(), force_connection=True)
+            continue
+        if measure_every and i % measure_every == measure_every - 1:
+            q = int(rng.integers(num_qubits))
+            gate_chain.add_gate(Measure(), [q], cregs=[int(rng.integers(num_qubits))], force_connection=True)
+            continue
+        cls = gate_by_name(names[rng.integers(len(names))])
+        if connectivity == "Line":
+            start = rng.integers(num_qubits - cls.num_qubits + 1)
+            conn = list(range(start, start + cls.num_qubits))
+        else:
+            conn = rng.choice(num_qubits, cls.num_qubits, replace=False).tolist()
+        gate_chain.add_gate(cls(*rng.uniform(-np.pi, np.pi, cls.num_angles)), conn)
+    return gate_chain
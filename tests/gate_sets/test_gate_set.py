@@ -0,0 +1,70 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gate_sets.gate_set import GateSet
+from arline_quantum.gates.cnot import Cnot
+from arline_quantum.gates.h import H
+from arline_quantum.gates.s import S, Sd
+from arline_quantum.gates.t import T
+from arline_quantum.hardware import hardware_by_name
+
+
+class TestGateSet(unittest.TestCase):
+    def test_indexes(self):
+        gate_set = GateSet("HCnot", [H, Cnot])
+        self.assertEqual(gate_set.gates_by_name, {"H": H, "Cnot": Cnot})
+        self.assertEqual(gate_set.gates_by_qasm_name, {"h": H, "cx": Cnot})
+        self.assertTrue(gate_set.supports_gate_class(Cnot))
+        self.assertFalse(gate_set.supports_gate_class(T))
+
+        gate_set.add_gate(T)
+        self.assertIs(gate_set.gates_by_qasm_name["t"], T)
+        self.assertTrue(gate_set.supports_gate_class(T))
+
+        # Direct append to the gate list
+        gate_set.gate_list.append(S)
+        self.assertIs(gate_set.gates_by_name["S"], S)
+        self.assertTrue(gate_set.supports_gate_class(Sd))  # subclass of S
+
+        # In-place replacement keeps the list length
+        gate_set.gate_list[-1] = Sd
+        self.assertNotIn("S", gate_set.gates_by_name)
+        self.assertIs(gate_set.gates_by_name["Sd"], Sd)
+        self.assertFalse(gate_set.supports_gate_class(S))
+        gate_set.gate_list[-1] = S
+
+        reduced = gate_set.reduce_gate_set(1)
+        self.assertEqual(reduced.get_gate_names(), ["H", "T", "S"])
+        self.assertFalse(reduced.supports_gate_class(Cnot))
+        self.assertTrue(gate_set.supports_gate_class(Cnot))
+
+    def test_check_gate_set(self):
+        hw = hardware_by_name(
+            {"gate_set": ["H", "Cnot"], "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 2}}}
+        )
+        gate_chain = GateChain(hw)
+        gate_chain.add_gate(H(), [0])
+        gate_chain.add_gate(Cnot(), [0, 1])
+        gate_chain.add_gate(T(), [1], force_connection=True)
+        self.assertEqual(gate_chain.check_gate_set(), [(2, "T")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,7 +20,11 @@ import numpy as np
 
 from arline_quantum.gates import gate_by_name
 from arline_quantum.gates.rx import Rx
+from arline_quantum.gates.rz import Rz
+from arline_quantum.gates.u3 import U3
+from arline_quantum.gate_sets.gate_set import GateSet
 from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.utils.expression import evaluate_expression
 
 from qiskit import QuantumCircuit
 from qiskit.quantum_info.operators import Operator
@@ -65,6 +69,33 @@ class TestGateCreation(unittest.TestCase):
         self.assertEqual(g.is_discrete, True)
         np.testing.assert_almost_equal(g_ref.u, g.u)
 
+    def test_make_discrete_cache(self):
+        rx = Rx.make_discrete(np.pi / 2)
+        self.assertIs(Rx.make_discrete(np.pi / 2 + 1e-14), rx)
+        self.assertIs(gate_by_name("Rx(pi/2)"), rx)
+        self.assertIsNot(Rx.make_discrete(np.pi / 3), rx)
+        rx90 = Rx.make_discrete(np.pi / 2, class_name="Rx90")
+        self.assertEqual(rx90.__name__, "Rx90")
+        self.assertEqual(rx90().name, "Rx90")
+        self.assertTrue(issubclass(rx90, rx))
+        self.assertIs(Rx.make_discrete(np.pi / 2, class_name="Rx90"), rx90)
+        self.assertIs(Rx.make_discrete(np.pi / 2, class_name="Rx(pi/2)"), rx)
+        self.assertEqual(rx90().args, rx().args)
+        np.testing.assert_allclose(rx90().dagger().u, rx().dagger().u)
+        self.assertEqual(Rx.make_discrete(np.pi / 3, class_name="Rx60").__name__, "Rx60")
+        self.assertEqual(Rx.make_discrete(np.pi / 3).__name__, "Rx(pi/3)")
+        self.assertIs(gate_by_name("Rx(0.5*pi)"), rx)
+        self.assertIs(gate_by_name("Rx( pi/2 )"), rx)
+        self.assertEqual(gate_by_name("Rx(0.5*pi)").__name__, "Rx(pi/2)")
+
+        gate_set = GateSet("RxRz", [Rx, Rz])
+        gate_set.max_discrete_variants = 2
+        for angle in [np.pi, np.pi / 2, np.pi, -np.pi / 2]:
+            gate_set.discrete_variant(Rx, angle)
+        self.assertEqual(gate_set.discrete_variants, [Rx.make_discrete(np.pi), Rx.make_discrete(-np.pi / 2)])
+        with self.assertRaises(ValueError):
+            gate_set.discrete_variant(U3, 0, 0, 0)
+
     def test_conjugate_on_discrete(self):
         g_ref = Rx(2 * np.pi / 30).dagger()
         g = Rx.make_discrete(2 * np.pi / 30)().dagger()
@@ -97,5 +128,21 @@ class TestGateCreation(unittest.TestCase):
         self.assertEqual(g.angles(representation='rational'), ['-3*pi/20'])
         self.assertEqual(g.angles(representation='decimal'), ['-0.15*pi'])
 
+    def test_gate_by_name_cache(self):
+        self.assertIs(gate_by_name("Rx(pi/2)"), gate_by_name("Rx(pi/2)"))
+        np.testing.assert_almost_equal(gate_by_name("U3(pi/2, -pi, sqrt(2))")().args, [np.pi / 2, -np.pi, np.sqrt(2)])
+        with self.assertRaises(ValueError):
+            gate_by_name("Rx(__import__('os').getcwd())")
+
+    def test_evaluate_expression(self):
+        self.assertAlmostEqual(evaluate_expression("-2*pi/3"), -2 * np.pi / 3)
+        self.assertAlmostEqual(evaluate_expression("2**-1 + cos(0)"), 1.5)
+        self.assertAlmostEqual(evaluate_expression("(-8)**(2/2)"), -8)
+        self.assertAlmostEqual(evaluate_expression("8**(1/3)"), 2)
+        for expr in ["x", "1; 2", "abs(-1)", "(1).real", "9**9**9", "(-8)**(1/3)", "pi/0"]:
+            with self.assertRaises(ValueError):
+                evaluate_expression(expr)
+
+
 if __name__ == "__main__":
     unittest.main()
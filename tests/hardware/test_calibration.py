@@ -0,0 +1,191 @@
+# Arline Quantum
+# Copyright (C) 2019-2022 Turation Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from arline_quantum.estimators import CalibratedFidelityEstimator, Estimator, IbmCostFunction
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gates.cnot import Cnot
+from arline_quantum.gates.h import H
+from arline_quantum.gates.measure import Measure
+from arline_quantum.gates.rz import Rz
+from arline_quantum.hardware import hardware_by_name
+from arline_quantum.hardware.calibration import CalibrationTable
+
+
+def line_calibration(num_qubits=4):
+    return CalibrationTable(
+        num_qubits,
+        edges=[(q, q + 1) for q in range(num_qubits - 1)],
+        t1=np.linspace(50, 80, num_qubits),
+        t2=np.linspace(30, 60, num_qubits),
+        single_qubit_error=np.linspace(1e-4, 4e-4, num_qubits),
+        readout_error=np.linspace(1e-2, 4e-2, num_qubits),
+        two_qubit_error=np.linspace(1e-2, 3e-2, num_qubits - 1),
+        single_qubit_gate_time=0.05,
+        two_qubit_gate_time=0.3,
+    )
+
+
+def line_hardware(calibration, num_qubits=4):
+    return hardware_by_name(
+        {
+            "gate_set": ["H", "Rz", "Cnot"],
+            "qubit_connectivity": {"class": "Line", "args": {"num_qubits": num_qubits}},
+            "calibration": calibration,
+        }
+    )
+
+
+class TestCalibrationTable(unittest.TestCase):
+    def test_edge_index(self):
+        table = CalibrationTable(3, edges=[(0, 1), (1, 2), (2, 1)], two_qubit_error=[0.1, 0.2, 0.3])
+        np.testing.assert_array_equal(
+            table.edge_index, [[-1, 0, -1], [0, -1, 1], [-1, 2, -1]]
+        )
+        np.testing.assert_array_equal(table.t1, [np.inf] * 3)
+        with self.assertRaises(ValueError):
+            CalibrationTable(3, edges=[(0, 3)], two_qubit_error=[0.1])
+        sub = table.subset([2, 1])
+        np.testing.assert_array_equal(sub.edges, [[1, 0], [0, 1]])
+        np.testing.assert_array_equal(sub.two_qubit_error, [0.2, 0.3])
+
+    def test_dict(self):
+        table = line_calibration()
+        table.t1[1] = np.inf
+        table.t2[3] = np.inf
+        data = table.to_dict()
+        self.assertIsNone(data["t1"][1])
+        self.assertEqual(CalibrationTable.from_dict(data), table)
+        hw = line_hardware(data)
+        self.assertEqual(hw.calibration, table)
+        self.assertFalse(np.isnan(hw.calibration.log_idle_fidelity(np.ones(4))).any())
+
+    def test_json_csv(self):
+        table = line_calibration()
+        table.t1[2] = np.inf
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "calibration.json")
+            table.to_json(path)
+            self.assertEqual(CalibrationTable.from_json(path), table)
+            self.assertEqual(CalibrationTable.from_config(path), table)
+
+            qubits_csv = os.path.join(tmp, "qubits.csv")
+            edges_csv = os.path.join(tmp, "edges.csv")
+            with open(qubits_csv, "w") as f:
+                f.write("qubit,t1,single_qubit_error\n1,70,0.002\n0,,0.001\n")
+            with open(edges_csv, "w") as f:
+                f.write("qubit0,qubit1,two_qubit_error\n0,2,0.02\n")
+            table = CalibrationTable.from_config(
+                {"qubits_csv": qubits_csv, "edges_csv": edges_csv, "num_qubits": 3, "two_qubit_gate_time": 0.3}
+            )
+        np.testing.assert_array_equal(table.t1, [np.inf, 70, np.inf])
+        np.testing.assert_array_equal(table.single_qubit_error, [0.001, 0.002, 0])
+        np.testing.assert_array_equal(table.readout_error, [0, 0, 0])
+        self.assertEqual(table.edge_index[2, 0], 0)
+        self.assertEqual(table.two_qubit_gate_time, 0.3)
+
+    def test_hardware(self):
+        table = line_calibration()
+        hw = line_hardware(table.to_dict())
+        self.assertEqual(hw.calibration, table)
+        self.assertEqual(hw.copy().calibration, table)
+        with self.assertRaises(ValueError):
+            line_hardware(table).calibration = line_calibration(3)
+
+        chain = GateChain(hw)
+        chain.add_gate(Cnot(), [2, 3])
+        stripped, _ = chain.strip_empty_qubits()
+        np.testing.assert_array_equal(stripped.quantum_hardware.calibration.t1, table.t1[2:])
+        np.testing.assert_array_equal(stripped.quantum_hardware.calibration.two_qubit_error, table.two_qubit_error[2:])
+
+
+class TestCalibratedFidelityEstimator(unittest.TestCase):
+    def test_cost(self):
+        table = line_calibration()
+        hw = line_hardware(table)
+        chain = GateChain(hw)
+        np.random.seed(1)
+        for _ in range(200):
+            q = np.random.randint(4)
+            if np.random.rand() < 0.5:
+                chain.add_gate(Rz(np.random.rand()) if q % 2 else H(), [q])
+            else:
+                q = min(q, 2)
+                chain.add_gate(Cnot(), [q, q + 1] if np.random.rand() < 0.5 else [q + 1, q])
+        chain.add_gate(Measure(), [1], [1])
+
+        expected = 0
+        for el in chain.chain:
+            q = el.connections
+            if isinstance(el.gate, Measure):
+                expected -= np.log(1 - table.readout_error[q[0]])
+            elif len(q) == 1:
+                expected -= np.log(1 - table.single_qubit_error[q[0]])
+            else:
+                expected -= np.log(1 - table.two_qubit_error[min(q)])
+        estimator = Estimator.from_config({"class": "CalibratedFidelityEstimator", "args": {"decoherence": False}})
+        self.assertAlmostEqual(estimator.calculate_cost(chain), expected)
+
+        estimator = CalibratedFidelityEstimator()
+        times = estimator.qubit_times(chain, table)
+        self.assertEqual(times.max(), chain.get_depth() * 0.3)
+        idle = np.log(0.5 + np.exp(-times / table.t1) / 6 + np.exp(-times / table.t2) / 3).sum()
+        self.assertAlmostEqual(estimator.calculate_cost(chain), expected - idle)
+        self.assertAlmostEqual(estimator.fidelity(chain), np.exp(idle - expected))
+
+        # Uncalibrated pair
+        chain.add_gate(Cnot(), [0, 3], force_connection=True)
+        self.assertTrue(np.isnan(estimator.calculate_cost(chain)))
+
+    def test_uniform(self):
+        hw = hardware_by_name({"class": "IbmRueschlikonSymmetrical"})
+        chain = GateChain(hw)
+        chain.add_gate(H(), [0])
+        chain.add_gate(Cnot(), [0, 1])
+        chain.add_gate(Cnot(), [1, 2])
+        self.assertAlmostEqual(
+            CalibratedFidelityEstimator().calculate_cost(chain), IbmCostFunction(1).calculate_cost(chain)
+        )
+
+        table = hw.get_calibration()
+        self.assertIs(hw.get_calibration(), table)
+        hw.two_qubit_gate_fidelity = 0.95
+        self.assertIsNot(hw.get_calibration(), table)
+        np.testing.assert_allclose(hw.get_calibration().two_qubit_error, 0.05)
+        table = hw.get_calibration()
+        hw.qubit_connectivity.delete_connection(0, 1)
+        self.assertEqual(len(hw.get_calibration().edges), len(table.edges) - 1)
+
+    def test_estimate_connectivity_change(self):
+        hw = hardware_by_name(
+            {"gate_set": ["H", "Cnot"], "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 2}}}
+        )
+        chain = GateChain(hw)
+        chain.add_gate(Cnot(), [0, 1])
+        self.assertAlmostEqual(chain.calculate_noise(), -np.log(0.99))
+        hw.qubit_connectivity.delete_connection(0, 1)
+        hw.qubit_connectivity.delete_connection(1, 0)
+        self.assertTrue(np.isnan(chain.calculate_noise()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,10 +21,26 @@ from arline_quantum.hardware import hardware_by_name
 from arline_quantum.qubit_connectivities.qubit_connectivity import All2All, Line
 from arline_quantum.hardware.hardware import Hardware
 from arline_quantum.gate_sets.gate_set import GateSet
+from arline_quantum.estimators import Estimator, IbmCostFunction, TwoQubitGateCountCostFunction
+from arline_quantum.gate_chain.gate_chain import GateChain
+from arline_quantum.gates.cnot import Cnot
+from arline_quantum.gates.h import H
 import numpy as np
 
 
+class CountingEstimator(TwoQubitGateCountCostFunction):
+    calls = 0
+
+    def calculate_cost(self, gate_chain):
+        CountingEstimator.calls += 1
+        return super().calculate_cost(gate_chain)
+
+
 class TestHardware(unittest.TestCase):
+    def setUp(self):
+        Estimator.register_estimator(CountingEstimator)
+        self.addCleanup(Estimator.registered_estimator_classes.pop, CountingEstimator.__name__)
+
     def test_all2all_connectivity_creation(self):
         hw = hardware_by_name(
             {
@@ -71,6 +87,39 @@ class TestHardware(unittest.TestCase):
         )
         self.assertTrue(isinstance(hw.qubit_connectivity, Line))
 
+    def test_gate_chain_cost(self):
+        hw = hardware_by_name(
+            {
+                "gate_set": ["H", "Cnot"],
+                "qubit_connectivity": {"class": "All2All", "args": {"num_qubits": 3}},
+                "estimators": [{"class": "CountingEstimator", "weight": 10}, {"class": "DepthCostEstimator"}],
+                "noise_estimator": {"class": "IbmCostFunction", "args": {"depth_penalty_factor": 1}},
+            }
+        )
+        chain = GateChain(hw)
+        chain.add_gate(H(), [0])
+        chain.add_gate(Cnot(), [0, 1])
+        chain.add_gate(Cnot(), [1, 2])
+        CountingEstimator.calls = 0
+        self.assertEqual(chain.calculate_cost(), 10 * 2 + 3)
+        self.assertAlmostEqual(chain.calculate_noise(), -np.log(0.999) - 2 * np.log(0.99))
+        self.assertEqual(chain.copy().calculate_cost(), 23)
+        self.assertEqual(CountingEstimator.calls, 1)
+
+        chain.add_gate(Cnot(), [0, 2])
+        self.assertEqual(chain.calculate_cost(), 10 * 3 + 4)
+        self.assertEqual(CountingEstimator.calls, 2)
+        hw.two_qubit_gate_fidelity = 0.9
+        self.assertAlmostEqual(chain.calculate_noise(), -np.log(0.999) - 3 * np.log(0.9))
+        self.assertEqual(CountingEstimator.calls, 3)
+
+        # Default estimators
+        hw = hardware_by_name({"class": "IbmRueschlikonSymmetrical"})
+        chain = GateChain(hw)
+        chain.add_gate(Cnot(), [0, 1])
+        self.assertAlmostEqual(chain.calculate_cost(), IbmCostFunction().calculate_cost(chain))
+        self.assertAlmostEqual(chain.calculate_noise(), -np.log(0.99))
+
 
 if __name__ == "__main__":
     unittest.main()